@@ -1,9 +1,19 @@
-from src.db.db import Base, engine
+import logging
 
+from src.db.migrations import migrar
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+log = logging.getLogger("init_db")
+
+
+def init_db() -> list[str]:
+    return migrar()
 
 
 if __name__ == "__main__":
-    init_db()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    aplicadas = init_db()
+    log.info("%d migração(ões) aplicada(s)", len(aplicadas))
@@ -1,7 +1,7 @@
 import os
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 load_dotenv()
@@ -16,12 +16,22 @@ if DATABASE_URL.startswith("postgresql://") and "+psycopg" not in DATABASE_URL:
 engine_kwargs: dict[str, object] = dict(pool_pre_ping=True, echo=False)
 
 if DATABASE_URL.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
+    engine_kwargs["connect_args"] = {"check_same_thread": False, "timeout": 30}
 
-    from sqlalchemy.pool import StaticPool
+    if DATABASE_URL in {"sqlite://", "sqlite:///:memory:"}:
+        from sqlalchemy.pool import StaticPool
 
-    engine_kwargs["poolclass"] = StaticPool
+        engine_kwargs["poolclass"] = StaticPool
 
 engine = create_engine(DATABASE_URL, **engine_kwargs)
+
+if DATABASE_URL.startswith("sqlite") and "poolclass" not in engine_kwargs:
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_wal(dbapi_conn, _record):
+        # leituras em streaming (yield_per) não bloqueiam as escritas do ledger
+        dbapi_conn.execute("PRAGMA journal_mode=WAL")
+
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
@@ -0,0 +1,153 @@
+import logging
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import Connection, Engine, Table, insert, inspect, select, text
+
+from src.db.db import Base, engine
+from src.db.tables import (
+    AGENDA_SEM_SOBREPOSICAO,
+    EXTENSAO_BTREE_GIST,
+    RESTRICAO_AGENDA,
+    AgendaSQL,
+    FisioDisponSQL,
+    FisioterapeutaSQL,
+    LembreteEnviadoSQL,
+    PacienteSQL,
+    PagamentoSQL,
+    SchemaMigrationSQL,
+    agora_utc,
+)
+
+log = logging.getLogger("migrations")
+
+LOCK_MIGRACOES = 748_211
+INDICES_CONSULTAS = (
+    "ix_pacientes_ativos",
+    "ix_pacientes_ativos_vencimento",
+    "ix_agenda_fisio_data_hora",
+    "ix_fisio_disp_fisio_weekday",
+)
+COLUNAS_AULA_ANTIGAS = (
+    "aula_seg",
+    "aula_ter",
+    "aula_qua",
+    "aula_qui",
+    "aula_sex",
+    "aula_sab",
+    "aula_dom",
+)
+
+
+def _adicionar_colunas(
+    conn: Connection, tabela: Table, nomes: Iterable[str], padrao: str | None = None
+) -> list[str]:
+    existentes = {c["name"] for c in inspect(conn).get_columns(tabela.name)}
+    ddl = conn.dialect.ddl_compiler(conn.dialect, None)
+    novas = [nome for nome in nomes if nome not in existentes]
+    for nome in novas:
+        coluna = ddl.get_column_specification(tabela.c[nome])
+        if padrao is not None:
+            coluna += f" DEFAULT '{padrao}'"
+        conn.exec_driver_sql(f"ALTER TABLE {tabela.name} ADD COLUMN {coluna}")
+    return novas
+
+
+def _esquema_inicial(conn: Connection) -> None:
+    Base.metadata.create_all(conn)
+
+
+def _colunas_rastreamento(conn: Connection) -> None:
+    # SQLite só aceita default constante no ADD COLUMN; o instante da migração preenche as linhas
+    agora = agora_utc().isoformat(sep=" ")
+    for modelo in (PacienteSQL, AgendaSQL, FisioterapeutaSQL, FisioDisponSQL):
+        tabela = modelo.__table__
+        _adicionar_colunas(conn, tabela, ("deleted_at",))
+        if _adicionar_colunas(conn, tabela, ("updated_at",), padrao=agora):
+            if conn.dialect.name == "postgresql":
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {tabela.name} ALTER COLUMN updated_at DROP DEFAULT"
+                )
+        for idx in tabela.indexes:
+            if [c.name for c in idx.columns] == ["updated_at"]:
+                idx.create(conn, checkfirst=True)
+
+
+def _colunas_novas(conn: Connection) -> None:
+    _colunas_rastreamento(conn)
+    _adicionar_colunas(
+        conn,
+        PacienteSQL.__table__,
+        ("plano_tipo", "plano_dia", "plano_sessoes", "plano_valor", "version"),
+    )
+    if _adicionar_colunas(conn, PagamentoSQL.__table__, ("referencia",)):
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_pagamentos_referencia ON pagamentos (referencia)"
+        )
+    _adicionar_colunas(conn, AgendaSQL.__table__, ("version",))
+
+
+def _agenda_sem_sobreposicao(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    existe = conn.execute(
+        text("SELECT 1 FROM pg_constraint WHERE conname = :nome"),
+        {"nome": AGENDA_SEM_SOBREPOSICAO},
+    ).first()
+    if not existe:
+        conn.execute(EXTENSAO_BTREE_GIST)
+        conn.execute(RESTRICAO_AGENDA)
+
+
+def _indices_consultas(conn: Connection) -> None:
+    indices = {i.name: i for t in Base.metadata.sorted_tables for i in t.indexes}
+    for nome in INDICES_CONSULTAS:
+        indices[nome].create(conn, checkfirst=True)
+
+
+def _dias_aula_bitmask(conn: Connection) -> None:
+    _adicionar_colunas(conn, PacienteSQL.__table__, ("dias_aula",))
+    existentes = {c["name"] for c in inspect(conn).get_columns("pacientes")}
+    antigas = [col for col in COLUNAS_AULA_ANTIGAS if col in existentes]
+    if antigas:
+        bits = " + ".join(
+            f"CASE WHEN {col} THEN {1 << COLUNAS_AULA_ANTIGAS.index(col)} ELSE 0 END"
+            for col in antigas
+        )
+        conn.exec_driver_sql(f"UPDATE pacientes SET dias_aula = {bits}")
+        for col in antigas:
+            conn.exec_driver_sql(f"ALTER TABLE pacientes DROP COLUMN {col}")
+    indices = {i.name: i for i in PacienteSQL.__table__.indexes}
+    indices["ix_pacientes_ativos_dias_aula"].create(conn, checkfirst=True)
+
+
+def _lembretes_pendentes(conn: Connection) -> None:
+    _adicionar_colunas(conn, LembreteEnviadoSQL.__table__, ("status",))
+
+
+MIGRACOES: tuple[tuple[int, str, Callable[[Connection], None]], ...] = (
+    (1, "esquema_inicial", _esquema_inicial),
+    (2, "planos_referencia_versao", _colunas_novas),
+    (3, "agenda_sem_sobreposicao", _agenda_sem_sobreposicao),
+    (4, "indices_consultas_quentes", _indices_consultas),
+    (5, "dias_aula_bitmask", _dias_aula_bitmask),
+    (6, "lembretes_pendentes", _lembretes_pendentes),
+)
+
+
+def migrar(bind: Engine = engine) -> list[str]:
+    aplicadas = []
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": LOCK_MIGRACOES})
+        SchemaMigrationSQL.__table__.create(conn, checkfirst=True)
+        feitas = set(conn.execute(select(SchemaMigrationSQL.versao)).scalars())
+        for versao, nome, passo in MIGRACOES:
+            if versao in feitas:
+                continue
+            log.info("Aplicando migração %04d_%s", versao, nome)
+            passo(conn)
+            conn.execute(
+                insert(SchemaMigrationSQL).values(versao=versao, nome=nome, aplicada_em=agora_utc())
+            )
+            aplicadas.append(f"{versao:04d}_{nome}")
+    return aplicadas
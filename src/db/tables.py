@@ -1,9 +1,31 @@
-from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, String, Time
+from datetime import UTC, datetime
+
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    Time,
+    UniqueConstraint,
+    and_,
+    event,
+)
 from sqlalchemy.orm import relationship
 
 from .db import Base
 
 
+def agora_utc() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 class PacienteSQL(Base):
     __tablename__ = "pacientes"
     id = Column(Integer, primary_key=True, index=True)
@@ -15,13 +37,38 @@ class PacienteSQL(Base):
     data_proxima_cobranca = Column(Date, nullable=True)
     ativo = Column(Boolean, nullable=False, default=True)
 
-    aula_seg = Column(Boolean, nullable=False, default=False)
-    aula_ter = Column(Boolean, nullable=False, default=False)
-    aula_qua = Column(Boolean, nullable=False, default=False)
-    aula_qui = Column(Boolean, nullable=False, default=False)
-    aula_sex = Column(Boolean, nullable=False, default=False)
-    aula_sab = Column(Boolean, nullable=False, default=False)
-    aula_dom = Column(Boolean, nullable=False, default=False)
+    plano_tipo = Column(String, nullable=False, default="dias_30", server_default="dias_30")
+    plano_dia = Column(Integer, nullable=True)
+    plano_sessoes = Column(Integer, nullable=True)
+    plano_valor = Column(Numeric(10, 2), nullable=True)
+
+    # bit 0 = segunda ... bit 6 = domingo
+    dias_aula = Column(Integer, nullable=False, default=0, server_default="0")
+
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=False, default=agora_utc, onupdate=agora_utc, index=True)
+    deleted_at = Column(DateTime, nullable=True)
+
+
+Index(
+    "ix_pacientes_ativos",
+    PacienteSQL.id,
+    sqlite_where=and_(PacienteSQL.ativo.is_(True), PacienteSQL.deleted_at.is_(None)),
+    postgresql_where=and_(PacienteSQL.ativo.is_(True), PacienteSQL.deleted_at.is_(None)),
+)
+Index(
+    "ix_pacientes_ativos_vencimento",
+    PacienteSQL.data_proxima_cobranca,
+    PacienteSQL.id,
+    sqlite_where=and_(PacienteSQL.ativo.is_(True), PacienteSQL.deleted_at.is_(None)),
+    postgresql_where=and_(PacienteSQL.ativo.is_(True), PacienteSQL.deleted_at.is_(None)),
+)
+Index(
+    "ix_pacientes_ativos_dias_aula",
+    PacienteSQL.dias_aula,
+    sqlite_where=and_(PacienteSQL.ativo.is_(True), PacienteSQL.deleted_at.is_(None)),
+    postgresql_where=and_(PacienteSQL.ativo.is_(True), PacienteSQL.deleted_at.is_(None)),
+)
 
 
 class UserSQL(Base):
@@ -40,6 +87,9 @@ class FisioterapeutaSQL(Base):
     email = Column(String, nullable=True, unique=True, index=True)
     ativo = Column(Boolean, nullable=False, default=True)
 
+    updated_at = Column(DateTime, nullable=False, default=agora_utc, onupdate=agora_utc, index=True)
+    deleted_at = Column(DateTime, nullable=True)
+
     disponibilidades = relationship(
         "FisioDisponSQL", back_populates="fisio", cascade="all, delete-orphan"
     )
@@ -47,6 +97,7 @@ class FisioterapeutaSQL(Base):
 
 class FisioDisponSQL(Base):
     __tablename__ = "fisio_disponibilidades"
+    __table_args__ = (Index("ix_fisio_disp_fisio_weekday", "fisio_id", "weekday"),)
     id = Column(Integer, primary_key=True)
     fisio_id = Column(
         Integer, ForeignKey("fisioterapeutas.id", ondelete="CASCADE"), nullable=False, index=True
@@ -55,6 +106,9 @@ class FisioDisponSQL(Base):
     hora_inicio = Column(Time, nullable=False)
     hora_fim = Column(Time, nullable=False)
 
+    updated_at = Column(DateTime, nullable=False, default=agora_utc, onupdate=agora_utc, index=True)
+    deleted_at = Column(DateTime, nullable=True)
+
     fisio = relationship("FisioterapeutaSQL", back_populates="disponibilidades")
 
 
@@ -70,6 +124,7 @@ class PacienteAulaSQL(Base):
 
 class AgendaSQL(Base):
     __tablename__ = "agenda"
+    __table_args__ = (Index("ix_agenda_fisio_data_hora", "fisio_id", "data", "hora_inicio"),)
     id = Column(Integer, primary_key=True)
     fisio_id = Column(
         Integer, ForeignKey("fisioterapeutas.id", ondelete="CASCADE"), nullable=False, index=True
@@ -81,3 +136,100 @@ class AgendaSQL(Base):
     hora_inicio = Column(Time, nullable=False)
     hora_fim = Column(Time, nullable=False)
     status = Column(String, nullable=False, default="agendado")
+
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=False, default=agora_utc, onupdate=agora_utc, index=True)
+    deleted_at = Column(DateTime, nullable=True)
+
+
+AGENDA_SEM_SOBREPOSICAO = "ex_agenda_fisio_horario"
+EXTENSAO_BTREE_GIST = DDL("CREATE EXTENSION IF NOT EXISTS btree_gist")
+RESTRICAO_AGENDA = DDL(
+    f"ALTER TABLE agenda ADD CONSTRAINT {AGENDA_SEM_SOBREPOSICAO} EXCLUDE USING gist "
+    "(fisio_id WITH =, tsrange(data + hora_inicio, data + hora_fim) WITH &&) "
+    "WHERE (status <> 'cancelado' AND deleted_at IS NULL)"
+)
+
+event.listen(
+    AgendaSQL.__table__, "before_create", EXTENSAO_BTREE_GIST.execute_if(dialect="postgresql")
+)
+event.listen(AgendaSQL.__table__, "after_create", RESTRICAO_AGENDA.execute_if(dialect="postgresql"))
+
+
+class ExportWatermarkSQL(Base):
+    __tablename__ = "export_watermarks"
+    nome = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    atualizado_em = Column(DateTime, nullable=False, default=agora_utc, onupdate=agora_utc)
+
+
+class LembreteEnviadoSQL(Base):
+    __tablename__ = "reminders_sent"
+    __table_args__ = (
+        UniqueConstraint("paciente_id", "vencimento", "tipo", name="uq_reminders_sent"),
+    )
+    id = Column(Integer, primary_key=True)
+    paciente_id = Column(
+        Integer, ForeignKey("pacientes.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    vencimento = Column(Date, nullable=False)
+    tipo = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="enviado", server_default="enviado")
+    enviado_em = Column(DateTime, nullable=False, default=agora_utc)
+
+
+class OutboxSQL(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (Index("ix_outbox_status_disponivel", "status", "disponivel_em"),)
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String, nullable=False)
+    destinatario = Column(String, nullable=False)
+    assunto = Column(String, nullable=False)
+    texto = Column(Text, nullable=False)
+    html = Column(Text, nullable=True)
+    status = Column(String, nullable=False, default="pendente")
+    tentativas = Column(Integer, nullable=False, default=0)
+    disponivel_em = Column(DateTime, nullable=False, default=agora_utc)
+    lease_token = Column(String, nullable=True, index=True)
+    lease_ate = Column(DateTime, nullable=True)
+    ultimo_erro = Column(Text, nullable=True)
+    criado_em = Column(DateTime, nullable=False, default=agora_utc)
+    enviado_em = Column(DateTime, nullable=True)
+
+
+class ReminderShardLeaseSQL(Base):
+    __tablename__ = "reminder_shard_leases"
+    dia = Column(Date, primary_key=True)
+    tipo = Column(String, primary_key=True, default="vencimento_7d")
+    total = Column(Integer, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    status = Column(String, nullable=False, default="executando")
+    lease_token = Column(String, nullable=True)
+    lease_ate = Column(DateTime, nullable=True)
+    enviados = Column(Integer, nullable=False, default=0)
+    sem_email = Column(Integer, nullable=False, default=0)
+    ja_enviados = Column(Integer, nullable=False, default=0)
+    falhas = Column(Integer, nullable=False, default=0)
+    iniciado_em = Column(DateTime, nullable=False, default=agora_utc)
+    concluido_em = Column(DateTime, nullable=True)
+
+
+class PagamentoSQL(Base):
+    __tablename__ = "pagamentos"
+    __table_args__ = (Index("ix_pagamentos_paciente_data", "paciente_id", "data"),)
+    id = Column(Integer, primary_key=True)
+    paciente_id = Column(Integer, ForeignKey("pacientes.id", ondelete="CASCADE"), nullable=False)
+    data = Column(Date, nullable=False, index=True)
+    valor = Column(Numeric(10, 2), nullable=True)
+    metodo = Column(String, nullable=True)
+    periodo_inicio = Column(Date, nullable=False)
+    periodo_fim = Column(Date, nullable=False)
+    referencia = Column(String, nullable=True, unique=True)
+    criado_em = Column(DateTime, nullable=False, default=agora_utc)
+
+
+class SchemaMigrationSQL(Base):
+    __tablename__ = "schema_migrations"
+    versao = Column(Integer, primary_key=True, autoincrement=False)
+    nome = Column(String, nullable=False)
+    aplicada_em = Column(DateTime, nullable=False, default=agora_utc)
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from datetime import date, time
+
+STATUS_AGENDA = ("agendado", "cancelado")
+
+
+@dataclass(slots=True, frozen=True)
+class SessoesPaciente:
+    paciente_id: int
+    nome: str
+    email: str | None
+    data: date
+    horarios: tuple[tuple[time, time, str], ...]
@@ -1,5 +1,20 @@
 from dataclasses import dataclass
 from datetime import date
+from decimal import Decimal
+
+DIAS_SEMANA = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
+
+
+def mascara_dias(weekdays) -> int:
+    return sum(1 << wd for wd in set(weekdays))
+
+
+def dias_da_mascara(mascara: int) -> list[int]:
+    return [wd for wd in range(7) if mascara >> wd & 1]
+
+
+def mascaras_com_dia(weekday: int) -> tuple[int, ...]:
+    return tuple(m for m in range(1 << 7) if m >> weekday & 1)
 
 
 @dataclass(slots=True, frozen=True)
@@ -12,10 +27,51 @@ class Paciente:
     data_ultimo_pagamento: date | None
     data_proxima_cobranca: date
     ativo: bool = True
-    aula_seg: bool = False
-    aula_ter: bool = False
-    aula_qua: bool = False
-    aula_qui: bool = False
-    aula_sex: bool = False
-    aula_sab: bool = False
-    aula_dom: bool = False
+    dias_aula: int = 0
+    plano_tipo: str = "dias_30"
+    plano_dia: int | None = None
+    plano_sessoes: int | None = None
+    plano_valor: Decimal | None = None
+    version: int = 1
+
+    def tem_aula(self, weekday: int) -> bool:
+        return bool(self.dias_aula >> weekday & 1)
+
+
+@dataclass(slots=True, frozen=True)
+class VencimentoPaciente:
+    id: int
+    nome: str
+    email: str | None
+    telefone: str | None
+    vencimento: date
+
+
+@dataclass(slots=True, frozen=True)
+class PacienteIdentificacao:
+    id: int
+    nome: str
+    telefone: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class NovoPaciente:
+    nome: str
+    email: str | None
+    telefone: str | None
+    data_entrada: date
+    aulas: tuple[tuple[int, str], ...] = ()
+
+
+@dataclass(slots=True, frozen=True)
+class ErroImportacao:
+    linha: int
+    campo: str
+    mensagem: str
+
+
+@dataclass(slots=True, frozen=True)
+class ResultadoImportacao:
+    validos: int
+    importados: int
+    erros: list[ErroImportacao]
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+METODOS_PAGAMENTO = ("pix", "dinheiro", "cartao", "transferencia", "boleto")
+FAIXAS_ATRASO = ("1-7", "8-30", "31+")
+
+
+@dataclass(slots=True, frozen=True)
+class Pagamento:
+    id: int
+    paciente_id: int
+    paciente_nome: str
+    data: date
+    valor: Decimal | None
+    metodo: str | None
+    periodo_inicio: date
+    periodo_fim: date
+
+
+@dataclass(slots=True, frozen=True)
+class TotalMensal:
+    ano: int
+    mes: int
+    quantidade: int
+    total: Decimal
+
+
+@dataclass(slots=True, frozen=True)
+class FaixaAtraso:
+    faixa: str
+    quantidade: int
+    total: Decimal
+    sem_valor: int
+
+
+@dataclass(slots=True, frozen=True)
+class Lancamento:
+    paciente_id: int
+    data: date
+    valor: Decimal | None = None
+    metodo: str | None = None
+    periodo_inicio: date | None = None
+    periodo_fim: date | None = None
+    referencia: str | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class LinhaExtrato:
+    linha: int
+    data: date
+    valor: Decimal
+    descricao: str
+    referencia: str
+    paciente_id: int | None = None
+    telefone: str | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class Conciliacao:
+    extrato: LinhaExtrato
+    paciente_id: int | None
+    paciente_nome: str | None
+    criterio: str | None
+    motivo: str | None = None
@@ -12,7 +12,12 @@ from src.pages.fisioterapeuta.lista_fisioterapeutas import (  # noqa: F401
 from src.pages.matriz.matriz import render_matriz_me_tab  # noqa: F401
 from src.pages.paciente.add_pacientes import render_add_pacientes_tab  # noqa: F401
 from src.pages.paciente.edit_pacientes import render_edit_pacientes_tab  # noqa: F401
+from src.pages.paciente.importar_pacientes import render_importar_pacientes_tab  # noqa: F401
 from src.pages.paciente.lista_pacientes import render_list_pacientes_tab  # noqa: F401
 from src.pages.paciente.paciente_classes import render_paciente_classes_tab  # noqa: F401
+from src.pages.pagamento.importar_extrato import render_importar_extrato_tab  # noqa: F401
 from src.pages.pagamento.lista_pagamentos import render_pagamentos_tab  # noqa: F401
+from src.pages.pagamento.previsao_recebimentos import (  # noqa: F401
+    render_previsao_recebimentos_tab,
+)
 from src.pages.pagamento.proximos_pagamentos import render_proximos_pagamentos_tab  # noqa: F401
@@ -1,39 +1,33 @@
+import logging
 from datetime import date, datetime, time, timedelta
 
 import pandas as pd
 import streamlit as st
 
 from src.services.clinica_service import ClinicaService
-from src.utils.classes_utils import build_times_csv, build_times_ics
+from src.utils.export_utils import build_times_csv
+from src.utils.streamlit_utils import lazy_download_button, load_once
 from src.utils.user_utils import get_fisioterapeutas
 
+logger = logging.getLogger("vitally_app")
 
-def render_fisioterapeutas_horarios_tab(service: ClinicaService) -> None:
-    st.subheader("Grade do Fisioterapeuta")
-
-    fisios = get_fisioterapeutas(service)
-    if not fisios:
-        st.info("Cadastre um fisioterapeuta")
-        return
-
-    options = {f"[{f.id}] {f.nome}": f for f in fisios}
-    escolha = st.selectbox("Fisioterapeuta", list(options.keys()), key="grade_fisio_escolha")
-    fisio = options[escolha]
+ICS_JANELA_DIAS = 365
 
-    col1, col2 = st.columns([1, 1])
-    with col1:
-        semana_ini = st.date_input("Início da semana", value=date.today())
-    with col2:
-        slot_min = st.number_input("Tamanho do slot (min)", value=30, min_value=15, step=15)
-
-    data_fim = semana_ini + timedelta(days=6)
-    itens = service.grade_do_fisio(fisio.id, semana_ini, data_fim)
 
+def _carregar_grade(service: ClinicaService, fisio_id: int, data_inicio: date, data_fim: date):
+    itens = list(service.grade_do_fisio(fisio_id, data_inicio, data_fim))
     try:
-        todos = service.listar_pacientes(only_active=False)
-        nome_by_id = {p.id: p.nome for p in todos}
+        nome_by_id = service.nomes_pacientes({ag.paciente_id for ag in itens if ag.paciente_id})
     except Exception:
         nome_by_id = {}
+    return itens, nome_by_id
+
+
+@st.fragment
+def _render_grade(itens, nome_by_id: dict[int, str], semana_ini: date) -> None:
+    slot_min = st.number_input(
+        "Tamanho do slot (min)", value=30, min_value=15, step=15, key="grade_slot_min"
+    )
 
     dias = [semana_ini + timedelta(days=i) for i in range(7)]
     horas = []
@@ -65,38 +59,82 @@ def render_fisioterapeutas_horarios_tab(service: ClinicaService) -> None:
 
     st.dataframe(df, use_container_width=True, height=773)
 
+
+def render_fisioterapeutas_horarios_tab(service: ClinicaService) -> None:
+    st.subheader("Grade do Fisioterapeuta")
+
+    fisios = get_fisioterapeutas(service)
+    if not fisios:
+        st.info("Cadastre um fisioterapeuta")
+        return
+
+    options = {f"[{f.id}] {f.nome}": f for f in fisios}
+    escolha = st.selectbox("Fisioterapeuta", list(options.keys()), key="grade_fisio_escolha")
+    fisio = options[escolha]
+
+    semana_ini = st.date_input("Início da semana", value=date.today(), key="grade_semana_ini")
+    data_fim = semana_ini + timedelta(days=6)
+
+    try:
+        itens, nome_by_id = load_once(
+            "grade_fisio",
+            (fisio.id, semana_ini, service.versao_agenda(semana_ini, data_fim, fisio_id=fisio.id)),
+            lambda: _carregar_grade(service, fisio.id, semana_ini, data_fim),
+        )
+    except Exception as exc:
+        st.error(f"Erro ao carregar grade: {exc}")
+        logger.error("Erro ao carregar grade: %s", exc, exc_info=True)
+        return
+
+    _render_grade(itens, nome_by_id, semana_ini)
+
     st.markdown("### Exportar horários do fisioterapeuta")
 
+    disponibilidades = service.disponibilidades_fisio(fisio.id)
+    versao = (
+        fisio.id,
+        fisio.nome,
+        tuple((d.weekday, d.hora_inicio, d.hora_fim) for d in disponibilidades),
+    )
+    hoje = date.today()
+    ate = hoje + timedelta(days=ICS_JANELA_DIAS)
+    versao_agenda = service.versao_agenda(hoje, ate, fisio_id=fisio.id)
+
     col_a, col_b, col_c = st.columns([1, 1, 2])
     with col_a:
-        csv_bytes = build_times_csv(fisio)
-        st.download_button(
-            label="Baixar CSV (horários)",
-            data=csv_bytes,
+        lazy_download_button(
+            "CSV (horários)",
+            key=f"dl_csv_horarios_{fisio.id}",
+            entidade=f"times_csv:fisio:{fisio.id}",
+            versao=versao,
+            params=(),
+            build=lambda: build_times_csv(fisio, disponibilidades),
             file_name=f"horarios_fisio_{fisio.id}_{fisio.nome}.csv",
             mime="text/csv",
-            key=f"dl_csv_horarios_{fisio.id}",
         )
 
     with col_b:
-        ics_bytes = build_times_ics(
-            fisio=fisio,
-            start_on=date.today(),
-            start_time_str="08:00",
-            duration_minutes=30,
-            tzid="America/Sao_Paulo",
-        )
-        st.download_button(
-            label="Baixar .ics (calendário semanal)",
-            data=ics_bytes,
+        lazy_download_button(
+            ".ics (agenda)",
+            key=f"dl_ics_times_{fisio.id}",
+            entidade=f"agenda_ics:fisio:{fisio.id}",
+            versao=versao_agenda,
+            params=(hoje, ate, "America/Sao_Paulo"),
+            build=lambda: b"".join(
+                service.agenda_ics(
+                    hoje,
+                    ate,
+                    fisio_id=fisio.id,
+                    nome_calendario=f"Agenda - {fisio.nome}",
+                )
+            ),
             file_name=f"horarios_fisio_{fisio.id}_{fisio.nome}.ics",
             mime="text/calendar",
-            key=f"dl_ics_times_{fisio.id}",
         )
 
     with col_c:
         st.caption(
             "• CSV: visão simples dos dias marcados (Sim/Não).  \n"
-            "• ICS: evento semanal recorrente com BYDAY (usado "
+            "• ICS: sessões agendadas dos próximos 12 meses (usado "
             "para importar no calendário Google/Outlook)."
         )
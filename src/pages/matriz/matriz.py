@@ -4,19 +4,27 @@ import pandas as pd
 import streamlit as st
 
 from src.services.clinica_service import ClinicaService
-from src.utils.user_utils import get_paciente_ativos
+from src.utils.streamlit_utils import load_once
 
 logger = logging.getLogger("vitally_app")
 
+APARELHOS = ["Solo", "Chair", "Cadillac", "Reformer", "Barrel"]
+SEGMENTOS = ["Cervical", "MMSS", "Tronco", "Abdômen", "MMII"]
+
 
 def render_matriz_me_tab(service: ClinicaService) -> None:
     st.subheader("Mapa de Exercícios (Pilates)")
 
-    aparelhos = ["Solo", "Chair", "Cadillac", "Reformer", "Barrel"]
-    segmentos = ["Cervical", "MMSS", "Tronco", "Abdômen", "MMII"]
-
     st.markdown("**Plano por paciente (selecione por célula M, E ou M/E):**")
-    ativos = get_paciente_ativos(service)
+    try:
+        ativos = load_once(
+            "pacientes_ativos",
+            service.versao_pacientes(),
+            lambda: list(service.listar_pacientes(only_active=True)),
+        )
+    except Exception as exc:
+        st.error(f"Erro ao listar pacientes: {exc}")
+        return
     if not ativos:
         st.info("Cadastre pacientes primeiro.")
         return
@@ -24,25 +32,29 @@ def render_matriz_me_tab(service: ClinicaService) -> None:
     pac_opts = {f"[{p.id}] {p.nome}": p for p in ativos}
     escolha_label = st.selectbox("Paciente", list(pac_opts.keys()), key="pilates_paciente_escolha")
     paciente = pac_opts[escolha_label]
-    pid = paciente.id
 
+    _render_plano(paciente.id, paciente.nome)
+
+
+@st.fragment
+def _render_plano(pid: int, nome: str) -> None:
     if "pilates_plan" not in st.session_state:
         st.session_state.pilates_plan = {}
 
     if pid not in st.session_state.pilates_plan:
         rows = []
-        for ap in aparelhos:
+        for ap in APARELHOS:
             r = {"Aparelho": ap}
-            for seg in segmentos:
+            for seg in SEGMENTOS:
                 r[seg] = ""
             rows.append(r)
-        st.session_state.pilates_plan[pid] = pd.DataFrame(rows, columns=["Aparelho", *segmentos])
+        st.session_state.pilates_plan[pid] = pd.DataFrame(rows, columns=["Aparelho", *SEGMENTOS])
 
     plan_df = st.session_state.pilates_plan[pid]
 
     col_config = {"Aparelho": st.column_config.TextColumn("Aparelho", disabled=True)}
     select_opts = ["", "M", "E", "M/E"]
-    for seg in segmentos:
+    for seg in SEGMENTOS:
         col_config[seg] = st.column_config.SelectboxColumn(
             f"{seg}",
             options=select_opts,
@@ -66,7 +78,7 @@ def render_matriz_me_tab(service: ClinicaService) -> None:
         st.download_button(
             "Baixar plano (CSV)",
             data=csv,
-            file_name=f"plano_pilates_paciente_{pid}_{paciente.nome}.csv",
+            file_name=f"plano_pilates_paciente_{pid}_{nome}.csv",
             mime="text/csv",
             key=f"dl_csv_{pid}",
         )
@@ -75,7 +87,7 @@ def render_matriz_me_tab(service: ClinicaService) -> None:
         resumo = []
         for _, row in edited.iterrows():
             ap = row["Aparelho"]
-            for seg in segmentos:
+            for seg in SEGMENTOS:
                 val = (row.get(seg) or "").strip()
                 if val == "M/E":
                     marcacoes = ["M", "E"]
@@ -5,6 +5,8 @@ from time import sleep
 
 import streamlit as st
 
+from src.models.paciente_model import dias_da_mascara, mascara_dias
+from src.repositories.concorrencia import ConflitoVersao
 from src.services.clinica_service import ClinicaService
 from src.utils.add_utils import is_valid_email, only_digits, validate_br_phone
 from src.utils.streamlit_utils import rerun_app
@@ -13,16 +15,6 @@ from src.utils.user_utils import get_fisioterapeutas, get_paciente_ativos
 
 logger = logging.getLogger("vitally_app")
 
-DIAS = [
-    ("Segunda", "aula_seg"),
-    ("Terça", "aula_ter"),
-    ("Quarta", "aula_qua"),
-    ("Quinta", "aula_qui"),
-    ("Sexta", "aula_sex"),
-    ("Sábado", "aula_sab"),
-    ("Domingo", "aula_dom"),
-]
-
 WEEKDAY_MAP = {
     "Segunda": 0,
     "Terça": 1,
@@ -34,6 +26,11 @@ WEEKDAY_MAP = {
 }
 
 
+def _nomes_dias(mascara: int) -> str:
+    nomes = list(WEEKDAY_MAP)
+    return ", ".join(nomes[wd] for wd in dias_da_mascara(mascara))
+
+
 def _build_options(items, labelfn):
     opts = {labelfn(item): item for item in items}
     return list(opts.keys()), opts
@@ -70,6 +67,10 @@ def render_edit_pacientes_tab(service: ClinicaService) -> None:
     st.subheader("Editar paciente")
     logger.info("Aba de edição carregada")
 
+    conflito = st.session_state.pop("edit_conflito", None)
+    if conflito:
+        st.warning(f"{conflito} Os dados abaixo foram recarregados.")
+
     ativos = get_paciente_ativos(service)
     if not ativos:
         st.info("Cadastre pacientes primeiro.")
@@ -95,11 +96,14 @@ def render_edit_pacientes_tab(service: ClinicaService) -> None:
 
     if st.session_state.get("edit_paciente_id") != paciente.id:
         st.session_state["edit_paciente_id"] = paciente.id
+        st.session_state["edit_versao"] = paciente.version
         st.session_state["edit_nome"] = paciente.nome
         st.session_state["edit_email"] = paciente.email or ""
         st.session_state["edit_telefone"] = paciente.telefone or ""
         st.session_state["edit_data_entrada"] = paciente.data_entrada or date.today()
-        st.session_state["edit_dias"] = [d for d, attr in DIAS if getattr(paciente, attr, False)]
+        st.session_state["edit_dias"] = [
+            d for d, wd in WEEKDAY_MAP.items() if paciente.tem_aula(wd)
+        ]
 
     with st.form("form_edit_paciente", clear_on_submit=False):
         pid = paciente.id
@@ -119,7 +123,7 @@ def render_edit_pacientes_tab(service: ClinicaService) -> None:
 
         dias_selecionados = st.multiselect(
             "Dias de aula",
-            [d for d, _ in DIAS],
+            list(WEEKDAY_MAP),
             key="edit_dias",
         )
 
@@ -161,7 +165,6 @@ def render_edit_pacientes_tab(service: ClinicaService) -> None:
         return
 
     fone_digits = only_digits(telefone_raw or "")
-    dia_kwargs = {attr: (dia_nome in dias_selecionados) for dia_nome, attr in DIAS}
 
     try:
         paciente_editado, updates = service.editar_paciente(
@@ -170,7 +173,8 @@ def render_edit_pacientes_tab(service: ClinicaService) -> None:
             email=email,
             telefone=fone_digits,
             data_entrada=data_entrada,
-            **dia_kwargs,
+            dias_aula=mascara_dias(WEEKDAY_MAP[d] for d in dias_selecionados),
+            versao=st.session_state.get("edit_versao"),
         )
 
         service.definir_aulas_paciente(
@@ -183,9 +187,18 @@ def render_edit_pacientes_tab(service: ClinicaService) -> None:
 
         st.success(f"Editado #{paciente_editado.id}")
         for campo, (antes, depois) in (updates or {}).items():
+            if isinstance(antes, int) and isinstance(depois, int) and campo == "dias_aula":
+                antes, depois = _nomes_dias(antes), _nomes_dias(depois)
             st.success(f'[EDIT] {campo}: "{antes}" → "{depois}"')
 
         sleep(2)
+        st.session_state.pop("edit_paciente_id", None)
+        rerun_app()
+
+    except ConflitoVersao as exc:
+        logger.warning("Conflito ao editar paciente %s: %s", pid, exc)
+        st.session_state["edit_conflito"] = str(exc)
+        st.session_state.pop("edit_paciente_id", None)
         rerun_app()
 
     except Exception as exc:
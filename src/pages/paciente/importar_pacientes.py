@@ -0,0 +1,69 @@
+import hashlib
+import logging
+
+import streamlit as st
+
+from src.services.clinica_service import ClinicaService
+from src.utils.dataframe_utils import make_dataframe
+from src.utils.importacao_utils import FORMATOS_PLANILHA
+from src.utils.streamlit_utils import load_once, rerun_app
+
+logger = logging.getLogger("vitally_app")
+
+
+def render_importar_pacientes_tab(service: ClinicaService) -> None:
+    st.subheader("Importar pacientes")
+    st.caption(
+        f"{' ou '.join(f.upper() for f in FORMATOS_PLANILHA)} com a coluna `nome` e, "
+        "opcionalmente, `email`, `telefone`, "
+        "`data_entrada` (dd/mm/aaaa) e `aulas` (ex.: `seg 08:00; qua 18:30`)."
+    )
+
+    versao = st.session_state.setdefault("import_pac_versao", 0)
+    arquivo = st.file_uploader(
+        "Planilha", type=list(FORMATOS_PLANILHA), key=f"import_pac_arquivo_{versao}"
+    )
+    if arquivo is None:
+        return
+
+    dados = arquivo.getvalue()
+    try:
+        previa = load_once(
+            "import_pac_previa",
+            (arquivo.name, hashlib.sha1(dados).hexdigest()),
+            lambda: service.importar_pacientes(arquivo.name, dados, aplicar=False),
+        )
+    except (ValueError, RuntimeError) as exc:
+        st.error(f"Planilha inválida: {exc}")
+        return
+    except Exception as exc:
+        st.error(f"Erro ao ler planilha: {exc}")
+        logger.error("Erro ao ler planilha de pacientes: %s", exc, exc_info=True)
+        return
+
+    linhas_com_erro = len({e.linha for e in previa.erros})
+    st.markdown(f"**{previa.validos}** linha(s) válida(s) • **{linhas_com_erro}** com erro")
+
+    if previa.erros:
+        st.dataframe(
+            make_dataframe(
+                {"Linha": e.linha, "Campo": e.campo, "Erro": e.mensagem} for e in previa.erros
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    if not previa.validos:
+        return
+
+    rotulo = f"Importar {previa.validos} paciente(s) válido(s)"
+    if st.button(rotulo, type="primary", key="import_pac_btn"):
+        try:
+            resultado = service.importar_pacientes(arquivo.name, dados)
+            logger.info("Importação: %d paciente(s) de %s", resultado.importados, arquivo.name)
+            st.success(f"{resultado.importados} paciente(s) importado(s).")
+            st.session_state["import_pac_versao"] = versao + 1
+            rerun_app()
+        except Exception as exc:
+            st.error(f"Erro ao importar pacientes: {exc}")
+            logger.error("Erro ao importar pacientes", exc_info=True)
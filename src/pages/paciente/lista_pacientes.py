@@ -1,13 +1,18 @@
 import logging
+import math
+from datetime import date
 
 import streamlit as st
 
 from src.services.clinica_service import ClinicaService
+from src.utils.dataframe_utils import make_dataframe
 from src.utils.date_utils import format_date_br
-from src.utils.streamlit_utils import rerun_app
+from src.utils.streamlit_utils import load_once, rerun_app
 
 logger = logging.getLogger("vitally_app")
 
+TAMANHOS_PAGINA = [25, 50, 100, 200]
+
 
 def render_list_pacientes_tab(service: ClinicaService) -> None:
     st.subheader("Lista de pacientes")
@@ -29,76 +34,132 @@ def render_list_pacientes_tab(service: ClinicaService) -> None:
         busca,
     )
 
+    _render_tabela(service, only_active, busca)
+
+
+@st.fragment
+def _render_tabela(service: ClinicaService, only_active: bool, busca: str) -> None:
+    col_tam, col_pag, col_total = st.columns([1, 1, 2], vertical_alignment="bottom")
+    with col_tam:
+        tamanho = st.selectbox("Por página", TAMANHOS_PAGINA, index=1, key="lista_tamanho")
+
+    filtro = (only_active, busca, tamanho)
+    if st.session_state.get("lista_filtro") != filtro:
+        st.session_state["lista_filtro"] = filtro
+        st.session_state["lista_pagina"] = 1
+
+    with col_pag:
+        pagina = st.number_input("Página", min_value=1, step=1, key="lista_pagina")
+
     try:
-        pacientes = service.listar_pacientes(only_active=only_active)
-        logger.info("Total retornado: %d", len(pacientes))
+        assinatura = (only_active, busca, pagina, tamanho, service.versao_pacientes())
+        pacientes, total = load_once(
+            "lista_pacientes",
+            assinatura,
+            lambda: service.listar_pacientes_pagina(
+                only_active=only_active, busca=busca, pagina=pagina, tamanho=tamanho
+            ),
+        )
+        logger.info("Total retornado: %d (página %d)", total, pagina)
     except Exception as exc:
         st.error(f"Erro ao listar pacientes: {exc}")
         logger.error("Erro ao listar pacientes", exc_info=True)
         return
 
-    if busca:
-        pacientes = [
-            p
-            for p in pacientes
-            if busca in (p.nome or "").lower() or busca in (p.email or "").lower()
-        ]
+    total_paginas = max(math.ceil(total / tamanho), 1)
+    col_total.caption(f"{total} paciente(s) • página {pagina} de {total_paginas}")
 
     if not pacientes:
         st.info("Nenhum paciente encontrado.")
         return
 
-    cols = st.columns([1, 3, 2, 3, 2, 2, 2, 1])
-    headers = [
-        "ID",
-        "Nome",
-        "Telefone",
-        "Email",
-        "Entrada",
-        "Últ. Pgto",
-        "Próx. Cobrança",
-        "🗑️",
-    ]
-
-    for col, header in zip(cols, headers, strict=False):
-        col.markdown(f"**{header}**")
-
-    st.divider()
-
-    for p in pacientes:
-        cols = st.columns([1, 3, 2, 3, 2, 2, 2, 1])
-
-        cols[0].write(p.id)
-        cols[1].write(p.nome)
-        cols[2].write(p.telefone or "-")
-        cols[3].write(p.email or "-")
-        cols[4].write(format_date_br(p.data_entrada))
-        cols[5].write(format_date_br(p.data_ultimo_pagamento))
-        cols[6].write(format_date_br(p.data_proxima_cobranca))
-
-        if cols[7].button("🗑️", key=f"del_paciente_{p.id}"):
-            st.session_state["paciente_delete_id"] = p.id
-            st.session_state["paciente_delete_nome"] = p.nome
-
-    if "paciente_delete_id" in st.session_state:
-        st.warning(f'Confirma inativar o paciente **{st.session_state["paciente_delete_nome"]}**?')
-
-        col1, col2 = st.columns(2)
-
-        if col1.button("❌ Cancelar"):
-            st.session_state.pop("paciente_delete_id", None)
-            st.session_state.pop("paciente_delete_nome", None)
-            rerun_app()
+    df = make_dataframe(
+        {
+            "ID": p.id,
+            "Nome": p.nome,
+            "Telefone": p.telefone or "-",
+            "Email": p.email or "-",
+            "Entrada": format_date_br(p.data_entrada),
+            "Últ. Pgto": format_date_br(p.data_ultimo_pagamento),
+            "Próx. Cobrança": format_date_br(p.data_proxima_cobranca),
+            "Ativo": p.ativo,
+        }
+        for p in pacientes
+    )
+
+    evento = st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"lista_pacientes_df_{assinatura!r}",
+    )
+    selecionados = [pacientes[i] for i in evento.selection.rows if i < len(pacientes)]
+
+    _render_acoes_em_lote(service, selecionados)
+
 
-        if col2.button("✅ Confirmar"):
-            try:
-                service.inativar_paciente(paciente_id=st.session_state["paciente_delete_id"])
+def _nomes(selecionados) -> str:
+    nomes = ", ".join(p.nome for p in selecionados[:5])
+    if len(selecionados) > 5:
+        nomes += f" e mais {len(selecionados) - 5}"
+    return nomes
 
-                st.success("Paciente inativado com sucesso.")
-                st.session_state.pop("paciente_delete_id", None)
-                st.session_state.pop("paciente_delete_nome", None)
-                rerun_app()
 
-            except Exception as exc:
-                st.error(f"Erro ao inativar paciente: {exc}")
-                logger.error("Erro ao inativar paciente", exc_info=True)
+def _render_acoes_em_lote(service: ClinicaService, selecionados) -> None:
+    if not selecionados:
+        st.caption("Selecione linhas na tabela para aplicar ações em lote.")
+        st.session_state.pop("lista_confirmar", None)
+        return
+
+    ids = [p.id for p in selecionados]
+    st.markdown(f"**{len(ids)} selecionado(s):** {_nomes(selecionados)}")
+
+    col_inativar, col_data, col_pagar = st.columns([1, 1, 1], vertical_alignment="bottom")
+
+    with col_data:
+        data_pagamento = st.date_input(
+            "Data do pagamento", value=date.today(), format="DD/MM/YYYY", key="lista_pag_data"
+        )
+
+    if col_inativar.button("🗑️ Inativar selecionados", key="lista_btn_inativar"):
+        st.session_state["lista_confirmar"] = ("inativar", ids, None)
+    if col_pagar.button("💳 Registrar pagamento", key="lista_btn_pagar"):
+        st.session_state["lista_confirmar"] = ("pagar", ids, data_pagamento)
+
+    pendente = st.session_state.get("lista_confirmar")
+    if pendente is None or pendente[1] != ids:
+        st.session_state.pop("lista_confirmar", None)
+        return
+
+    acao, _, data_pag = pendente
+    if acao == "inativar":
+        st.warning(f"Confirma inativar **{_nomes(selecionados)}**?")
+    else:
+        st.warning(
+            f"Confirma registrar pagamento em {data_pag:%d/%m/%Y} "
+            f"para **{_nomes(selecionados)}**?"
+        )
+
+    col1, col2 = st.columns(2)
+
+    if col1.button("❌ Cancelar"):
+        st.session_state.pop("lista_confirmar", None)
+        rerun_app()
+
+    if col2.button("✅ Confirmar"):
+        st.session_state.pop("lista_confirmar", None)
+        try:
+            if acao == "inativar":
+                n = service.inativar_pacientes(ids)
+                st.success(f"{n} paciente(s) inativado(s) com sucesso.")
+            else:
+                n = service.registrar_pagamentos(ids, data_pag)
+                logger.info("Pagamento em lote: %d paciente(s) em %s", n, data_pag)
+                st.success(f"Pagamento registrado para {n} paciente(s).")
+            rerun_app()
+
+        except Exception as exc:
+            st.error(f"Erro ao aplicar ação em lote: {exc}")
+            logger.error("Erro na ação em lote %s", acao, exc_info=True)
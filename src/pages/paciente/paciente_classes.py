@@ -1,15 +1,20 @@
+import dataclasses
 import logging
-from datetime import date
+from datetime import date, timedelta
 
 import pandas as pd
 import streamlit as st
 
 from src.services.clinica_service import ClinicaService
-from src.utils.classes_utils import build_classes_csv, build_classes_ics
+from src.utils.export_utils import build_classes_csv
+from src.utils.streamlit_utils import lazy_download_button
 from src.utils.user_utils import get_paciente_ativos
 
 logger = logging.getLogger("vitally_app")
 
+ICS_JANELA_DIAS = 365
+DIAS_TABELA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
 
 def render_paciente_classes_tab(service: ClinicaService) -> None:
     st.subheader("Aulas")
@@ -24,56 +29,58 @@ def render_paciente_classes_tab(service: ClinicaService) -> None:
     escolha_label = st.selectbox("Paciente", list(options.keys()), key="classes_escolha")
     paciente = options[escolha_label]
 
-    cols = []
-    vals = []
-
-    for dia_nome, attr in [
-        ("Seg", "aula_seg"),
-        ("Ter", "aula_ter"),
-        ("Qua", "aula_qua"),
-        ("Qui", "aula_qui"),
-        ("Sex", "aula_sex"),
-        ("Sáb", "aula_sab"),
-        ("Dom", "aula_dom"),
-    ]:
-        cols.append(dia_nome)
-        vals.append("X" if getattr(paciente, attr, False) else "")
-
-    df = pd.DataFrame([vals], columns=cols, index=[f"[{paciente.id}] {paciente.nome}"])
+    vals = ["X" if paciente.tem_aula(wd) else "" for wd in range(len(DIAS_TABELA))]
+    df = pd.DataFrame([vals], columns=DIAS_TABELA, index=[f"[{paciente.id}] {paciente.nome}"])
     st.dataframe(df, use_container_width=True)
 
+    por_dia = service.alunos_por_dia()
+    st.caption(
+        "Pacientes ativos por dia: "
+        + " • ".join(f"{dia} {n}" for dia, n in zip(DIAS_TABELA, por_dia, strict=True))
+    )
+
     st.markdown("### Exportar plano de aulas")
 
+    versao = dataclasses.astuple(paciente)
+    hoje = date.today()
+    ate = hoje + timedelta(days=ICS_JANELA_DIAS)
+    versao_agenda = service.versao_agenda(hoje, ate, paciente_id=paciente.id)
+
     col_a, col_b, col_c = st.columns([1, 1, 2])
     with col_a:
-        csv_bytes = build_classes_csv(paciente)
-        st.download_button(
-            label="Baixar CSV (dias de aula)",
-            data=csv_bytes,
+        lazy_download_button(
+            "CSV (dias de aula)",
+            key=f"dl_csv_classes_{paciente.id}",
+            entidade=f"classes_csv:paciente:{paciente.id}",
+            versao=versao,
+            params=(),
+            build=lambda: build_classes_csv(paciente),
             file_name=f"plano_aulas_{paciente.id}_{paciente.nome}.csv",
             mime="text/csv",
-            key=f"dl_csv_classes_{paciente.id}",
         )
 
     with col_b:
-        ics_bytes = build_classes_ics(
-            paciente=paciente,
-            start_on=date.today(),
-            start_time_str="08:00",
-            duration_minutes=60,
-            tzid="America/Sao_Paulo",
-        )
-        st.download_button(
-            label="Baixar .ics (calendário semanal)",
-            data=ics_bytes,
+        lazy_download_button(
+            ".ics (agenda)",
+            key=f"dl_ics_classes_{paciente.id}",
+            entidade=f"agenda_ics:paciente:{paciente.id}",
+            versao=versao_agenda,
+            params=(hoje, ate, "America/Sao_Paulo"),
+            build=lambda: b"".join(
+                service.agenda_ics(
+                    hoje,
+                    ate,
+                    paciente_id=paciente.id,
+                    nome_calendario=f"Aulas - {paciente.nome}",
+                )
+            ),
             file_name=f"plano_aulas_{paciente.id}_{paciente.nome}.ics",
             mime="text/calendar",
-            key=f"dl_ics_classes_{paciente.id}",
         )
 
     with col_c:
         st.caption(
             "• CSV: visão simples dos dias marcados (Sim/Não).  \n"
-            "• ICS: evento semanal recorrente com BYDAY (usado "
+            "• ICS: sessões agendadas dos próximos 12 meses (usado "
             "para importar no calendário Google/Outlook)."
         )
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+from dataclasses import replace
+
+import streamlit as st
+
+from src.models.pagamento_model import METODOS_PAGAMENTO
+from src.services.clinica_service import ClinicaService
+from src.utils.dataframe_utils import make_dataframe
+from src.utils.streamlit_utils import load_once, rerun_app
+from src.utils.user_utils import get_paciente_ativos
+
+logger = logging.getLogger("vitally_app")
+
+
+def render_importar_extrato_tab(service: ClinicaService) -> None:
+    st.subheader("Importar extrato")
+    st.caption(
+        "CSV com colunas `data` e `valor` (opcionais: `descricao`, `paciente_id`, `telefone`) "
+        "ou OFX do banco. Os pagamentos são associados por id, telefone ou nome."
+    )
+
+    arquivo = st.file_uploader("Extrato", type=["csv", "ofx", "txt"], key="extrato_arquivo")
+    if arquivo is None:
+        return
+
+    dados = arquivo.getvalue()
+    try:
+        conciliacoes = load_once(
+            "extrato_conciliacao",
+            (arquivo.name, hashlib.sha1(dados).hexdigest()),
+            lambda: service.conciliar_extrato(arquivo.name, dados),
+        )
+    except ValueError as exc:
+        st.error(f"Arquivo inválido: {exc}")
+        return
+    except Exception as exc:
+        st.error(f"Erro ao ler extrato: {exc}")
+        logger.error("Erro ao ler extrato: %s", exc, exc_info=True)
+        return
+
+    if not conciliacoes:
+        st.info("Nenhum crédito encontrado no arquivo.")
+        return
+
+    rotulos = {f"[{p.id}] {p.nome}": p.id for p in get_paciente_ativos(service)}
+    rotulo_por_id = {pid: r for r, pid in rotulos.items()}
+
+    df = make_dataframe(
+        {
+            "Registrar": c.paciente_id is not None and c.motivo is None,
+            "Linha": c.extrato.linha,
+            "Data": c.extrato.data,
+            "Valor (R$)": float(c.extrato.valor),
+            "Descrição": c.extrato.descricao,
+            "Paciente": rotulo_por_id.get(c.paciente_id),
+            "Critério": c.criterio or "",
+            "Observação": c.motivo or "",
+        }
+        for c in conciliacoes
+    )
+    editado = st.data_editor(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        disabled=["Linha", "Data", "Valor (R$)", "Descrição", "Critério", "Observação"],
+        column_config={
+            "Paciente": st.column_config.SelectboxColumn("Paciente", options=list(rotulos)),
+        },
+        key="extrato_editor",
+    )
+
+    escolhidas = []
+    for c, (_, row) in zip(conciliacoes, editado.iterrows(), strict=True):
+        pid = rotulos.get(row["Paciente"])
+        if not row["Registrar"] or pid is None or c.motivo == "já importado":
+            continue
+        criterio = c.criterio if pid == c.paciente_id else "manual"
+        escolhidas.append(replace(c, paciente_id=pid, criterio=criterio, motivo=None))
+
+    total = sum(c.extrato.valor for c in escolhidas)
+    col_metodo, col_btn = st.columns([1, 2], vertical_alignment="bottom")
+    with col_metodo:
+        metodo = st.selectbox("Método", ["", *METODOS_PAGAMENTO], key="extrato_metodo")
+    label = f"💳 Registrar {len(escolhidas)} pagamento(s) • R$ {total:,.2f}"
+    if col_btn.button(label, type="primary", disabled=not escolhidas, key="extrato_btn"):
+        try:
+            registrados, ignorados = service.registrar_extrato(escolhidas, metodo or None)
+            logger.info("Extrato: %d registrado(s), %d ignorado(s)", registrados, ignorados)
+            st.success(f"{registrados} pagamento(s) registrado(s). {ignorados} ignorado(s).")
+            rerun_app()
+        except Exception as exc:
+            st.error(f"Erro ao registrar pagamentos: {exc}")
+            logger.error("Erro ao registrar extrato", exc_info=True)
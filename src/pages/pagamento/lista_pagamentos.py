@@ -1,15 +1,21 @@
 import logging
-from datetime import date
+import math
+from datetime import date, timedelta
+from decimal import Decimal
 
 import streamlit as st
 
+from src.models.pagamento_model import METODOS_PAGAMENTO
 from src.services.clinica_service import ClinicaService
+from src.utils.dataframe_utils import make_dataframe
 from src.utils.date_utils import format_date_br
-from src.utils.streamlit_utils import rerun_app
+from src.utils.streamlit_utils import load_once, rerun_app
 from src.utils.user_utils import get_paciente_ativos
 
 logger = logging.getLogger("vitally_app")
 
+TAMANHO_HISTORICO = 50
+
 
 def render_pagamentos_tab(service: ClinicaService) -> None:
     st.subheader("Registrar pagamento")
@@ -23,15 +29,26 @@ def render_pagamentos_tab(service: ClinicaService) -> None:
     options = {f"[{p.id}] {p.nome}": p.id for p in ativos}
     escolha_label = st.selectbox("Paciente", list(options.keys()), key="pay_escolha")
 
-    data_pagamento = st.date_input(
-        "Data do pagamento", value=date.today(), format="DD/MM/YYYY", key="pay_data"
-    )
+    col_data, col_valor, col_metodo = st.columns(3)
+    with col_data:
+        data_pagamento = st.date_input(
+            "Data do pagamento", value=date.today(), format="DD/MM/YYYY", key="pay_data"
+        )
+    with col_valor:
+        valor = st.number_input("Valor (R$)", min_value=0.0, step=10.0, key="pay_valor")
+    with col_metodo:
+        metodo = st.selectbox("Método", ["", *METODOS_PAGAMENTO], key="pay_metodo")
 
     if st.button("Registrar", type="primary", key="btn_registrar_pag"):
         pid = options[escolha_label]
         logger.info("Registrando pagamento: paciente_id=%s em %s", pid, data_pagamento)
         try:
-            paciente = service.registrar_pagamento(pid, data_pagamento)
+            paciente = service.registrar_pagamento(
+                pid,
+                data_pagamento,
+                valor=Decimal(str(valor)) if valor else None,
+                metodo=metodo or None,
+            )
             prox = format_date_br(paciente.data_proxima_cobranca)
             st.success(f"Pagamento registrado. Próx. cobrança: {prox}")
             logger.info("Pagamento OK: paciente_id=%s próxima=%s", paciente.id, prox)
@@ -39,3 +56,85 @@ def render_pagamentos_tab(service: ClinicaService) -> None:
         except Exception as exc:
             st.error(f"Erro ao registrar pagamento: {exc}")
             logger.error("Erro ao registrar pagamento: %s", exc, exc_info=True)
+
+    st.markdown("### Histórico")
+    filtro_opts = {"Todos": None, **options}
+    col_pac, col_ini, col_fim = st.columns([2, 1, 1])
+    with col_pac:
+        filtro = st.selectbox("Paciente", list(filtro_opts.keys()), key="hist_paciente")
+    with col_ini:
+        inicio = st.date_input(
+            "De", value=date.today() - timedelta(days=90), format="DD/MM/YYYY", key="hist_ini"
+        )
+    with col_fim:
+        fim = st.date_input("Até", value=date.today(), format="DD/MM/YYYY", key="hist_fim")
+
+    _render_historico(service, filtro_opts[filtro], inicio, fim)
+    _render_totais_mensais(service, filtro_opts[filtro])
+
+
+@st.fragment
+def _render_historico(service: ClinicaService, paciente_id: int | None, inicio, fim) -> None:
+    filtro = (paciente_id, inicio, fim)
+    if st.session_state.get("hist_filtro") != filtro:
+        st.session_state["hist_filtro"] = filtro
+        st.session_state["hist_pagina"] = 1
+
+    pagina = st.number_input("Página", min_value=1, step=1, key="hist_pagina")
+    try:
+        pagamentos, total = load_once(
+            "historico_pagamentos",
+            (paciente_id, inicio, fim, pagina),
+            lambda: service.historico_pagamentos(
+                paciente_id, inicio, fim, pagina=pagina, tamanho=TAMANHO_HISTORICO
+            ),
+        )
+    except Exception as exc:
+        st.error(f"Erro ao carregar histórico: {exc}")
+        logger.error("Erro ao carregar histórico de pagamentos", exc_info=True)
+        return
+
+    total_paginas = max(math.ceil(total / TAMANHO_HISTORICO), 1)
+    st.caption(f"{total} pagamento(s) • página {pagina} de {total_paginas}")
+    if not pagamentos:
+        st.info("Nenhum pagamento no período.")
+        return
+
+    df = make_dataframe(
+        {
+            "Data": format_date_br(p.data),
+            "Paciente": p.paciente_nome,
+            "Valor": float(p.valor) if p.valor is not None else None,
+            "Método": p.metodo or "-",
+            "Cobre de": format_date_br(p.periodo_inicio),
+            "Cobre até": format_date_br(p.periodo_fim),
+        }
+        for p in pagamentos
+    )
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+def _render_totais_mensais(service: ClinicaService, paciente_id: int | None) -> None:
+    st.markdown("### Totais por mês (últimos 12 meses)")
+    hoje = date.today()
+    inicio = date(hoje.year - 1, hoje.month, 1)
+    try:
+        totais = load_once(
+            "totais_pagamentos",
+            (paciente_id, inicio, hoje),
+            lambda: service.totais_pagamentos_mensais(inicio, hoje, paciente_id),
+        )
+    except Exception as exc:
+        st.error(f"Erro ao carregar totais: {exc}")
+        logger.error("Erro ao carregar totais mensais", exc_info=True)
+        return
+
+    if not totais:
+        st.info("Sem pagamentos nos últimos 12 meses.")
+        return
+
+    df = make_dataframe(
+        {"Mês": f"{t.mes:02d}/{t.ano}", "Pagamentos": t.quantidade, "Total (R$)": float(t.total)}
+        for t in totais
+    )
+    st.dataframe(df, use_container_width=True, hide_index=True)
@@ -0,0 +1,68 @@
+import logging
+from datetime import date
+
+import streamlit as st
+
+from src.services.clinica_service import ClinicaService
+from src.utils.dataframe_utils import make_dataframe
+from src.utils.previsao_utils import FREQUENCIAS
+from src.utils.streamlit_utils import load_once
+
+logger = logging.getLogger("vitally_app")
+
+
+def render_previsao_recebimentos_tab(service: ClinicaService) -> None:
+    st.subheader("Previsão de recebimentos")
+    logger.info("Aba de previsão carregada")
+
+    col_meses, col_freq = st.columns(2)
+    with col_meses:
+        meses = st.number_input("Meses", min_value=1, max_value=36, value=12, key="prev_meses")
+    with col_freq:
+        frequencia = st.radio(
+            "Agrupar por", list(FREQUENCIAS), horizontal=True, key="prev_frequencia"
+        )
+
+    hoje = date.today()
+    try:
+        previsao = load_once(
+            "previsao_recebimentos",
+            (hoje, meses, frequencia),
+            lambda: service.previsao_recebimentos(meses, frequencia, hoje),
+        )
+        atrasos = load_once("relatorio_atrasos", hoje, lambda: service.relatorio_atrasos(hoje))
+    except Exception as exc:
+        st.error(f"Erro ao calcular previsão: {exc}")
+        logger.error("Erro ao calcular previsão: %s", exc, exc_info=True)
+        return
+
+    st.bar_chart(previsao, x="inicio", y="valor", x_label="Período", y_label="R$")
+    st.dataframe(
+        previsao.assign(periodo=previsao["periodo"].astype(str)).rename(
+            columns={
+                "periodo": "Período",
+                "inicio": "Início",
+                "quantidade": "Cobranças",
+                "valor": "Previsto (R$)",
+                "sem_valor": "Sem valor definido",
+            }
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        "Cobranças vencidas entram no primeiro período. Pacientes sem valor no plano usam o "
+        "último pagamento registrado."
+    )
+
+    st.markdown("### Em atraso")
+    df = make_dataframe(
+        {
+            "Dias em atraso": a.faixa,
+            "Pacientes": a.quantidade,
+            "Total (R$)": float(a.total),
+            "Sem valor definido": a.sem_valor,
+        }
+        for a in atrasos
+    )
+    st.dataframe(df, use_container_width=True, hide_index=True)
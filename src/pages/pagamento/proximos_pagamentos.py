@@ -31,7 +31,7 @@ def render_proximos_pagamentos_tab(service: ClinicaService) -> None:
             "Nome": p.nome,
             "Email": p.email,
             "Telefone": p.telefone,
-            "Vencimento": format_date_br(p.data_proxima_cobranca),
+            "Vencimento": format_date_br(p.vencimento),
         }
         for p in vencendo
     )
@@ -1,7 +1,47 @@
-from sqlalchemy import select
+from collections.abc import Iterator
+from datetime import date, time
+from itertools import groupby
+
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
 from src.db.db import SessionLocal
-from src.db.tables import AgendaSQL
+from src.db.tables import (
+    AGENDA_SEM_SOBREPOSICAO,
+    AgendaSQL,
+    FisioterapeutaSQL,
+    LembreteEnviadoSQL,
+    PacienteSQL,
+)
+from src.models.agenda_model import STATUS_AGENDA, SessoesPaciente
+from src.repositories.concorrencia import ConflitoVersao, HorarioOcupado
+from src.repositories.outbox_repository_sql import enfileirar
+from src.utils.email_utils import conteudo_alteracao_agenda
+
+
+def travar_agenda(s: Session) -> None:
+    if s.get_bind().dialect.name == "sqlite":
+        # serializa verificação + escrita entre processos (lock de escrita já no início)
+        s.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def existe_conflito(s: Session, fisio_id: int, data_: date, h_ini: time, h_fim: time) -> bool:
+    stmt = (
+        select(AgendaSQL.id)
+        .where(AgendaSQL.fisio_id == fisio_id)
+        .where(AgendaSQL.data == data_)
+        .where(AgendaSQL.status != "cancelado")
+        .where(AgendaSQL.deleted_at.is_(None))
+        .where(
+            or_(
+                and_(AgendaSQL.hora_inicio <= h_ini, AgendaSQL.hora_fim > h_ini),
+                and_(AgendaSQL.hora_inicio < h_fim, AgendaSQL.hora_fim >= h_fim),
+                and_(AgendaSQL.hora_inicio >= h_ini, AgendaSQL.hora_fim <= h_fim),
+            )
+        )
+    )
+    return s.execute(stmt.limit(1)).first() is not None
 
 
 class AgendaRepositorySQL:
@@ -15,6 +55,188 @@ class AgendaRepositorySQL:
                 .where(AgendaSQL.fisio_id == fisio_id)
                 .where(AgendaSQL.data >= data_inicio)
                 .where(AgendaSQL.data <= data_fim)
+                .where(AgendaSQL.deleted_at.is_(None))
                 .order_by(AgendaSQL.data.asc(), AgendaSQL.hora_inicio.asc())
             )
             return s.execute(stmt).scalars().all()
+
+    @staticmethod
+    def _filtrar(stmt, data_inicio, data_fim, fisio_id: int | None, paciente_id: int | None):
+        stmt = stmt.where(AgendaSQL.data >= data_inicio).where(AgendaSQL.data <= data_fim)
+        stmt = stmt.where(AgendaSQL.deleted_at.is_(None))
+        if fisio_id is not None:
+            stmt = stmt.where(AgendaSQL.fisio_id == fisio_id)
+        if paciente_id is not None:
+            stmt = stmt.where(AgendaSQL.paciente_id == paciente_id)
+        return stmt
+
+    def versao(
+        self,
+        data_inicio,
+        data_fim,
+        *,
+        fisio_id: int | None = None,
+        paciente_id: int | None = None,
+    ) -> tuple[int, int | None, int]:
+        with self._Session() as s:
+            stmt = self._filtrar(
+                select(
+                    func.count(AgendaSQL.id),
+                    func.max(AgendaSQL.id),
+                    func.coalesce(func.sum(AgendaSQL.version), 0),
+                ),
+                data_inicio,
+                data_fim,
+                fisio_id,
+                paciente_id,
+            )
+            total, ultimo, edicoes = s.execute(stmt).one()
+            return total, ultimo, edicoes
+
+    def alterar_status(self, agenda_id: int, status: str, versao: int) -> int:
+        if status not in STATUS_AGENDA:
+            raise ValueError(f"Status inválido: {status!r}")
+        with self._Session() as s:
+            travar_agenda(s)
+            atual = s.execute(
+                select(
+                    AgendaSQL.status,
+                    AgendaSQL.fisio_id,
+                    AgendaSQL.data,
+                    AgendaSQL.hora_inicio,
+                    AgendaSQL.hora_fim,
+                    PacienteSQL.nome,
+                    PacienteSQL.email,
+                )
+                .outerjoin(PacienteSQL, PacienteSQL.id == AgendaSQL.paciente_id)
+                .where(AgendaSQL.id == agenda_id)
+                .where(AgendaSQL.version == versao)
+                .where(AgendaSQL.deleted_at.is_(None))
+            ).first()
+            reativa = atual is not None and atual.status == "cancelado" and status != "cancelado"
+            if reativa and existe_conflito(
+                s, atual.fisio_id, atual.data, atual.hora_inicio, atual.hora_fim
+            ):
+                raise HorarioOcupado(agenda_id)
+            try:
+                result = s.execute(
+                    update(AgendaSQL)
+                    .where(AgendaSQL.id == agenda_id)
+                    .where(AgendaSQL.version == versao)
+                    .where(AgendaSQL.deleted_at.is_(None))
+                    .values(status=status, version=versao + 1)
+                )
+            except IntegrityError as exc:
+                if AGENDA_SEM_SOBREPOSICAO in str(exc.orig):
+                    raise HorarioOcupado(agenda_id) from exc
+                raise
+            if atual is None or not result.rowcount:
+                existe = s.execute(
+                    select(AgendaSQL.id)
+                    .where(AgendaSQL.id == agenda_id)
+                    .where(AgendaSQL.deleted_at.is_(None))
+                ).first()
+                if existe:
+                    raise ConflitoVersao("Sessão", agenda_id)
+                raise ValueError(f"Sessão id={agenda_id} não encontrada")
+            if atual.status != status and atual.email:
+                assunto, texto, html = conteudo_alteracao_agenda(
+                    atual.nome, atual.data, atual.hora_inicio, status
+                )
+                enfileirar(
+                    s,
+                    tipo="agenda_alteracao",
+                    destinatario=atual.email,
+                    assunto=assunto,
+                    texto=texto,
+                    html=html,
+                )
+            s.commit()
+            return versao + 1
+
+    def iter_eventos(
+        self,
+        data_inicio,
+        data_fim,
+        *,
+        fisio_id: int | None = None,
+        paciente_id: int | None = None,
+        chunk: int = 500,
+    ) -> Iterator:
+        stmt = self._filtrar(
+            select(
+                AgendaSQL.id,
+                AgendaSQL.data,
+                AgendaSQL.hora_inicio,
+                AgendaSQL.hora_fim,
+                AgendaSQL.status,
+                AgendaSQL.fisio_id,
+                FisioterapeutaSQL.nome.label("fisio_nome"),
+                AgendaSQL.paciente_id,
+                PacienteSQL.nome.label("paciente_nome"),
+            )
+            .join(FisioterapeutaSQL, FisioterapeutaSQL.id == AgendaSQL.fisio_id)
+            .outerjoin(
+                PacienteSQL,
+                (PacienteSQL.id == AgendaSQL.paciente_id) & PacienteSQL.deleted_at.is_(None),
+            ),
+            data_inicio,
+            data_fim,
+            fisio_id,
+            paciente_id,
+        ).order_by(AgendaSQL.data.asc(), AgendaSQL.hora_inicio.asc(), AgendaSQL.id.asc())
+
+        with self._Session() as s:
+            result = s.execute(stmt, execution_options={"yield_per": chunk})
+            for part in result.partitions():
+                yield from part
+
+    def iter_sessoes_por_paciente(
+        self,
+        dia: date,
+        *,
+        sem_lembrete: str | None = None,
+        shard: tuple[int, int] = (0, 1),
+        chunk: int = 1000,
+    ) -> Iterator[SessoesPaciente]:
+        stmt = (
+            select(
+                PacienteSQL.id,
+                PacienteSQL.nome,
+                PacienteSQL.email,
+                AgendaSQL.hora_inicio,
+                AgendaSQL.hora_fim,
+                FisioterapeutaSQL.nome,
+            )
+            .join(PacienteSQL, PacienteSQL.id == AgendaSQL.paciente_id)
+            .join(FisioterapeutaSQL, FisioterapeutaSQL.id == AgendaSQL.fisio_id)
+            .where(AgendaSQL.data == dia)
+            .where(AgendaSQL.status == "agendado")
+            .where(AgendaSQL.deleted_at.is_(None))
+            .where(PacienteSQL.ativo.is_(True))
+            .where(PacienteSQL.deleted_at.is_(None))
+            .order_by(PacienteSQL.id.asc(), AgendaSQL.hora_inicio.asc())
+        )
+        if sem_lembrete is not None:
+            stmt = stmt.where(
+                ~exists().where(
+                    LembreteEnviadoSQL.paciente_id == PacienteSQL.id,
+                    LembreteEnviadoSQL.vencimento == dia,
+                    LembreteEnviadoSQL.tipo == sem_lembrete,
+                    LembreteEnviadoSQL.status == "enviado",
+                )
+            )
+        indice, total = shard
+        if total > 1:
+            stmt = stmt.where(PacienteSQL.id % total == indice)
+
+        with self._Session() as s:
+            rows = s.execute(stmt, execution_options={"yield_per": chunk})
+            for (pid, nome, email), grupo in groupby(rows, key=lambda r: tuple(r[:3])):
+                yield SessoesPaciente(
+                    paciente_id=pid,
+                    nome=nome,
+                    email=email,
+                    data=dia,
+                    horarios=tuple((r[3], r[4], r[5]) for r in grupo),
+                )
@@ -0,0 +1,161 @@
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from src.db.db import SessionLocal
+from src.db.tables import AgendaSQL, PacienteSQL
+from src.utils.cobranca_utils import proximas_cobrancas, validar_plano
+
+LOTE_PADRAO = 5000
+
+BASE_COBRANCA = func.coalesce(PacienteSQL.data_ultimo_pagamento, PacienteSQL.data_entrada)
+
+
+@dataclass(slots=True, frozen=True)
+class ResumoRecalculo:
+    avaliados: int
+    alterados: int
+
+
+def _limites_pacote(s: Session, paciente_ids: list[int], base: date | None) -> dict[int, date]:
+    if not paciente_ids:
+        return {}
+    numeradas = (
+        select(
+            AgendaSQL.paciente_id,
+            AgendaSQL.data,
+            func.row_number()
+            .over(
+                partition_by=AgendaSQL.paciente_id,
+                order_by=(AgendaSQL.data, AgendaSQL.hora_inicio, AgendaSQL.id),
+            )
+            .label("n"),
+            PacienteSQL.plano_sessoes.label("sessoes"),
+        )
+        .join(PacienteSQL, PacienteSQL.id == AgendaSQL.paciente_id)
+        .where(PacienteSQL.id.in_(paciente_ids))
+        .where(AgendaSQL.data >= (BASE_COBRANCA if base is None else base))
+        .where(AgendaSQL.status != "cancelado")
+        .where(AgendaSQL.deleted_at.is_(None))
+        .subquery()
+    )
+    stmt = select(numeradas.c.paciente_id, numeradas.c.data).where(
+        numeradas.c.n == numeradas.c.sessoes + 1
+    )
+    return dict(s.execute(stmt).all())
+
+
+def calcular_cobrancas(
+    s: Session, linhas: Sequence[tuple[int, str, int | None, date]], base: date | None = None
+) -> np.ndarray:
+    ids = [pid for pid, tipo, _, _ in linhas if tipo == "pacote"]
+    limites = _limites_pacote(s, ids, base)
+    return proximas_cobrancas(
+        np.array([tipo for _, tipo, _, _ in linhas], dtype=object),
+        np.array([np.nan if dia is None else dia for _, _, dia, _ in linhas], dtype="float64"),
+        np.array([b for _, _, _, b in linhas], dtype="datetime64[D]"),
+        np.array([limites.get(pid) for pid, _, _, _ in linhas], dtype="datetime64[D]"),
+    )
+
+
+class CobrancaRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    def definir_plano(
+        self,
+        paciente_ids: Iterable[int] | None,
+        tipo: str,
+        dia: int | None = None,
+        sessoes: int | None = None,
+        valor: Decimal | None = None,
+        *,
+        aplicar: bool = True,
+        lote: int = LOTE_PADRAO,
+    ) -> ResumoRecalculo:
+        validar_plano(tipo, dia, sessoes)
+        if valor is not None and valor < 0:
+            raise ValueError("Valor do plano não pode ser negativo.")
+        ids = None if paciente_ids is None else list(paciente_ids)
+        valores: dict[str, object] = dict(
+            plano_tipo=tipo,
+            plano_dia=dia if tipo == "mensal" else None,
+            plano_sessoes=sessoes if tipo == "pacote" else None,
+        )
+        if valor is not None:
+            valores["plano_valor"] = valor
+        stmt = (
+            update(PacienteSQL)
+            .where(PacienteSQL.deleted_at.is_(None))
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        if ids is not None:
+            stmt = stmt.where(PacienteSQL.id.in_(ids))
+        with self._Session() as s:
+            s.execute(stmt)
+            resumo = self._recalcular(s, ids, aplicar, lote)
+            if aplicar:
+                s.commit()
+            else:
+                s.rollback()
+            return resumo
+
+    def recalcular(
+        self,
+        paciente_ids: Iterable[int] | None = None,
+        *,
+        aplicar: bool = True,
+        lote: int = LOTE_PADRAO,
+    ) -> ResumoRecalculo:
+        ids = None if paciente_ids is None else list(paciente_ids)
+        with self._Session() as s:
+            resumo = self._recalcular(s, ids, aplicar, lote)
+            if aplicar:
+                s.commit()
+            return resumo
+
+    @staticmethod
+    def _recalcular(s: Session, ids: list[int] | None, aplicar: bool, lote: int) -> ResumoRecalculo:
+        stmt = (
+            select(
+                PacienteSQL.id,
+                PacienteSQL.plano_tipo,
+                PacienteSQL.plano_dia,
+                BASE_COBRANCA,
+                PacienteSQL.data_proxima_cobranca,
+            )
+            .where(PacienteSQL.deleted_at.is_(None))
+            .where(BASE_COBRANCA.is_not(None))
+            .order_by(PacienteSQL.id)
+            .limit(lote)
+        )
+        if ids is not None:
+            stmt = stmt.where(PacienteSQL.id.in_(ids))
+
+        avaliados = alterados = 0
+        ultimo = 0
+        while True:
+            linhas = s.execute(stmt.where(PacienteSQL.id > ultimo)).all()
+            if not linhas:
+                break
+            ultimo = linhas[-1][0]
+            novas = calcular_cobrancas(s, [tuple(r[:4]) for r in linhas])
+            atuais = np.array([r[4] for r in linhas], dtype="datetime64[D]")
+            mudou = np.flatnonzero(novas != atuais)
+            avaliados += len(linhas)
+            alterados += len(mudou)
+            if aplicar and len(mudou):
+                s.execute(
+                    update(PacienteSQL),
+                    [
+                        {"id": linhas[i][0], "data_proxima_cobranca": novas[i].astype(date)}
+                        for i in mudou
+                    ],
+                )
+        return ResumoRecalculo(avaliados=avaliados, alterados=alterados)
@@ -0,0 +1,16 @@
+class ConflitoVersao(ValueError):
+    def __init__(self, entidade: str, registro_id: int):
+        super().__init__(
+            f"{entidade} id={registro_id} foi alterado por outra pessoa. "
+            "Recarregue os dados e tente novamente."
+        )
+        self.entidade = entidade
+        self.registro_id = registro_id
+
+
+class HorarioOcupado(ValueError):
+    def __init__(self, registro_id: int):
+        super().__init__(
+            f"Sessão id={registro_id} conflita com outra sessão do fisioterapeuta nesse horário."
+        )
+        self.registro_id = registro_id
@@ -0,0 +1,101 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import Select, select
+from sqlalchemy.types import TypeEngine
+
+from src.db.db import Base, SessionLocal
+from src.db.tables import (
+    AgendaSQL,
+    ExportWatermarkSQL,
+    FisioDisponSQL,
+    FisioterapeutaSQL,
+    PacienteSQL,
+    PagamentoSQL,
+)
+
+TABELAS_CDC: dict[str, type[Base]] = {
+    "pacientes": PacienteSQL,
+    "agenda": AgendaSQL,
+    "fisioterapeutas": FisioterapeutaSQL,
+    "fisio_disponibilidades": FisioDisponSQL,
+}
+
+
+@dataclass(slots=True)
+class StreamTabela:
+    colunas: list[tuple[str, TypeEngine]]
+    chunks: Iterator[list[tuple]]
+
+
+class ExportRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    def _stream(self, stmt: Select, chunk: int) -> StreamTabela:
+        colunas = [(c.name, c.type) for c in stmt.selected_columns]
+
+        def _chunks() -> Iterator[list[tuple]]:
+            with self._Session() as s:
+                result = s.execute(stmt, execution_options={"yield_per": chunk})
+                for part in result.partitions():
+                    yield [tuple(r) for r in part]
+
+        return StreamTabela(colunas=colunas, chunks=_chunks())
+
+    def pacientes(self, chunk: int = 5000) -> StreamTabela:
+        t = PacienteSQL.__table__
+        return self._stream(select(t).order_by(t.c.id), chunk)
+
+    def agenda(self, data_inicio: date, data_fim: date, chunk: int = 5000) -> StreamTabela:
+        t = AgendaSQL.__table__
+        stmt = (
+            select(t)
+            .where(t.c.data >= data_inicio)
+            .where(t.c.data <= data_fim)
+            .order_by(t.c.data, t.c.id)
+        )
+        return self._stream(stmt, chunk)
+
+    def pagamentos(self, data_inicio: date, data_fim: date, chunk: int = 5000) -> StreamTabela:
+        stmt = (
+            select(
+                PagamentoSQL.id,
+                PagamentoSQL.paciente_id,
+                PacienteSQL.nome,
+                PagamentoSQL.data,
+                PagamentoSQL.valor,
+                PagamentoSQL.metodo,
+                PagamentoSQL.periodo_inicio,
+                PagamentoSQL.periodo_fim,
+            )
+            .join(PacienteSQL, PacienteSQL.id == PagamentoSQL.paciente_id)
+            .where(PagamentoSQL.data >= data_inicio)
+            .where(PagamentoSQL.data <= data_fim)
+            .order_by(PagamentoSQL.data, PagamentoSQL.id)
+        )
+        return self._stream(stmt, chunk)
+
+    def alteracoes(
+        self, tabela: str, desde: datetime | None, ate: datetime, chunk: int = 5000
+    ) -> StreamTabela:
+        t = TABELAS_CDC[tabela].__table__
+        stmt = select(t).where(t.c.updated_at <= ate)
+        if desde is not None:
+            stmt = stmt.where(t.c.updated_at > desde)
+        return self._stream(stmt.order_by(t.c.updated_at, t.c.id), chunk)
+
+    def obter_watermark(self, nome: str) -> datetime | None:
+        with self._Session() as s:
+            row = s.get(ExportWatermarkSQL, nome)
+            return row.watermark if row else None
+
+    def salvar_watermark(self, nome: str, watermark: datetime) -> None:
+        with self._Session() as s:
+            row = s.get(ExportWatermarkSQL, nome)
+            if row is None:
+                s.add(ExportWatermarkSQL(nome=nome, watermark=watermark))
+            else:
+                row.watermark = watermark
+            s.commit()
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pandas as pd
+from sqlalchemy import case, func, select
+
+from src.db.db import SessionLocal
+from src.db.tables import PacienteSQL, PagamentoSQL
+from src.models.pagamento_model import FAIXAS_ATRASO, FaixaAtraso
+from src.utils.previsao_utils import COLUNAS_BASE
+
+ULTIMO_VALOR_PAGO = (
+    select(PagamentoSQL.valor)
+    .where(PagamentoSQL.paciente_id == PacienteSQL.id)
+    .where(PagamentoSQL.valor.is_not(None))
+    .order_by(PagamentoSQL.data.desc(), PagamentoSQL.id.desc())
+    .limit(1)
+    .correlate(PacienteSQL)
+    .scalar_subquery()
+)
+
+VALOR_ESPERADO = func.coalesce(PacienteSQL.plano_valor, ULTIMO_VALOR_PAGO)
+
+AULAS_SEMANA = sum(PacienteSQL.dias_aula.op(">>")(wd).op("&")(1) for wd in range(7))
+
+
+def _ativos(stmt):
+    return (
+        stmt.where(PacienteSQL.deleted_at.is_(None))
+        .where(PacienteSQL.ativo.is_(True))
+        .where(PacienteSQL.data_proxima_cobranca.is_not(None))
+    )
+
+
+class FinanceiroRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    def base_previsao(self) -> pd.DataFrame:
+        stmt = _ativos(
+            select(
+                PacienteSQL.plano_tipo,
+                PacienteSQL.plano_dia,
+                PacienteSQL.plano_sessoes,
+                AULAS_SEMANA,
+                PacienteSQL.data_proxima_cobranca,
+                VALOR_ESPERADO,
+            )
+        )
+        with self._Session() as s:
+            base = pd.DataFrame(s.execute(stmt).all(), columns=list(COLUNAS_BASE))
+        base["proxima"] = pd.to_datetime(base["proxima"])
+        for col in ("plano_dia", "plano_sessoes", "aulas_semana", "valor"):
+            base[col] = pd.to_numeric(base[col], errors="coerce").astype("float64")
+        return base
+
+    def atrasos(self, hoje: date) -> list[FaixaAtraso]:
+        vencimento = PacienteSQL.data_proxima_cobranca
+        faixa = case(
+            (vencimento >= hoje - timedelta(days=7), FAIXAS_ATRASO[0]),
+            (vencimento >= hoje - timedelta(days=30), FAIXAS_ATRASO[1]),
+            else_=FAIXAS_ATRASO[2],
+        ).label("faixa")
+        stmt = (
+            _ativos(
+                select(
+                    faixa,
+                    func.count(PacienteSQL.id),
+                    func.coalesce(func.sum(VALOR_ESPERADO), 0),
+                    func.sum(case((VALOR_ESPERADO.is_(None), 1), else_=0)),
+                )
+            )
+            .where(vencimento < hoje)
+            .group_by(faixa)
+        )
+        with self._Session() as s:
+            por_faixa = {f: (q, t, n) for f, q, t, n in s.execute(stmt)}
+        faixas = []
+        for f in FAIXAS_ATRASO:
+            quantidade, total, sem_valor = por_faixa.get(f, (0, 0, 0))
+            faixas.append(
+                FaixaAtraso(
+                    faixa=f,
+                    quantidade=quantidade,
+                    total=Decimal(str(total)).quantize(Decimal("0.01")),
+                    sem_valor=sem_valor or 0,
+                )
+            )
+        return faixas
@@ -1,7 +1,7 @@
-from sqlalchemy import delete, select
+from sqlalchemy import select, update
 
 from src.db.db import SessionLocal
-from src.db.tables import FisioDisponSQL, FisioterapeutaSQL
+from src.db.tables import FisioDisponSQL, FisioterapeutaSQL, agora_utc
 
 
 class FisioterapeutaRepositorySQL:
@@ -23,11 +23,26 @@ class FisioterapeutaRepositorySQL:
             stmt = select(FisioterapeutaSQL).where(FisioterapeutaSQL.ativo.is_(True))
             return s.execute(stmt).scalars().all()
 
+    def listar_disponibilidades(self, fisio_id: int) -> list[FisioDisponSQL]:
+        with self._Session() as s:
+            stmt = (
+                select(FisioDisponSQL)
+                .where(FisioDisponSQL.fisio_id == fisio_id)
+                .where(FisioDisponSQL.deleted_at.is_(None))
+                .order_by(FisioDisponSQL.weekday, FisioDisponSQL.hora_inicio)
+            )
+            return list(s.execute(stmt).scalars())
+
     def set_disponibilidades(self, fisio_id: int, slots: list[tuple[int, str, str]]):
         from datetime import time
 
         with self._Session() as s:
-            s.execute(delete(FisioDisponSQL).where(FisioDisponSQL.fisio_id == fisio_id))
+            s.execute(
+                update(FisioDisponSQL)
+                .where(FisioDisponSQL.fisio_id == fisio_id)
+                .where(FisioDisponSQL.deleted_at.is_(None))
+                .values(deleted_at=agora_utc())
+            )
             for wd, h1, h2 in slots:
                 hh1, mm1 = map(int, h1.split(":"))
                 hh2, mm2 = map(int, h2.split(":"))
@@ -0,0 +1,109 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from src.db.db import SessionLocal
+from src.db.tables import LembreteEnviadoSQL, agora_utc
+from src.repositories.outbox_repository_sql import enfileirar
+
+PENDENTE_EXPIRA = timedelta(minutes=10)
+
+
+def _chave(paciente_id: int, vencimento: date, tipo: str):
+    return (
+        LembreteEnviadoSQL.paciente_id == paciente_id,
+        LembreteEnviadoSQL.vencimento == vencimento,
+        LembreteEnviadoSQL.tipo == tipo,
+    )
+
+
+class LembreteRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    def reservar(
+        self, paciente_id: int, vencimento: date, tipo: str, expira: timedelta = PENDENTE_EXPIRA
+    ) -> bool:
+        agora = agora_utc()
+        with self._Session() as s:
+            s.add(
+                LembreteEnviadoSQL(
+                    paciente_id=paciente_id,
+                    vencimento=vencimento,
+                    tipo=tipo,
+                    status="pendente",
+                    enviado_em=agora,
+                )
+            )
+            try:
+                s.commit()
+                return True
+            except IntegrityError:
+                s.rollback()
+
+            # pendente antigo: o processo que reservou morreu antes de confirmar ou liberar
+            retomado = s.execute(
+                update(LembreteEnviadoSQL)
+                .where(*_chave(paciente_id, vencimento, tipo))
+                .where(LembreteEnviadoSQL.status == "pendente")
+                .where(LembreteEnviadoSQL.enviado_em < agora - expira)
+                .values(enviado_em=agora)
+            ).rowcount
+            s.commit()
+            return retomado == 1
+
+    def confirmar(self, paciente_id: int, vencimento: date, tipo: str) -> None:
+        with self._Session() as s:
+            s.execute(
+                update(LembreteEnviadoSQL)
+                .where(*_chave(paciente_id, vencimento, tipo))
+                .values(status="enviado", enviado_em=agora_utc())
+            )
+            s.commit()
+
+    def liberar(self, paciente_id: int, vencimento: date, tipo: str) -> None:
+        with self._Session() as s:
+            s.execute(
+                delete(LembreteEnviadoSQL)
+                .where(*_chave(paciente_id, vencimento, tipo))
+                .where(LembreteEnviadoSQL.status == "pendente")
+            )
+            s.commit()
+
+    @contextmanager
+    def registrar_envio(self, paciente_id: int, vencimento: date, tipo: str) -> Iterator[bool]:
+        if not self.reservar(paciente_id, vencimento, tipo):
+            yield False
+            return
+        try:
+            yield True
+        except BaseException:
+            self.liberar(paciente_id, vencimento, tipo)
+            raise
+        self.confirmar(paciente_id, vencimento, tipo)
+
+    def enfileirar(
+        self,
+        paciente_id: int,
+        vencimento: date,
+        tipo: str,
+        *,
+        destinatario: str,
+        assunto: str,
+        texto: str,
+        html: str | None = None,
+    ) -> bool:
+        with self._Session() as s:
+            s.add(LembreteEnviadoSQL(paciente_id=paciente_id, vencimento=vencimento, tipo=tipo))
+            enfileirar(
+                s, tipo=tipo, destinatario=destinatario, assunto=assunto, texto=texto, html=html
+            )
+            try:
+                s.commit()
+            except IntegrityError:
+                s.rollback()
+                return False
+            return True
@@ -0,0 +1,130 @@
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.db.db import SessionLocal
+from src.db.tables import OutboxSQL, agora_utc
+
+BACKOFF_MAXIMO = timedelta(hours=6)
+
+
+@dataclass(slots=True, frozen=True)
+class MensagemOutbox:
+    id: int
+    tipo: str
+    destinatario: str
+    assunto: str
+    texto: str
+    html: str | None
+    tentativas: int
+    lease_token: str
+
+
+def enfileirar(
+    s: Session,
+    *,
+    tipo: str,
+    destinatario: str,
+    assunto: str,
+    texto: str,
+    html: str | None = None,
+) -> OutboxSQL:
+    row = OutboxSQL(tipo=tipo, destinatario=destinatario, assunto=assunto, texto=texto, html=html)
+    s.add(row)
+    return row
+
+
+class OutboxRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    def reivindicar(self, limite: int, lease: timedelta) -> list[MensagemOutbox]:
+        agora = agora_utc()
+        token = uuid.uuid4().hex
+        elegiveis = (
+            select(OutboxSQL.id)
+            .where(
+                or_(
+                    and_(OutboxSQL.status == "pendente", OutboxSQL.disponivel_em <= agora),
+                    and_(OutboxSQL.status == "enviando", OutboxSQL.lease_ate < agora),
+                )
+            )
+            .order_by(OutboxSQL.id)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        )
+        with self._Session() as s:
+            s.execute(
+                update(OutboxSQL)
+                .where(OutboxSQL.id.in_(elegiveis))
+                .values(status="enviando", lease_token=token, lease_ate=agora + lease)
+                .execution_options(synchronize_session=False)
+            )
+            s.commit()
+
+            rows = s.execute(
+                select(OutboxSQL).where(OutboxSQL.lease_token == token).order_by(OutboxSQL.id)
+            ).scalars()
+            return [
+                MensagemOutbox(
+                    id=r.id,
+                    tipo=r.tipo,
+                    destinatario=r.destinatario,
+                    assunto=r.assunto,
+                    texto=r.texto,
+                    html=r.html,
+                    tentativas=r.tentativas,
+                    lease_token=token,
+                )
+                for r in rows
+            ]
+
+    def concluir(self, item: MensagemOutbox) -> bool:
+        with self._Session() as s:
+            result = s.execute(
+                update(OutboxSQL)
+                .where(OutboxSQL.id == item.id, OutboxSQL.lease_token == item.lease_token)
+                .values(
+                    status="enviado",
+                    tentativas=OutboxSQL.tentativas + 1,
+                    enviado_em=agora_utc(),
+                    lease_token=None,
+                    lease_ate=None,
+                    ultimo_erro=None,
+                )
+            )
+            s.commit()
+            return result.rowcount == 1
+
+    def falhar(
+        self, item: MensagemOutbox, erro: str, max_tentativas: int, backoff: timedelta
+    ) -> bool:
+        tentativas = item.tentativas + 1
+        if tentativas >= max_tentativas:
+            valores = {"status": "falhou"}
+        else:
+            espera = min(backoff * (2 ** (tentativas - 1)), BACKOFF_MAXIMO)
+            valores = {"status": "pendente", "disponivel_em": agora_utc() + espera}
+
+        with self._Session() as s:
+            result = s.execute(
+                update(OutboxSQL)
+                .where(OutboxSQL.id == item.id, OutboxSQL.lease_token == item.lease_token)
+                .values(
+                    tentativas=tentativas,
+                    ultimo_erro=erro[:2000],
+                    lease_token=None,
+                    lease_ate=None,
+                    **valores,
+                )
+            )
+            s.commit()
+            return result.rowcount == 1
+
+    def contar_por_status(self) -> dict[str, int]:
+        with self._Session() as s:
+            rows = s.execute(select(OutboxSQL.status, func.count()).group_by(OutboxSQL.status))
+            return {status: total for status, total in rows}
@@ -1,13 +1,95 @@
-from datetime import date, timedelta
+from collections.abc import Iterator, Sequence
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import Row, delete, exists, func, insert, or_, select, text, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
-from src.db.tables import PacienteSQL
-from src.models.paciente_model import Paciente
+from src.db.tables import AgendaSQL, LembreteEnviadoSQL, PacienteAulaSQL, PacienteSQL, agora_utc
+from src.models.paciente_model import (
+    NovoPaciente,
+    Paciente,
+    PacienteIdentificacao,
+    VencimentoPaciente,
+    mascara_dias,
+    mascaras_com_dia,
+)
+from src.models.pagamento_model import Lancamento
+from src.repositories.concorrencia import ConflitoVersao
+from src.repositories.pagamento_repository_sql import lancar, lancar_pagamentos, vencimentos_pagos
+from src.utils.cobranca_utils import PLANO_PADRAO, proxima_cobranca, proximas_cobrancas
 
 from ..db.db import SessionLocal
 
+LOTE_IMPORTACAO = 1000
+COLUNAS = tuple(PacienteSQL.__table__.c)
+
+
+def _atualizar(
+    s: Session, paciente_id: int, valores: dict, versao: int | None = None
+) -> Row | None:
+    stmt = update(PacienteSQL).where(PacienteSQL.id == paciente_id)
+    if versao is not None:
+        stmt = stmt.where(PacienteSQL.version == versao).values(version=versao + 1)
+    stmt = stmt.values(**valores).execution_options(synchronize_session=False)
+    if s.get_bind().dialect.update_returning:
+        return s.execute(stmt.returning(*COLUNAS)).first()
+    if not s.execute(stmt).rowcount:
+        return None
+    return s.execute(select(*COLUNAS).where(PacienteSQL.id == paciente_id)).first()
+
+
+def _erro_escrita(s: Session, paciente_id: int, versao: int | None, *condicoes) -> ValueError:
+    if (
+        versao is not None
+        and s.execute(
+            select(PacienteSQL.id).where(PacienteSQL.id == paciente_id, *condicoes)
+        ).first()
+    ):
+        return ConflitoVersao("Paciente", paciente_id)
+    return ValueError("Paciente não encontrado")
+
+
+def _editar_com_antigos(
+    s: Session, paciente_id: int, pedidos: dict, versao: int | None
+) -> tuple[Row, dict[str, tuple[object, object]]] | None:
+    c = PacienteSQL.__table__.c
+    antigo = select(
+        c.id, c.data_ultimo_pagamento, c.data_proxima_cobranca, *(c[k] for k in pedidos)
+    ).where(c.id == paciente_id)
+    if versao is not None:
+        antigo = antigo.where(c.version == versao)
+    antigo = antigo.with_for_update().cte("antigo")
+    row = s.execute(
+        update(PacienteSQL)
+        .where(PacienteSQL.id == antigo.c.id)
+        .where(or_(*(c[k].is_distinct_from(v) for k, v in pedidos.items())))
+        .values(**pedidos, version=PacienteSQL.version + 1)
+        .returning(*COLUNAS, *(col.label(f"antigo_{col.name}") for col in antigo.c))
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+    antigos = row._mapping
+    updates = {
+        k: (antigos[f"antigo_{k}"], v) for k, v in pedidos.items() if antigos[f"antigo_{k}"] != v
+    }
+    if "data_entrada" in updates and antigos["antigo_data_ultimo_pagamento"] is None:
+        nova = proxima_cobranca(row.plano_tipo, row.plano_dia, pedidos["data_entrada"])
+        updates["data_proxima_cobranca"] = (antigos["antigo_data_proxima_cobranca"], nova)
+        row = _atualizar(s, paciente_id, {"data_proxima_cobranca": nova})
+    return row, updates
+
+
+def _copiar(s: Session, tabela: str, linhas: list[dict]) -> None:
+    colunas = list(linhas[0])
+    cursor = s.connection().connection.driver_connection.cursor()
+    with cursor.copy(f'COPY "{tabela}" ({", ".join(colunas)}) FROM STDIN') as copia:
+        for linha in linhas:
+            copia.write_row([linha[c] for c in colunas])
+
 
 class PacienteRepositorySQL:
     def __init__(self):
@@ -23,23 +105,163 @@ class PacienteRepositorySQL:
             data_ultimo_pagamento=row.data_ultimo_pagamento,
             data_proxima_cobranca=row.data_proxima_cobranca,
             ativo=row.ativo,
-            aula_seg=row.aula_seg or False,
-            aula_ter=row.aula_ter or False,
-            aula_qua=row.aula_qua or False,
-            aula_qui=row.aula_qui or False,
-            aula_sex=row.aula_sex or False,
-            aula_sab=row.aula_sab or False,
-            aula_dom=row.aula_dom or False,
+            dias_aula=row.dias_aula or 0,
+            plano_tipo=row.plano_tipo or PLANO_PADRAO,
+            plano_dia=row.plano_dia,
+            plano_sessoes=row.plano_sessoes,
+            plano_valor=row.plano_valor,
+            version=row.version,
         )
 
     def listar(self, only_active: bool) -> list[Paciente]:
         with self._Session() as s:
-            stmt = select(PacienteSQL)
+            stmt = select(PacienteSQL).where(PacienteSQL.deleted_at.is_(None))
             if only_active:
                 stmt = stmt.filter(PacienteSQL.ativo.is_(True))
             rows = s.execute(stmt).scalars().all()
             return [self._to_model(r) for r in rows]
 
+    def listar_pagina(
+        self, only_active: bool, busca: str, limite: int, offset: int
+    ) -> tuple[list[Paciente], int]:
+        with self._Session() as s:
+            stmt = select(PacienteSQL).where(PacienteSQL.deleted_at.is_(None))
+            if only_active:
+                stmt = stmt.where(PacienteSQL.ativo.is_(True))
+            if busca:
+                termo = busca.strip().lower()
+                stmt = stmt.where(
+                    or_(
+                        func.lower(PacienteSQL.nome).contains(termo, autoescape=True),
+                        func.lower(PacienteSQL.email).contains(termo, autoescape=True),
+                    )
+                )
+            total = s.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+            rows = (
+                s.execute(stmt.order_by(PacienteSQL.id.asc()).limit(limite).offset(offset))
+                .scalars()
+                .all()
+            )
+            return [self._to_model(r) for r in rows], total
+
+    def versao(self) -> tuple[int, datetime | None]:
+        with self._Session() as s:
+            total, ultima = s.execute(
+                select(func.count(PacienteSQL.id), func.max(PacienteSQL.updated_at))
+            ).one()
+            return total, ultima
+
+    def nomes_por_ids(self, ids: set[int]) -> dict[int, str]:
+        if not ids:
+            return {}
+        with self._Session() as s:
+            stmt = select(PacienteSQL.id, PacienteSQL.nome).where(PacienteSQL.id.in_(ids))
+            return {pid: nome for pid, nome in s.execute(stmt)}
+
+    def identificacoes(self) -> list[PacienteIdentificacao]:
+        with self._Session() as s:
+            stmt = (
+                select(PacienteSQL.id, PacienteSQL.nome, PacienteSQL.telefone)
+                .where(PacienteSQL.deleted_at.is_(None))
+                .where(PacienteSQL.ativo.is_(True))
+            )
+            return [PacienteIdentificacao(*r) for r in s.execute(stmt)]
+
+    def listar_com_aula(self, weekday: int) -> list[Paciente]:
+        with self._Session() as s:
+            stmt = (
+                select(PacienteSQL)
+                .where(PacienteSQL.deleted_at.is_(None))
+                .where(PacienteSQL.ativo.is_(True))
+                .where(PacienteSQL.dias_aula.in_(mascaras_com_dia(weekday)))
+                .order_by(PacienteSQL.nome)
+            )
+            return [self._to_model(r) for r in s.execute(stmt).scalars()]
+
+    def contagem_por_dia(self) -> list[int]:
+        stmt = (
+            select(
+                *(
+                    func.count().filter(PacienteSQL.dias_aula.op("&")(1 << wd) != 0)
+                    for wd in range(7)
+                )
+            )
+            .where(PacienteSQL.deleted_at.is_(None))
+            .where(PacienteSQL.ativo.is_(True))
+        )
+        with self._Session() as s:
+            return list(s.execute(stmt).one())
+
+    def importar(self, novos: Sequence[NovoPaciente], lote: int = LOTE_IMPORTACAO) -> int:
+        if not novos:
+            return 0
+        agora = agora_utc()
+        with self._Session() as s:
+            postgres = s.get_bind().dialect.name == "postgresql"
+            for inicio in range(0, len(novos), lote):
+                bloco = novos[inicio : inicio + lote]
+                entradas = np.array([p.data_entrada for p in bloco], dtype="datetime64[D]")
+                proximas = proximas_cobrancas(
+                    np.full(len(bloco), PLANO_PADRAO, dtype=object),
+                    np.full(len(bloco), np.nan),
+                    entradas,
+                ).astype(date)
+                linhas = [
+                    {
+                        "nome": p.nome,
+                        "email": p.email,
+                        "telefone": p.telefone,
+                        "data_entrada": p.data_entrada,
+                        "data_proxima_cobranca": proxima,
+                        "ativo": True,
+                        "plano_tipo": PLANO_PADRAO,
+                        "dias_aula": mascara_dias(d for d, _ in p.aulas),
+                        "updated_at": agora,
+                    }
+                    for p, proxima in zip(bloco, proximas, strict=True)
+                ]
+
+                if postgres:
+                    ids = (
+                        s.execute(
+                            text(
+                                "SELECT nextval(pg_get_serial_sequence('pacientes', 'id')) "
+                                "FROM generate_series(1, :n)"
+                            ),
+                            {"n": len(linhas)},
+                        )
+                        .scalars()
+                        .all()
+                    )
+                    _copiar(
+                        s,
+                        "pacientes",
+                        [{"id": i, **ln} for i, ln in zip(ids, linhas, strict=True)],
+                    )
+                else:
+                    ids = (
+                        s.execute(
+                            insert(PacienteSQL).returning(
+                                PacienteSQL.id, sort_by_parameter_order=True
+                            ),
+                            linhas,
+                        )
+                        .scalars()
+                        .all()
+                    )
+
+                aulas = [
+                    {"paciente_id": pid, "weekday": wd, "hora": time.fromisoformat(hhmm)}
+                    for pid, p in zip(ids, bloco, strict=True)
+                    for wd, hhmm in p.aulas
+                ]
+                if aulas and postgres:
+                    _copiar(s, "paciente_aulas", aulas)
+                elif aulas:
+                    s.execute(insert(PacienteAulaSQL), aulas)
+            s.commit()
+        return len(novos)
+
     def cadastrar(self, nome: str, email: str, telefone: str, data_entrada: date) -> Paciente:
         with self._Session() as s:
             row = PacienteSQL(
@@ -48,7 +270,8 @@ class PacienteRepositorySQL:
                 telefone=telefone or None,
                 data_entrada=data_entrada,
                 ativo=True,
-                data_proxima_cobranca=(data_entrada + timedelta(days=30)) if data_entrada else None,
+                plano_tipo=PLANO_PADRAO,
+                data_proxima_cobranca=proxima_cobranca(PLANO_PADRAO, None, data_entrada),
             )
             s.add(row)
             s.commit()
@@ -63,13 +286,8 @@ class PacienteRepositorySQL:
         email: str | None = None,
         telefone: str | None = None,
         data_entrada: date | None = None,
-        aula_seg: bool | None = None,
-        aula_ter: bool | None = None,
-        aula_qua: bool | None = None,
-        aula_qui: bool | None = None,
-        aula_sex: bool | None = None,
-        aula_sab: bool | None = None,
-        aula_dom: bool | None = None,
+        dias_aula: int | None = None,
+        versao: int | None = None,
     ) -> tuple[Paciente, dict[str, tuple[object, object]]]:
         def _norm_str(v: str | None) -> str | None:
             if v is None:
@@ -77,104 +295,184 @@ class PacienteRepositorySQL:
             v2 = v.strip()
             return v2 if v2 else None
 
-        with self._Session() as s:
-            row = s.get(PacienteSQL, paciente_id)
-            if row is None:
-                raise ValueError(f"Paciente id={paciente_id} não encontrado")
-
-            updates: dict[str, tuple[object, object]] = {}
+        pedidos: dict[str, object] = {
+            k: v
+            for k, v in {
+                "nome": nome,
+                "data_entrada": data_entrada,
+                "dias_aula": dias_aula,
+            }.items()
+            if v is not None
+        }
+        if dias_aula is not None and not 0 <= dias_aula < 1 << 7:
+            raise ValueError(f"Máscara de dias inválida: {dias_aula}")
+        if email is not None:
+            pedidos["email"] = _norm_str(email)
+        if telefone is not None:
+            pedidos["telefone"] = _norm_str(telefone)
 
-            if nome is not None and nome != row.nome:
-                updates["nome"] = (row.nome, nome)
+        with self._Session() as s:
+            try:
+                if pedidos and s.get_bind().dialect.name == "postgresql":
+                    editado = _editar_com_antigos(s, paciente_id, pedidos, versao)
+                    if editado is not None:
+                        s.commit()
+                        row, updates = editado
+                        return self._to_model(row), updates
 
-            if email is not None:
-                e = _norm_str(email)
-                if e != row.email:
-                    updates["email"] = (row.email, e)
+                atual = s.execute(select(*COLUNAS).where(PacienteSQL.id == paciente_id)).first()
+                if atual is None:
+                    raise ValueError(f"Paciente id={paciente_id} não encontrado")
+                if versao is not None and atual.version != versao:
+                    raise ConflitoVersao("Paciente", paciente_id)
 
-            if telefone is not None:
-                t = _norm_str(telefone)
-                if t != row.telefone:
-                    updates["telefone"] = (row.telefone, t)
+                updates = {
+                    k: (getattr(atual, k), v) for k, v in pedidos.items() if getattr(atual, k) != v
+                }
+                if "data_entrada" in updates and atual.data_ultimo_pagamento is None:
+                    updates["data_proxima_cobranca"] = (
+                        atual.data_proxima_cobranca,
+                        proxima_cobranca(atual.plano_tipo, atual.plano_dia, data_entrada),
+                    )
+                if not updates:
+                    return self._to_model(atual), {}
 
-            if data_entrada is not None and data_entrada != row.data_entrada:
-                updates["data_entrada"] = (row.data_entrada, data_entrada)
-                updates["data_proxima_cobranca"] = (
-                    row.data_proxima_cobranca,
-                    data_entrada + timedelta(days=30),
+                row = _atualizar(
+                    s, paciente_id, {k: v[1] for k, v in updates.items()}, atual.version
                 )
-
-            for attr, new_val in {
-                "aula_seg": aula_seg,
-                "aula_ter": aula_ter,
-                "aula_qua": aula_qua,
-                "aula_qui": aula_qui,
-                "aula_sex": aula_sex,
-                "aula_sab": aula_sab,
-                "aula_dom": aula_dom,
-            }.items():
-                if new_val is not None and getattr(row, attr) != new_val:
-                    updates[attr] = (getattr(row, attr), new_val)
-
-            if not updates:
-                return self._to_model(row), {}
-
-            for k, v in updates.items():
-                setattr(row, k, v[1])
-
-            try:
+                if row is None:
+                    raise ConflitoVersao("Paciente", paciente_id)
                 s.commit()
             except IntegrityError:
                 s.rollback()
                 raise
-
-            s.refresh(row)
             return self._to_model(row), updates
 
-    def registrar_pagamento(self, paciente_id: int, data_pagamento: date) -> Paciente:
+    def registrar_pagamento(
+        self,
+        paciente_id: int,
+        data_pagamento: date,
+        valor: Decimal | None = None,
+        metodo: str | None = None,
+    ) -> Paciente:
         with self._Session() as s:
-            row = s.get(PacienteSQL, paciente_id)
-            if not row:
+            lancamento = Lancamento(paciente_id, data_pagamento, valor, metodo)
+            if not lancar(s, [lancamento], sincronizar=False):
+                raise ValueError(f"Paciente {paciente_id} não encontrado")
+            row = _atualizar(s, paciente_id, vencimentos_pagos(s))
+            if row is None:
                 raise ValueError(f"Paciente {paciente_id} não encontrado")
-            row.data_ultimo_pagamento = data_pagamento
-            row.data_proxima_cobranca = (
-                (data_pagamento + timedelta(days=30)) if data_pagamento else None
-            )
             s.commit()
-            s.refresh(row)
             return self._to_model(row)
 
-    def vencimentos_proximos(self) -> list[Paciente]:
-        from datetime import date as _date
-
-        hoje = _date.today()
-        limite = hoje + timedelta(days=7)
+    def registrar_pagamentos(
+        self,
+        paciente_ids: list[int],
+        data_pagamento: date,
+        valor: Decimal | None = None,
+        metodo: str | None = None,
+    ) -> int:
+        if not paciente_ids:
+            return 0
         with self._Session() as s:
-            stmt = (
-                select(PacienteSQL)
-                .where(PacienteSQL.ativo.is_(True))
-                .where(PacienteSQL.data_proxima_cobranca.is_not(None))
-                .where(PacienteSQL.data_proxima_cobranca <= limite)
+            existentes = s.execute(
+                select(PacienteSQL.id)
+                .where(PacienteSQL.id.in_(paciente_ids))
+                .where(PacienteSQL.deleted_at.is_(None))
+            ).scalars()
+            n = lancar_pagamentos(s, existentes, data_pagamento, valor=valor, metodo=metodo)
+            s.commit()
+            return n
+
+    def iter_vencimentos(
+        self,
+        ate: date,
+        *,
+        desde: date | None = None,
+        sem_lembrete: str | None = None,
+        shard: tuple[int, int] = (0, 1),
+        chunk: int = 1000,
+    ) -> Iterator[VencimentoPaciente]:
+        stmt = (
+            select(
+                PacienteSQL.id,
+                PacienteSQL.nome,
+                PacienteSQL.email,
+                PacienteSQL.telefone,
+                PacienteSQL.data_proxima_cobranca,
             )
-            rows = s.execute(stmt).scalars().all()
-            return [self._to_model(r) for r in rows]
+            .where(PacienteSQL.ativo.is_(True))
+            .where(PacienteSQL.deleted_at.is_(None))
+            .where(PacienteSQL.data_proxima_cobranca.is_not(None))
+            .where(PacienteSQL.data_proxima_cobranca <= ate)
+            .order_by(PacienteSQL.data_proxima_cobranca.asc(), PacienteSQL.id.asc())
+        )
+        if desde is not None:
+            stmt = stmt.where(PacienteSQL.data_proxima_cobranca >= desde)
+        if sem_lembrete is not None:
+            stmt = stmt.where(
+                ~exists().where(
+                    LembreteEnviadoSQL.paciente_id == PacienteSQL.id,
+                    LembreteEnviadoSQL.vencimento == PacienteSQL.data_proxima_cobranca,
+                    LembreteEnviadoSQL.tipo == sem_lembrete,
+                    LembreteEnviadoSQL.status == "enviado",
+                )
+            )
+        indice, total = shard
+        if total > 1:
+            stmt = stmt.where(PacienteSQL.id % total == indice)
 
-    def deletar(self, paciente_id: int) -> None:
         with self._Session() as s:
-            paciente = s.query(PacienteSQL).filter(PacienteSQL.id == paciente_id).first()
+            for row in s.execute(stmt, execution_options={"yield_per": chunk}):
+                yield VencimentoPaciente(*row)
 
-            if not paciente:
-                raise ValueError("Paciente não encontrado")
+    def vencimentos_proximos(self) -> list[VencimentoPaciente]:
+        return list(self.iter_vencimentos(ate=date.today() + timedelta(days=7)))
 
-            s.delete(paciente)
+    def deletar(self, paciente_id: int, versao: int | None = None) -> None:
+        with self._Session() as s:
+            stmt = (
+                update(PacienteSQL)
+                .where(PacienteSQL.id == paciente_id)
+                .where(PacienteSQL.deleted_at.is_(None))
+                .values(ativo=False, deleted_at=agora_utc(), version=PacienteSQL.version + 1)
+            )
+            if versao is not None:
+                stmt = stmt.where(PacienteSQL.version == versao)
+            if not s.execute(stmt).rowcount:
+                raise _erro_escrita(s, paciente_id, versao, PacienteSQL.deleted_at.is_(None))
+            s.execute(
+                update(AgendaSQL)
+                .where(AgendaSQL.paciente_id == paciente_id)
+                .where(AgendaSQL.data >= date.today())
+                .where(AgendaSQL.deleted_at.is_(None))
+                .values(deleted_at=agora_utc(), version=AgendaSQL.version + 1)
+            )
+            s.execute(delete(PacienteAulaSQL).where(PacienteAulaSQL.paciente_id == paciente_id))
             s.commit()
 
-    def inativar(self, paciente_id: int) -> None:
+    def inativar(self, paciente_id: int, versao: int | None = None) -> None:
         with self._Session() as s:
-            paciente = s.query(PacienteSQL).filter(PacienteSQL.id == paciente_id).first()
-
-            if not paciente:
-                raise ValueError("Paciente não encontrado")
+            stmt = (
+                update(PacienteSQL)
+                .where(PacienteSQL.id == paciente_id)
+                .values(ativo=False, version=PacienteSQL.version + 1)
+            )
+            if versao is not None:
+                stmt = stmt.where(PacienteSQL.version == versao)
+            if not s.execute(stmt).rowcount:
+                raise _erro_escrita(s, paciente_id, versao)
+            s.commit()
 
-            paciente.ativo = False
+    def inativar_varios(self, paciente_ids: list[int]) -> int:
+        if not paciente_ids:
+            return 0
+        with self._Session() as s:
+            result = s.execute(
+                update(PacienteSQL)
+                .where(PacienteSQL.id.in_(paciente_ids))
+                .where(PacienteSQL.ativo.is_(True))
+                .values(ativo=False, version=PacienteSQL.version + 1)
+            )
             s.commit()
+            return result.rowcount
@@ -0,0 +1,231 @@
+from collections.abc import Iterable, Sequence
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from sqlalchemy import ColumnElement, extract, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from src.db.db import SessionLocal
+from src.db.tables import PacienteSQL, PagamentoSQL
+from src.models.pagamento_model import Lancamento, Pagamento, TotalMensal
+from src.repositories.cobranca_repository_sql import calcular_cobrancas
+
+
+def lancar_pagamentos(
+    s: Session,
+    paciente_ids: Iterable[int],
+    data: date,
+    *,
+    valor: Decimal | None = None,
+    metodo: str | None = None,
+    periodo_inicio: date | None = None,
+    periodo_fim: date | None = None,
+) -> int:
+    return lancar(
+        s,
+        [
+            Lancamento(pid, data, valor, metodo, periodo_inicio, periodo_fim)
+            for pid in dict.fromkeys(paciente_ids)
+        ],
+    )
+
+
+def _linha(lanc: Lancamento, inicio: date, fim: date) -> dict:
+    return {
+        "paciente_id": lanc.paciente_id,
+        "data": lanc.data,
+        "valor": lanc.valor,
+        "metodo": lanc.metodo,
+        "periodo_inicio": inicio,
+        "periodo_fim": fim,
+        "referencia": lanc.referencia,
+    }
+
+
+def lancar(s: Session, lancamentos: Sequence[Lancamento], *, sincronizar: bool = True) -> int:
+    linhas = []
+    pelo_plano = []
+    for lanc in lancamentos:
+        inicio = lanc.periodo_inicio or lanc.data
+        if lanc.periodo_fim is None:
+            pelo_plano.append((inicio, lanc))
+        elif lanc.periodo_fim < inicio:
+            raise ValueError("periodo_fim deve ser igual ou posterior a periodo_inicio")
+        else:
+            linhas.append(_linha(lanc, inicio, lanc.periodo_fim))
+
+    if pelo_plano:
+        planos = {
+            pid: (tipo, dia)
+            for pid, tipo, dia in s.execute(
+                select(PacienteSQL.id, PacienteSQL.plano_tipo, PacienteSQL.plano_dia).where(
+                    PacienteSQL.id.in_({lanc.paciente_id for _, lanc in pelo_plano})
+                )
+            )
+        }
+        conhecidos = sorted(
+            ((inicio, lanc) for inicio, lanc in pelo_plano if lanc.paciente_id in planos),
+            key=itemgetter(0),
+        )
+        for inicio, grupo in groupby(conhecidos, key=itemgetter(0)):
+            do_dia = [lanc for _, lanc in grupo]
+            proximas = calcular_cobrancas(
+                s,
+                [(lanc.paciente_id, *planos[lanc.paciente_id], inicio) for lanc in do_dia],
+                base=inicio,
+            )
+            linhas.extend(
+                _linha(lanc, inicio, max(inicio, proxima.astype(date) - timedelta(days=1)))
+                for lanc, proxima in zip(do_dia, proximas, strict=True)
+            )
+
+    if not linhas:
+        return 0
+    s.execute(insert(PagamentoSQL), linhas)
+    if not sincronizar:
+        return len(linhas)
+    return sincronizar_vencimentos(s, list({linha["paciente_id"] for linha in linhas}))
+
+
+def vencimentos_pagos(s: Session) -> dict[str, ColumnElement]:
+    def _max(coluna):
+        return (
+            select(func.max(coluna))
+            .where(PagamentoSQL.paciente_id == PacienteSQL.id)
+            .scalar_subquery()
+        )
+
+    coberto_ate = _max(PagamentoSQL.periodo_fim)
+    if s.get_bind().dialect.name == "sqlite":
+        proxima = func.date(coberto_ate, "+1 day")
+    else:
+        proxima = coberto_ate + 1
+    return {"data_ultimo_pagamento": _max(PagamentoSQL.data), "data_proxima_cobranca": proxima}
+
+
+def sincronizar_vencimentos(s: Session, paciente_ids: list[int]) -> int:
+    stmt = (
+        update(PacienteSQL)
+        .where(PacienteSQL.id.in_(paciente_ids))
+        .values(**vencimentos_pagos(s))
+        .execution_options(synchronize_session=False)
+    )
+    return s.execute(stmt).rowcount
+
+
+class PagamentoRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    @staticmethod
+    def _filtrar(stmt, paciente_id: int | None, inicio: date | None, fim: date | None):
+        if paciente_id is not None:
+            stmt = stmt.where(PagamentoSQL.paciente_id == paciente_id)
+        if inicio is not None:
+            stmt = stmt.where(PagamentoSQL.data >= inicio)
+        if fim is not None:
+            stmt = stmt.where(PagamentoSQL.data <= fim)
+        return stmt
+
+    def referencias_existentes(self, referencias: Iterable[str]) -> set[str]:
+        refs = list(set(referencias))
+        if not refs:
+            return set()
+        with self._Session() as s:
+            return set(
+                s.execute(
+                    select(PagamentoSQL.referencia).where(PagamentoSQL.referencia.in_(refs))
+                ).scalars()
+            )
+
+    def registrar_lote(self, lancamentos: Sequence[Lancamento]) -> tuple[int, int]:
+        if not lancamentos:
+            return 0, 0
+        with self._Session() as s:
+            existentes = set(
+                s.execute(
+                    select(PacienteSQL.id)
+                    .where(PacienteSQL.id.in_({lanc.paciente_id for lanc in lancamentos}))
+                    .where(PacienteSQL.deleted_at.is_(None))
+                ).scalars()
+            )
+            refs = {lanc.referencia for lanc in lancamentos if lanc.referencia}
+            importadas = set(
+                s.execute(
+                    select(PagamentoSQL.referencia).where(PagamentoSQL.referencia.in_(refs))
+                ).scalars()
+            )
+            novos = []
+            for lanc in lancamentos:
+                if lanc.paciente_id not in existentes or lanc.referencia in importadas:
+                    continue
+                if lanc.referencia:
+                    importadas.add(lanc.referencia)
+                novos.append(lanc)
+            lancar(s, novos)
+            s.commit()
+            return len(novos), len(lancamentos) - len(novos)
+
+    def historico(
+        self,
+        paciente_id: int | None = None,
+        inicio: date | None = None,
+        fim: date | None = None,
+        limite: int = 50,
+        offset: int = 0,
+    ) -> tuple[list[Pagamento], int]:
+        with self._Session() as s:
+            total = s.execute(
+                self._filtrar(select(func.count(PagamentoSQL.id)), paciente_id, inicio, fim)
+            ).scalar_one()
+            stmt = self._filtrar(
+                select(
+                    PagamentoSQL.id,
+                    PagamentoSQL.paciente_id,
+                    PacienteSQL.nome,
+                    PagamentoSQL.data,
+                    PagamentoSQL.valor,
+                    PagamentoSQL.metodo,
+                    PagamentoSQL.periodo_inicio,
+                    PagamentoSQL.periodo_fim,
+                ).join(PacienteSQL, PacienteSQL.id == PagamentoSQL.paciente_id),
+                paciente_id,
+                inicio,
+                fim,
+            )
+            rows = s.execute(
+                stmt.order_by(PagamentoSQL.data.desc(), PagamentoSQL.id.desc())
+                .limit(limite)
+                .offset(offset)
+            ).all()
+            return [Pagamento(*r) for r in rows], total
+
+    def totais_mensais(
+        self, inicio: date, fim: date, paciente_id: int | None = None
+    ) -> list[TotalMensal]:
+        ano = extract("year", PagamentoSQL.data)
+        mes = extract("month", PagamentoSQL.data)
+        stmt = self._filtrar(
+            select(
+                ano,
+                mes,
+                func.count(PagamentoSQL.id),
+                func.coalesce(func.sum(PagamentoSQL.valor), 0),
+            ),
+            paciente_id,
+            inicio,
+            fim,
+        )
+        with self._Session() as s:
+            rows = s.execute(stmt.group_by(ano, mes).order_by(ano, mes)).all()
+            return [
+                TotalMensal(
+                    ano=int(a),
+                    mes=int(m),
+                    quantidade=q,
+                    total=Decimal(str(t)).quantize(Decimal("0.01")),
+                )
+                for a, m, q, t in rows
+            ]
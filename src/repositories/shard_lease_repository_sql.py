@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.db.db import SessionLocal
+from src.db.tables import ReminderShardLeaseSQL, agora_utc
+
+
+@dataclass(slots=True, frozen=True)
+class ResumoShard:
+    shard: int
+    total: int
+    status: str
+    enviados: int
+    sem_email: int
+    ja_enviados: int
+    falhas: int
+    concluido_em: datetime | None
+
+
+class ShardLeaseRepositorySQL:
+    def __init__(self):
+        self._Session = SessionLocal
+
+    @staticmethod
+    def _chave(dia: date, tipo: str, shard: int, total: int):
+        return (
+            (ReminderShardLeaseSQL.dia == dia)
+            & (ReminderShardLeaseSQL.tipo == tipo)
+            & (ReminderShardLeaseSQL.total == total)
+            & (ReminderShardLeaseSQL.shard == shard)
+        )
+
+    def adquirir(
+        self, dia: date, tipo: str, shard: int, total: int, token: str, lease: timedelta
+    ) -> bool:
+        agora = agora_utc()
+        with self._Session() as s:
+            s.add(
+                ReminderShardLeaseSQL(
+                    dia=dia,
+                    tipo=tipo,
+                    total=total,
+                    shard=shard,
+                    lease_token=token,
+                    lease_ate=agora + lease,
+                    iniciado_em=agora,
+                )
+            )
+            try:
+                s.commit()
+                return True
+            except IntegrityError:
+                s.rollback()
+
+            result = s.execute(
+                update(ReminderShardLeaseSQL)
+                .where(self._chave(dia, tipo, shard, total))
+                .where(
+                    or_(
+                        ReminderShardLeaseSQL.status != "executando",
+                        ReminderShardLeaseSQL.lease_ate < agora,
+                    )
+                )
+                .values(
+                    status="executando",
+                    lease_token=token,
+                    lease_ate=agora + lease,
+                    iniciado_em=agora,
+                    concluido_em=None,
+                )
+            )
+            s.commit()
+            return result.rowcount == 1
+
+    def renovar(
+        self, dia: date, tipo: str, shard: int, total: int, token: str, lease: timedelta
+    ) -> bool:
+        with self._Session() as s:
+            result = s.execute(
+                update(ReminderShardLeaseSQL)
+                .where(self._chave(dia, tipo, shard, total))
+                .where(ReminderShardLeaseSQL.lease_token == token)
+                .values(lease_ate=agora_utc() + lease)
+            )
+            s.commit()
+            return result.rowcount == 1
+
+    def liberar(self, dia: date, tipo: str, shard: int, total: int, token: str) -> bool:
+        with self._Session() as s:
+            result = s.execute(
+                update(ReminderShardLeaseSQL)
+                .where(self._chave(dia, tipo, shard, total))
+                .where(ReminderShardLeaseSQL.lease_token == token)
+                .values(status="falhou", lease_token=None, lease_ate=agora_utc())
+            )
+            s.commit()
+            return result.rowcount == 1
+
+    def concluir(
+        self, dia: date, tipo: str, shard: int, total: int, token: str, contagens: dict[str, int]
+    ) -> bool:
+        with self._Session() as s:
+            result = s.execute(
+                update(ReminderShardLeaseSQL)
+                .where(self._chave(dia, tipo, shard, total))
+                .where(ReminderShardLeaseSQL.lease_token == token)
+                .values(
+                    status="concluido",
+                    lease_token=None,
+                    lease_ate=None,
+                    concluido_em=agora_utc(),
+                    **{k: getattr(ReminderShardLeaseSQL, k) + v for k, v in contagens.items()},
+                )
+            )
+            s.commit()
+            return result.rowcount == 1
+
+    def listar(self, dia: date, tipo: str, total: int) -> list[ResumoShard]:
+        with self._Session() as s:
+            rows = s.execute(
+                select(ReminderShardLeaseSQL)
+                .where(
+                    ReminderShardLeaseSQL.dia == dia,
+                    ReminderShardLeaseSQL.tipo == tipo,
+                    ReminderShardLeaseSQL.total == total,
+                )
+                .order_by(ReminderShardLeaseSQL.shard)
+            ).scalars()
+            return [
+                ResumoShard(
+                    shard=r.shard,
+                    total=r.total,
+                    status=r.status,
+                    enviados=r.enviados,
+                    sem_email=r.sem_email,
+                    ja_enviados=r.ja_enviados,
+                    falhas=r.falhas,
+                    concluido_em=r.concluido_em,
+                )
+                for r in rows
+            ]
@@ -1,17 +1,49 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from dataclasses import replace
 from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from time import sleep
 
-from sqlalchemy import and_, or_
+import pandas as pd
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
 
 from src.db.db import SessionLocal
-from src.db.tables import AgendaSQL, FisioDisponSQL
-from src.models.paciente_model import Paciente
-from src.repositories.agenda_repository_sql import AgendaRepositorySQL
+from src.db.tables import AGENDA_SEM_SOBREPOSICAO, AgendaSQL, FisioDisponSQL, PacienteSQL
+from src.models.paciente_model import Paciente, ResultadoImportacao, VencimentoPaciente
+from src.models.pagamento_model import (
+    Conciliacao,
+    FaixaAtraso,
+    Lancamento,
+    Pagamento,
+    TotalMensal,
+)
+from src.repositories.agenda_repository_sql import (
+    AgendaRepositorySQL,
+    existe_conflito,
+    travar_agenda,
+)
+from src.repositories.cobranca_repository_sql import CobrancaRepositorySQL, ResumoRecalculo
+from src.repositories.financeiro_repository_sql import FinanceiroRepositorySQL
 from src.repositories.fisioterapeuta_repository_sql import FisioterapeutaRepositorySQL
+from src.repositories.outbox_repository_sql import enfileirar
 from src.repositories.paciente_aula_repository_sql import PacienteAulaRepositorySQL
 from src.repositories.paciente_repository_sql import PacienteRepositorySQL
+from src.repositories.pagamento_repository_sql import PagamentoRepositorySQL
+from src.utils.email_utils import conteudo_confirmacao_agenda
+from src.utils.export_utils import iter_agenda_ics
+from src.utils.extrato_utils import conciliar, ler_extrato
+from src.utils.importacao_utils import ler_planilha, validar_pacientes
+from src.utils.previsao_utils import previsao_recebimentos
+
+TENTATIVAS_AGENDA = 5
+
+
+def _conflito_agenda(exc: DBAPIError) -> bool:
+    if isinstance(exc, IntegrityError):
+        return AGENDA_SEM_SOBREPOSICAO in str(exc.orig)
+    return "locked" in str(exc.orig)
 
 
 class ClinicaService:
@@ -21,11 +53,17 @@ class ClinicaService:
         fisio_repo: FisioterapeutaRepositorySQL | None = None,
         aula_repo: PacienteAulaRepositorySQL | None = None,
         agenda_repo: AgendaRepositorySQL | None = None,
+        pag_repo: PagamentoRepositorySQL | None = None,
+        cob_repo: CobrancaRepositorySQL | None = None,
+        fin_repo: FinanceiroRepositorySQL | None = None,
     ):
         self._repo = repo or PacienteRepositorySQL()
         self._fisio_repo = fisio_repo or FisioterapeutaRepositorySQL()
         self._aula_repo = aula_repo or PacienteAulaRepositorySQL()
         self._agenda_repo = agenda_repo or AgendaRepositorySQL()
+        self._pag_repo = pag_repo or PagamentoRepositorySQL()
+        self._cob_repo = cob_repo or CobrancaRepositorySQL()
+        self._fin_repo = fin_repo or FinanceiroRepositorySQL()
 
     def cadastrar_paciente(
         self, nome: str, email: str, telefone: str, data_entrada: date
@@ -42,13 +80,8 @@ class ClinicaService:
         email: str,
         telefone: str,
         data_entrada: date,
-        aula_seg: bool | None = None,
-        aula_ter: bool | None = None,
-        aula_qua: bool | None = None,
-        aula_qui: bool | None = None,
-        aula_sex: bool | None = None,
-        aula_sab: bool | None = None,
-        aula_dom: bool | None = None,
+        dias_aula: int | None = None,
+        versao: int | None = None,
     ) -> tuple[Paciente, dict[str, tuple[object, object]]]:
         nome = (nome or "").strip()
         email = (email or "").strip()
@@ -59,24 +92,130 @@ class ClinicaService:
             email=email,
             telefone=telefone,
             data_entrada=data_entrada,
-            aula_seg=aula_seg,
-            aula_ter=aula_ter,
-            aula_qua=aula_qua,
-            aula_qui=aula_qui,
-            aula_sex=aula_sex,
-            aula_sab=aula_sab,
-            aula_dom=aula_dom,
+            dias_aula=dias_aula,
+            versao=versao,
         )
 
     def listar_pacientes(self, only_active: bool = True) -> Sequence[Paciente]:
         return self._repo.listar(only_active)
 
-    def registrar_pagamento(self, paciente_id: int | str, data_pag: date) -> Paciente:
+    def pacientes_com_aula(self, weekday: int) -> Sequence[Paciente]:
+        return self._repo.listar_com_aula(weekday)
+
+    def alunos_por_dia(self) -> list[int]:
+        return self._repo.contagem_por_dia()
+
+    def listar_pacientes_pagina(
+        self, only_active: bool = True, busca: str = "", pagina: int = 1, tamanho: int = 50
+    ) -> tuple[list[Paciente], int]:
+        pagina = max(int(pagina), 1)
+        return self._repo.listar_pagina(only_active, busca or "", tamanho, (pagina - 1) * tamanho)
+
+    def versao_pacientes(self) -> tuple[int, datetime | None]:
+        return self._repo.versao()
+
+    def nomes_pacientes(self, ids: set[int]) -> dict[int, str]:
+        return self._repo.nomes_por_ids(ids)
+
+    def registrar_pagamento(
+        self,
+        paciente_id: int | str,
+        data_pag: date,
+        valor: Decimal | None = None,
+        metodo: str | None = None,
+    ) -> Paciente:
         if isinstance(paciente_id, str):
             paciente_id = int(paciente_id.strip())
-        return self._repo.registrar_pagamento(paciente_id, data_pag)
+        return self._repo.registrar_pagamento(paciente_id, data_pag, valor, metodo)
+
+    def registrar_pagamentos(
+        self,
+        paciente_ids: list[int],
+        data_pag: date,
+        valor: Decimal | None = None,
+        metodo: str | None = None,
+    ) -> int:
+        return self._repo.registrar_pagamentos(
+            [int(pid) for pid in paciente_ids], data_pag, valor, metodo
+        )
+
+    def importar_pacientes(
+        self, nome_arquivo: str, dados: bytes, aplicar: bool = True
+    ) -> ResultadoImportacao:
+        validos, erros = validar_pacientes(ler_planilha(nome_arquivo, dados), date.today())
+        importados = self._repo.importar(validos) if aplicar and validos else 0
+        return ResultadoImportacao(validos=len(validos), importados=importados, erros=erros)
+
+    def conciliar_extrato(self, nome_arquivo: str, dados: bytes) -> list[Conciliacao]:
+        conciliacoes = conciliar(ler_extrato(nome_arquivo, dados), self._repo.identificacoes())
+        importadas = self._pag_repo.referencias_existentes(
+            c.extrato.referencia for c in conciliacoes
+        )
+        return [
+            replace(c, motivo="já importado") if c.extrato.referencia in importadas else c
+            for c in conciliacoes
+        ]
+
+    def registrar_extrato(
+        self, conciliacoes: Sequence[Conciliacao], metodo: str | None = None
+    ) -> tuple[int, int]:
+        return self._pag_repo.registrar_lote(
+            [
+                Lancamento(
+                    paciente_id=c.paciente_id,
+                    data=c.extrato.data,
+                    valor=c.extrato.valor,
+                    metodo=metodo,
+                    referencia=c.extrato.referencia,
+                )
+                for c in conciliacoes
+                if c.paciente_id is not None and c.motivo is None
+            ]
+        )
+
+    def historico_pagamentos(
+        self,
+        paciente_id: int | None = None,
+        inicio: date | None = None,
+        fim: date | None = None,
+        pagina: int = 1,
+        tamanho: int = 50,
+    ) -> tuple[list[Pagamento], int]:
+        pagina = max(int(pagina), 1)
+        return self._pag_repo.historico(paciente_id, inicio, fim, tamanho, (pagina - 1) * tamanho)
+
+    def totais_pagamentos_mensais(
+        self, inicio: date, fim: date, paciente_id: int | None = None
+    ) -> list[TotalMensal]:
+        return self._pag_repo.totais_mensais(inicio, fim, paciente_id)
+
+    def definir_plano_cobranca(
+        self,
+        paciente_ids: list[int] | None,
+        tipo: str,
+        dia: int | None = None,
+        sessoes: int | None = None,
+        valor: Decimal | None = None,
+    ) -> ResumoRecalculo:
+        ids = None if paciente_ids is None else [int(pid) for pid in paciente_ids]
+        return self._cob_repo.definir_plano(ids, tipo, dia, sessoes, valor)
+
+    def recalcular_cobrancas(
+        self, paciente_ids: list[int] | None = None, aplicar: bool = True
+    ) -> ResumoRecalculo:
+        return self._cob_repo.recalcular(paciente_ids, aplicar=aplicar)
+
+    def previsao_recebimentos(
+        self, meses: int = 12, frequencia: str = "mensal", inicio: date | None = None
+    ) -> pd.DataFrame:
+        return previsao_recebimentos(
+            self._fin_repo.base_previsao(), inicio or date.today(), meses, frequencia
+        )
+
+    def relatorio_atrasos(self, hoje: date | None = None) -> list[FaixaAtraso]:
+        return self._fin_repo.atrasos(hoje or date.today())
 
-    def vencimentos_proximos(self) -> Sequence[Paciente]:
+    def vencimentos_proximos(self) -> Sequence[VencimentoPaciente]:
         return self._repo.vencimentos_proximos()
 
     # --- Fisioterapeutas ---
@@ -86,6 +225,9 @@ class ClinicaService:
     def listar_fisioterapeutas(self):
         return self._fisio_repo.listar_ativos()
 
+    def disponibilidades_fisio(self, fisio_id: int) -> list[FisioDisponSQL]:
+        return self._fisio_repo.listar_disponibilidades(fisio_id)
+
     def definir_disponibilidades_fisio(self, fisio_id: int, slots: list[tuple[int, str, str]]):
         return self._fisio_repo.set_disponibilidades(fisio_id, slots)
 
@@ -117,9 +259,50 @@ class ClinicaService:
     def grade_do_fisio(self, fisio_id: int, data_inicio, data_fim):
         return self._agenda_repo.listar_grade(fisio_id, data_inicio, data_fim)
 
+    def versao_agenda(
+        self,
+        data_inicio: date,
+        data_fim: date,
+        fisio_id: int | None = None,
+        paciente_id: int | None = None,
+    ) -> tuple[int, int | None, int]:
+        return self._agenda_repo.versao(
+            data_inicio, data_fim, fisio_id=fisio_id, paciente_id=paciente_id
+        )
+
+    def alterar_status_sessao(self, agenda_id: int, status: str, versao: int) -> int:
+        return self._repetir_em_lock(self._agenda_repo.alterar_status, agenda_id, status, versao)
+
+    def agenda_ics(
+        self,
+        data_inicio: date,
+        data_fim: date,
+        fisio_id: int | None = None,
+        paciente_id: int | None = None,
+        nome_calendario: str = "Vitally",
+        tzid: str = "America/Sao_Paulo",
+    ) -> Iterator[bytes]:
+        eventos = self._agenda_repo.iter_eventos(
+            data_inicio, data_fim, fisio_id=fisio_id, paciente_id=paciente_id
+        )
+        return iter_agenda_ics(eventos, nome_calendario=nome_calendario, tzid=tzid)
+
     # ----------------- helpers privados -----------------
 
-    def _materializar_agenda_aulas(
+    def _materializar_agenda_aulas(self, **kwargs) -> None:
+        return self._repetir_em_lock(self._gravar_agenda_aulas, **kwargs)
+
+    @staticmethod
+    def _repetir_em_lock(fn, *args, **kwargs):
+        for tentativa in range(1, TENTATIVAS_AGENDA + 1):
+            try:
+                return fn(*args, **kwargs)
+            except (IntegrityError, OperationalError) as exc:
+                if tentativa == TENTATIVAS_AGENDA or not _conflito_agenda(exc):
+                    raise
+                sleep(0.05 * tentativa)
+
+    def _gravar_agenda_aulas(
         self,
         paciente_id: int,
         fisio_id: int,
@@ -129,12 +312,19 @@ class ClinicaService:
         data_inicio: date,
     ) -> None:
         with SessionLocal() as s:
+            travar_agenda(s)
             disp_map: dict[int, list[tuple[time, time]]] = {}
-            disp_rows = s.query(FisioDisponSQL).filter(FisioDisponSQL.fisio_id == fisio_id).all()
+            disp_rows = (
+                s.query(FisioDisponSQL)
+                .filter(FisioDisponSQL.fisio_id == fisio_id)
+                .filter(FisioDisponSQL.deleted_at.is_(None))
+                .all()
+            )
             for d in disp_rows:
                 disp_map.setdefault(d.weekday, []).append((d.hora_inicio, d.hora_fim))
 
             data_fim = data_inicio + timedelta(days=7 * semanas - 1)
+            novas: list[tuple[date, time]] = []
 
             for wd, hhmm in aulas:
                 primeira_data = self._next_weekday_on_or_after(data_inicio, wd)
@@ -146,7 +336,7 @@ class ClinicaService:
                     h_fim_dt = (datetime.combine(cur, h_ini) + dt_delta).time()
 
                     if self._hora_dentro_da_disponibilidade(disp_map.get(wd, []), h_ini, h_fim_dt):
-                        if not self._existe_conflito(s, fisio_id, cur, h_ini, h_fim_dt):
+                        if not existe_conflito(s, fisio_id, cur, h_ini, h_fim_dt):
                             s.add(
                                 AgendaSQL(
                                     fisio_id=fisio_id,
@@ -157,8 +347,21 @@ class ClinicaService:
                                     status="agendado",
                                 )
                             )
+                            novas.append((cur, h_ini))
                     cur += timedelta(days=7)
 
+            paciente = s.get(PacienteSQL, paciente_id)
+            if novas and paciente is not None and paciente.email:
+                assunto, texto, html = conteudo_confirmacao_agenda(paciente.nome, novas)
+                enfileirar(
+                    s,
+                    tipo="agenda_confirmacao",
+                    destinatario=paciente.email,
+                    assunto=assunto,
+                    texto=texto,
+                    html=html,
+                )
+
             s.commit()
 
     @staticmethod
@@ -177,34 +380,11 @@ class ClinicaService:
                 return True
         return False
 
-    @staticmethod
-    def _existe_conflito(
-        s,
-        fisio_id: int,
-        data_: date,
-        h_ini: time,
-        h_fim: time,
-    ) -> bool:
-        q = (
-            s.query(AgendaSQL)
-            .filter(
-                and_(
-                    AgendaSQL.fisio_id == fisio_id,
-                    AgendaSQL.data == data_,
-                    AgendaSQL.status != "cancelado",
-                    or_(
-                        and_(AgendaSQL.hora_inicio <= h_ini, AgendaSQL.hora_fim > h_ini),
-                        and_(AgendaSQL.hora_inicio < h_fim, AgendaSQL.hora_fim >= h_fim),
-                        and_(AgendaSQL.hora_inicio >= h_ini, AgendaSQL.hora_fim <= h_fim),
-                    ),
-                )
-            )
-            .first()
-        )
-        return q is not None
+    def deletar_paciente(self, paciente_id: int, versao: int | None = None) -> None:
+        self._repo.deletar(paciente_id, versao)
 
-    def deletar_paciente(self, paciente_id: int) -> None:
-        self._repo.deletar(paciente_id)
+    def inativar_paciente(self, paciente_id: int, versao: int | None = None) -> None:
+        self._repo.inativar(paciente_id, versao)
 
-    def inativar_paciente(self, paciente_id: int) -> None:
-        self._repo.inativar(paciente_id)
+    def inativar_pacientes(self, paciente_ids: list[int]) -> int:
+        return self._repo.inativar_varios([int(pid) for pid in paciente_ids])
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from src.db.tables import agora_utc
+from src.repositories.export_repository_sql import (
+    TABELAS_CDC,
+    ExportRepositorySQL,
+    StreamTabela,
+)
+from src.utils.export_utils import FORMATOS_TABELA, write_chunks
+
+logger = logging.getLogger("vitally_app")
+
+TABELAS = ("pacientes", "agenda", "pagamentos")
+
+
+@dataclass(slots=True, frozen=True)
+class ResumoExport:
+    tabela: str
+    formato: str
+    destino: str
+    linhas: int
+    segundos: float
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.linhas / self.segundos if self.segundos > 0 else float(self.linhas)
+
+
+class ExportService:
+    def __init__(self, repo: ExportRepositorySQL | None = None):
+        self._repo = repo or ExportRepositorySQL()
+
+    def _stream(
+        self,
+        tabela: str,
+        data_inicio: date | None,
+        data_fim: date | None,
+        chunk: int,
+    ) -> StreamTabela:
+        if tabela == "pacientes":
+            return self._repo.pacientes(chunk=chunk)
+        if data_inicio is None or data_fim is None:
+            raise ValueError(f"Exportação de '{tabela}' exige data_inicio e data_fim.")
+        if tabela == "agenda":
+            return self._repo.agenda(data_inicio, data_fim, chunk=chunk)
+        if tabela == "pagamentos":
+            return self._repo.pagamentos(data_inicio, data_fim, chunk=chunk)
+        raise ValueError(f"Tabela desconhecida: {tabela}. Opções: {', '.join(TABELAS)}")
+
+    def exportar(
+        self,
+        tabela: str,
+        destino: str | Path,
+        formato: str = "csv",
+        data_inicio: date | None = None,
+        data_fim: date | None = None,
+        chunk: int = 5000,
+    ) -> ResumoExport:
+        if formato not in FORMATOS_TABELA:
+            raise ValueError(f"Formato inválido: {formato}. Opções: {', '.join(FORMATOS_TABELA)}")
+
+        stream = self._stream(tabela, data_inicio, data_fim, chunk)
+        return self._escrever(tabela, formato, stream, destino)
+
+    def exportar_incremental(
+        self,
+        destino_dir: str | Path,
+        formato: str = "jsonl",
+        nome: str = "snapshot",
+        margem_segundos: int = 300,
+        chunk: int = 5000,
+    ) -> list[ResumoExport]:
+        if formato not in FORMATOS_TABELA:
+            raise ValueError(f"Formato inválido: {formato}. Opções: {', '.join(FORMATOS_TABELA)}")
+
+        desde = self._repo.obter_watermark(nome)
+        ate = agora_utc() - timedelta(seconds=margem_segundos)
+        if desde is not None and ate <= desde:
+            logger.info("Snapshot %s: nada novo desde %s", nome, desde)
+            return []
+
+        pasta = Path(destino_dir)
+        pasta.mkdir(parents=True, exist_ok=True)
+        sufixo = ate.strftime("%Y%m%dT%H%M%S")
+        logger.info("Snapshot %s: alterações em (%s, %s]", nome, desde, ate)
+
+        resumos = [
+            self._escrever(
+                tabela,
+                formato,
+                self._repo.alteracoes(tabela, desde, ate, chunk=chunk),
+                pasta / f"{nome}_{tabela}_{sufixo}.{formato}",
+            )
+            for tabela in TABELAS_CDC
+        ]
+
+        self._repo.salvar_watermark(nome, ate)
+        return resumos
+
+    def _escrever(
+        self, tabela: str, formato: str, stream: StreamTabela, destino: str | Path
+    ) -> ResumoExport:
+        inicio = time.perf_counter()
+        linhas = write_chunks(formato, stream.colunas, stream.chunks, destino)
+
+        resumo = ResumoExport(
+            tabela=tabela,
+            formato=formato,
+            destino=str(destino),
+            linhas=linhas,
+            segundos=time.perf_counter() - inicio,
+        )
+        logger.info(
+            "Export %s (%s) -> %s: %d linhas em %.2fs (%.0f linhas/s)",
+            resumo.tabela,
+            resumo.formato,
+            resumo.destino,
+            resumo.linhas,
+            resumo.segundos,
+            resumo.linhas_por_segundo,
+        )
+        return resumo
@@ -1,6 +1,9 @@
 import logging
 import re
 
+import numpy as np
+import pandas as pd
+
 logger = logging.getLogger("vitally_app")
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
@@ -21,12 +24,37 @@ def only_digits(s: str) -> str:
     return digits
 
 
+TELEFONE_TAMANHO_INVALIDO = "Telefone deve ter 10 (fixo) ou 11 (celular) dígitos."
+TELEFONE_DDD_INVALIDO = "DDD inválido."
+TELEFONE_CELULAR_INVALIDO = "Para celular (11 dígitos), o número deve começar com 9."
+
+
 def validate_br_phone(digits: str) -> tuple[bool, str | None]:
     d = only_digits(digits)
     if len(d) not in (10, 11):
-        return False, "Telefone deve ter 10 (fixo) ou 11 (celular) dígitos."
+        return False, TELEFONE_TAMANHO_INVALIDO
     if d[0] == "0" or d[1] == "0":
-        return False, "DDD inválido."
+        return False, TELEFONE_DDD_INVALIDO
     if len(d) == 11 and d[2] != "9":
-        return False, "Para celular (11 dígitos), o número deve começar com 9."
+        return False, TELEFONE_CELULAR_INVALIDO
     return True, None
+
+
+def emails_invalidos(emails: pd.Series) -> pd.Series:
+    preenchidos = emails.fillna("").astype(str).str.strip()
+    return preenchidos.ne("") & ~preenchidos.str.fullmatch(EMAIL_RE.pattern)
+
+
+def erros_telefone(telefones: pd.Series) -> pd.Series:
+    d = telefones.fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    n = d.str.len()
+    erros = np.select(
+        [
+            ~n.isin([10, 11]),
+            d.str[0].eq("0") | d.str[1].eq("0"),
+            n.eq(11) & d.str[2].ne("9"),
+        ],
+        [TELEFONE_TAMANHO_INVALIDO, TELEFONE_DDD_INVALIDO, TELEFONE_CELULAR_INVALIDO],
+        default="",
+    )
+    return pd.Series(erros, index=telefones.index)
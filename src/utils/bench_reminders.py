@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("bench_reminders")
+
+MODOS = ("sequencial", "pool", "concorrente")
+DOMINIOS = ("gmail.test", "outlook.test", "yahoo.test", "uol.test", "vitally.test")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compara os modos de envio de lembretes contra um SMTP local simulado, "
+            "usando um SQLite temporário ou o banco de --url."
+        )
+    )
+    parser.add_argument(
+        "--url",
+        help="Banco descartável (ex.: Postgres) em vez do SQLite temporário; deve estar vazio.",
+    )
+    parser.add_argument("--pacientes", type=int, default=500, help="Pacientes com vencimento.")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--workers", type=int, default=8, help="Workers do modo concorrente.")
+    parser.add_argument("--rate", type=float, default=0, help="Limite de msg/s (0 = sem limite).")
+    parser.add_argument("--por-dominio", type=int, default=0)
+    parser.add_argument("--latencia-ms", type=float, default=20, help="Atraso do SMTP por DATA.")
+    parser.add_argument(
+        "--latencia-conexao-ms", type=float, default=50, help="Atraso do SMTP ao conectar."
+    )
+    parser.add_argument("--falhas", type=float, default=0.0, help="Fração de envios rejeitados.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="Mantém o log por mensagem.")
+    return parser.parse_args(argv)
+
+
+def semear(engine, n: int, lote: int = 5000) -> None:
+    from src.db.tables import PacienteSQL
+
+    hoje = date.today()
+    with engine.begin() as conn:
+        for inicio in range(0, n, lote):
+            conn.execute(
+                PacienteSQL.__table__.insert(),
+                [
+                    {
+                        "nome": f"Paciente {i}",
+                        "email": f"p{i}@{DOMINIOS[i % len(DOMINIOS)]}",
+                        "ativo": True,
+                        "data_entrada": hoje,
+                        "data_proxima_cobranca": hoje + timedelta(days=i % 8),
+                    }
+                    for i in range(inicio, min(inicio + lote, n))
+                ],
+            )
+
+
+class TempoBanco:
+    def __init__(self, engine):
+        self.segundos = 0.0
+        self._lock = threading.Lock()
+        self._inicio = threading.local()
+        event.listen(engine, "before_cursor_execute", self._antes)
+        event.listen(engine, "after_cursor_execute", self._depois)
+
+    def _antes(self, *_args) -> None:
+        self._inicio.t = time.perf_counter()
+
+    def _depois(self, *_args) -> None:
+        decorrido = time.perf_counter() - self._inicio.t
+        with self._lock:
+            self.segundos += decorrido
+
+
+def limpar_envios(engine) -> None:
+    from src.db.tables import LembreteEnviadoSQL, ReminderShardLeaseSQL
+
+    with engine.begin() as conn:
+        conn.execute(LembreteEnviadoSQL.__table__.delete())
+        conn.execute(ReminderShardLeaseSQL.__table__.delete())
+
+
+def rodar_modo(
+    modo: str, args: argparse.Namespace, engine, sink, banco: TempoBanco
+) -> dict[str, object]:
+    from src.utils import send_reminders
+    from src.utils.smtp_utils import ResumoEntrega
+
+    limpar_envios(engine)
+    workers = args.workers if modo == "concorrente" else 1
+    os.environ["SMTP_MAX_PER_CONNECTION"] = "1" if modo == "sequencial" else "100"
+    argv = ["--workers", str(workers), "--rate", str(args.rate)]
+    argv += ["--por-dominio", str(args.por_dominio)]
+
+    conexoes_antes = sink.conexoes
+    resumos: list[ResumoEntrega] = []
+    banco.segundos = 0.0
+    inicio = time.perf_counter()
+    send_reminders.main(argv, resumos=resumos)
+    segundos = time.perf_counter() - inicio
+    segundos_banco = banco.segundos
+
+    primeiro = resumos[0] if resumos else None
+    recuperadas = 0
+    if primeiro and primeiro.falhas:
+        segunda: list[ResumoEntrega] = []
+        send_reminders.main(argv, resumos=segunda)
+        recuperadas = segunda[0].enviados if segunda else 0
+
+    return {
+        "modo": modo,
+        "workers": workers,
+        "enviadas": primeiro.enviados if primeiro else 0,
+        "falhas": primeiro.falhas if primeiro else 0,
+        "recuperadas": recuperadas,
+        "conexoes": sink.conexoes - conexoes_antes,
+        "segundos": segundos,
+        "msg_s": (primeiro.enviados / segundos) if primeiro and segundos else 0.0,
+        "p50_ms": primeiro.percentil(50) * 1000 if primeiro else 0.0,
+        "p99_ms": primeiro.percentil(99) * 1000 if primeiro else 0.0,
+        "bd_ms": (
+            segundos_banco / primeiro.enviados * 1000 if primeiro and primeiro.enviados else 0.0
+        ),
+        "bd_pct": segundos_banco / (segundos * workers) * 100 if segundos else 0.0,
+    }
+
+
+def preparar_banco(engine, externo: bool) -> None:
+    from src.db.db import Base
+    from src.db.tables import PacienteSQL
+
+    Base.metadata.create_all(engine)
+    if externo:
+        with engine.connect() as conn:
+            if conn.execute(select(func.count()).select_from(PacienteSQL)).scalar():
+                raise RuntimeError(
+                    "O banco de --url precisa estar vazio: o benchmark o semeia e limpa."
+                )
+
+
+def apagar_semeadura(engine) -> None:
+    from src.db.tables import PacienteSQL
+
+    limpar_envios(engine)
+    with engine.begin() as conn:
+        conn.execute(PacienteSQL.__table__.delete())
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if "src.db.db" in sys.modules:
+        raise RuntimeError("O benchmark precisa rodar em um processo próprio.")
+
+    diretorio: AbstractContextManager[str | None] = nullcontext(None)
+    if not args.url:
+        diretorio = tempfile.TemporaryDirectory(prefix="vitally-bench-")
+    with diretorio as tmp:
+        os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp}/bench.sqlite3"
+
+        from src.db import tables  # noqa: F401
+        from src.db.db import engine
+        from src.utils.smtp_sink import SmtpSink
+
+        if not args.verbose:
+            logging.getLogger("send_reminders").setLevel(logging.WARNING)
+            logging.getLogger("smtp_sink").setLevel(logging.WARNING)
+
+        preparar_banco(engine, externo=bool(args.url))
+        semear(engine, args.pacientes)
+        banco = TempoBanco(engine)
+        log.info(
+            "Base %s semeada com %d pacientes; SMTP com %.0fms por mensagem, "
+            "%.0fms por conexão e %.1f%% de falhas",
+            engine.dialect.name,
+            args.pacientes,
+            args.latencia_ms,
+            args.latencia_conexao_ms,
+            args.falhas * 100,
+        )
+
+        resultados = []
+        with SmtpSink(
+            latencia=args.latencia_ms / 1000,
+            latencia_conexao=args.latencia_conexao_ms / 1000,
+            taxa_falha=args.falhas,
+            guardar=False,
+            seed=args.seed,
+        ) as sink:
+            os.environ.update(
+                SMTP_HOST=sink.host,
+                SMTP_PORT=str(sink.port),
+                SMTP_FROM="bench@vitally.test",
+                SMTP_SECURITY="nenhuma",
+            )
+            os.environ.pop("SMTP_USER", None)
+            os.environ.pop("SMTP_PASS", None)
+
+            for modo in args.modos:
+                r = rodar_modo(modo, args, engine, sink, banco)
+                resultados.append(r)
+                log.info(
+                    "%-12s workers=%-3d enviadas=%-6d falhas=%-5d recuperadas=%-5d "
+                    "conexões=%-5d %7.2fs %8.1f msg/s  p50=%7.1fms  p99=%7.1fms  "
+                    "bd/msg=%6.1fms (%4.1f%% do tempo dos workers)",
+                    r["modo"],
+                    r["workers"],
+                    r["enviadas"],
+                    r["falhas"],
+                    r["recuperadas"],
+                    r["conexoes"],
+                    r["segundos"],
+                    r["msg_s"],
+                    r["p50_ms"],
+                    r["p99_ms"],
+                    r["bd_ms"],
+                    r["bd_pct"],
+                )
+
+        if engine.dialect.name == "sqlite" and "concorrente" in args.modos and args.workers > 1:
+            log.warning(
+                "SQLite aceita um escritor por vez: bd/msg inclui a espera pelo lock de escrita "
+                "entre workers. Para comparar workers sem esse gargalo, use --url com um Postgres."
+            )
+        if args.url:
+            apagar_semeadura(engine)
+        engine.dispose()
+
+    return 0 if all(r["enviadas"] or r["falhas"] for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+from datetime import date
+
+import numpy as np
+
+PLANOS = ("dias_30", "mensal", "pacote")
+PLANO_PADRAO = "dias_30"
+DIAS_CICLO = 30
+
+
+def dia_do_mes(meses: np.ndarray, dias: np.ndarray) -> np.ndarray:
+    meses = np.asarray(meses, dtype="datetime64[M]")
+    inicio_mes = meses.astype("datetime64[D]")
+    dias_no_mes = ((meses + 1).astype("datetime64[D]") - inicio_mes).astype("int64")
+    dia = np.nan_to_num(np.asarray(dias, dtype="float64"), nan=1.0).astype("int64")
+    return inicio_mes + (np.clip(dia, 1, dias_no_mes) - 1).astype("timedelta64[D]")
+
+
+def proximas_cobrancas(
+    tipos: np.ndarray,
+    dias: np.ndarray,
+    bases: np.ndarray,
+    sessao_limite: np.ndarray | None = None,
+) -> np.ndarray:
+    tipos = np.asarray(tipos, dtype=object)
+    bases = np.asarray(bases, dtype="datetime64[D]")
+    ciclo = bases + np.timedelta64(DIAS_CICLO, "D")
+
+    mensal = dia_do_mes(bases.astype("datetime64[M]") + 1, dias)
+
+    if sessao_limite is None:
+        pacote = ciclo
+    else:
+        sessao_limite = np.asarray(sessao_limite, dtype="datetime64[D]")
+        pacote = np.where(np.isnat(sessao_limite), ciclo, sessao_limite)
+
+    return np.select([tipos == "mensal", tipos == "pacote"], [mensal, pacote], ciclo)
+
+
+def proxima_cobranca(tipo: str | None, dia: int | None, base: date | None) -> date | None:
+    if base is None:
+        return None
+    resultado = proximas_cobrancas(
+        np.array([tipo or PLANO_PADRAO], dtype=object),
+        np.array([np.nan if dia is None else dia]),
+        np.array([base], dtype="datetime64[D]"),
+    )[0]
+    return resultado.astype(date)
+
+
+def validar_plano(tipo: str, dia: int | None, sessoes: int | None) -> None:
+    if tipo not in PLANOS:
+        raise ValueError(f"Plano inválido: {tipo}. Opções: {', '.join(PLANOS)}")
+    if tipo == "mensal" and not (dia and 1 <= dia <= 31):
+        raise ValueError("Plano mensal exige dia de cobrança entre 1 e 31.")
+    if tipo == "pacote" and not (sessoes and sessoes >= 1):
+        raise ValueError("Plano por pacote exige a quantidade de sessões.")
@@ -0,0 +1,139 @@
+from collections.abc import Iterable
+from datetime import date, time
+from email.message import EmailMessage
+from html import escape
+
+DIAS_SEMANA = ["segunda", "terça", "quarta", "quinta", "sexta", "sábado", "domingo"]
+
+
+def montar_mensagem(
+    sender: str, to_email: str, assunto: str, texto: str, html: str | None = None
+) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = assunto
+    msg["From"] = sender
+    msg["To"] = to_email
+    msg.set_content(texto)
+    if html:
+        msg.add_alternative(html, subtype="html")
+    return msg
+
+
+def conteudo_lembrete_pagamento(nome: str | None, vencimento: date) -> tuple[str, str, str]:
+    assunto = "Lembrete de pagamento - Vitally"
+    nome = nome or "Paciente"
+    venc_br = vencimento.strftime("%d/%m/%Y")
+
+    texto = (
+        f"Olá, {nome}!\n\n"
+        f"Este é um lembrete de pagamento. Sua próxima cobrança está prevista para {venc_br}.\n"
+        f"Se já realizou o pagamento, desconsidere este e-mail.\n\n"
+        f"Abraços,\nEquipe Vitally"
+    )
+
+    html = f"""
+    <html>
+      <body style='font-family: Arial, sans-serif; line-height:1.5;'>
+        <p>Olá, <strong>{nome}</strong>!</p>
+        <p>Este é um lembrete de pagamento. Sua <strong>próxima cobrança</strong> está prevista para
+           <strong>{venc_br}</strong>.</p>
+        <p>Se já realizou o pagamento, por favor desconsidere este e-mail.</p>
+        <p>Abraços,<br/>Equipe Vitally</p>
+      </body>
+    </html>
+    """
+    return assunto, texto, html
+
+
+def conteudo_confirmacao_agenda(
+    nome: str | None, sessoes: Iterable[tuple[date, time]]
+) -> tuple[str, str, str]:
+    assunto = "Sessões agendadas - Vitally"
+    nome = nome or "Paciente"
+    linhas = [
+        f"{DIAS_SEMANA[d.weekday()]}, {d.strftime('%d/%m/%Y')} às {h.strftime('%H:%M')}"
+        for d, h in sorted(sessoes)
+    ]
+
+    texto = (
+        f"Olá, {nome}!\n\n"
+        "Suas sessões foram agendadas:\n"
+        + "".join(f"- {linha}\n" for linha in linhas)
+        + "\nEm caso de dúvidas, fale com a clínica.\n\nAbraços,\nEquipe Vitally"
+    )
+
+    itens = "".join(f"<li>{escape(linha)}</li>" for linha in linhas)
+    html = f"""
+    <html>
+      <body style='font-family: Arial, sans-serif; line-height:1.5;'>
+        <p>Olá, <strong>{escape(nome)}</strong>!</p>
+        <p>Suas sessões foram agendadas:</p>
+        <ul>{itens}</ul>
+        <p>Em caso de dúvidas, fale com a clínica.</p>
+        <p>Abraços,<br/>Equipe Vitally</p>
+      </body>
+    </html>
+    """
+    return assunto, texto, html
+
+
+def conteudo_alteracao_agenda(
+    nome: str | None, dia: date, hora: time, status: str
+) -> tuple[str, str, str]:
+    nome = nome or "Paciente"
+    cancelada = status == "cancelado"
+    assunto = f"Sessão {'cancelada' if cancelada else 'confirmada'} - Vitally"
+    quando = f"{DIAS_SEMANA[dia.weekday()]}, {dia.strftime('%d/%m/%Y')} às {hora.strftime('%H:%M')}"
+    acao = "foi cancelada" if cancelada else "está confirmada novamente"
+
+    texto = (
+        f"Olá, {nome}!\n\n"
+        f"Sua sessão de {quando} {acao}.\n\n"
+        "Em caso de dúvidas, fale com a clínica.\n\nAbraços,\nEquipe Vitally"
+    )
+
+    html = f"""
+    <html>
+      <body style='font-family: Arial, sans-serif; line-height:1.5;'>
+        <p>Olá, <strong>{escape(nome)}</strong>!</p>
+        <p>Sua sessão de <strong>{escape(quando)}</strong> {acao}.</p>
+        <p>Em caso de dúvidas, fale com a clínica.</p>
+        <p>Abraços,<br/>Equipe Vitally</p>
+      </body>
+    </html>
+    """
+    return assunto, texto, html
+
+
+def conteudo_lembrete_sessao(
+    nome: str | None, dia: date, horarios: Iterable[tuple[time, time, str]]
+) -> tuple[str, str, str]:
+    nome = nome or "Paciente"
+    dia_br = dia.strftime("%d/%m/%Y")
+    assunto = f"Lembrete: sessão amanhã ({dia_br}) - Vitally"
+    linhas = [
+        f"{ini.strftime('%H:%M')} às {fim.strftime('%H:%M')} com {fisio}"
+        for ini, fim, fisio in horarios
+    ]
+
+    texto = (
+        f"Olá, {nome}!\n\n"
+        f"Lembrete das suas sessões de {DIAS_SEMANA[dia.weekday()]}, {dia_br}:\n"
+        + "".join(f"- {linha}\n" for linha in linhas)
+        + "\nSe não puder comparecer, avise a clínica com antecedência.\n\n"
+        "Abraços,\nEquipe Vitally"
+    )
+
+    itens = "".join(f"<li>{escape(linha)}</li>" for linha in linhas)
+    html = f"""
+    <html>
+      <body style='font-family: Arial, sans-serif; line-height:1.5;'>
+        <p>Olá, <strong>{escape(nome)}</strong>!</p>
+        <p>Lembrete das suas sessões de <strong>{DIAS_SEMANA[dia.weekday()]}, {dia_br}</strong>:</p>
+        <ul>{itens}</ul>
+        <p>Se não puder comparecer, avise a clínica com antecedência.</p>
+        <p>Abraços,<br/>Equipe Vitally</p>
+      </body>
+    </html>
+    """
+    return assunto, texto, html
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.clinica_service import ClinicaService  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("export_ics")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    hoje = date.today()
+    parser = argparse.ArgumentParser(description="Exporta a agenda em formato iCalendar (.ics).")
+    alvo = parser.add_mutually_exclusive_group()
+    alvo.add_argument("--paciente", type=int, help="Somente sessões deste paciente.")
+    alvo.add_argument("--fisio", type=int, help="Somente sessões deste fisioterapeuta.")
+    parser.add_argument("--inicio", type=date.fromisoformat, default=hoje)
+    parser.add_argument("--fim", type=date.fromisoformat, default=hoje + timedelta(days=365))
+    parser.add_argument("--tz", default="America/Sao_Paulo")
+    parser.add_argument("--saida", default="-", help="Arquivo de saída ('-' para stdout).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.fim < args.inicio:
+        log.critical("--fim (%s) anterior a --inicio (%s).", args.fim, args.inicio)
+        return 2
+
+    if args.paciente is not None:
+        nome = f"Vitally - paciente {args.paciente}"
+    elif args.fisio is not None:
+        nome = f"Vitally - fisioterapeuta {args.fisio}"
+    else:
+        nome = "Vitally - clínica"
+
+    service = ClinicaService()
+    chunks = service.agenda_ics(
+        args.inicio,
+        args.fim,
+        fisio_id=args.fisio,
+        paciente_id=args.paciente,
+        nome_calendario=nome,
+        tzid=args.tz,
+    )
+
+    inicio = time.perf_counter()
+    total_bytes = 0
+    out = sys.stdout.buffer if args.saida == "-" else open(args.saida, "wb")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            total_bytes += len(chunk)
+    except Exception as e:
+        log.critical("Falha ao exportar agenda: %s", e, exc_info=True)
+        return 3
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+    log.info(
+        "ICS exportado (%s a %s): %d bytes em %.2fs",
+        args.inicio,
+        args.fim,
+        total_bytes,
+        time.perf_counter() - inicio,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.export_service import ExportService  # noqa: E402
+from src.utils.export_utils import FORMATOS_TABELA  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("export_snapshot")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Exporta somente as linhas alteradas desde o último snapshot bem-sucedido."
+    )
+    parser.add_argument("--destino", default="snapshots", help="Diretório de saída.")
+    parser.add_argument("--formato", choices=FORMATOS_TABELA, default="jsonl")
+    parser.add_argument("--nome", default="snapshot", help="Nome do watermark (por consumidor).")
+    parser.add_argument(
+        "--margem",
+        type=int,
+        default=300,
+        help="Segundos de atraso em relação a agora, para não perder transações em curso.",
+    )
+    parser.add_argument("--chunk", type=int, default=5000)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    try:
+        resumos = ExportService().exportar_incremental(
+            args.destino,
+            formato=args.formato,
+            nome=args.nome,
+            margem_segundos=args.margem,
+            chunk=args.chunk,
+        )
+    except Exception as e:
+        log.critical("Falha no snapshot incremental: %s", e, exc_info=True)
+        return 3
+
+    total = sum(r.linhas for r in resumos)
+    log.info(
+        "Resumo: %s",
+        ", ".join(f"{r.tabela}={r.linhas}" for r in resumos) or "sem alterações",
+    )
+    log.info("Total de linhas alteradas: %d", total)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
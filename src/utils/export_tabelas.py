@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.export_service import TABELAS, ExportService  # noqa: E402
+from src.utils.export_utils import FORMATOS_TABELA  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("export_tabelas")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Exporta pacientes, agenda ou pagamentos em CSV/Parquet, em streaming."
+    )
+    parser.add_argument("tabela", choices=TABELAS)
+    parser.add_argument("--formato", choices=FORMATOS_TABELA, default="csv")
+    parser.add_argument("--inicio", type=date.fromisoformat)
+    parser.add_argument("--fim", type=date.fromisoformat)
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: <tabela>.<formato>).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    destino = args.saida or f"{args.tabela}.{args.formato}"
+
+    try:
+        resumo = ExportService().exportar(
+            args.tabela,
+            destino,
+            formato=args.formato,
+            data_inicio=args.inicio,
+            data_fim=args.fim,
+            chunk=args.chunk,
+        )
+    except ValueError as e:
+        log.critical("%s", e)
+        return 2
+    except Exception as e:
+        log.critical("Falha ao exportar %s: %s", args.tabela, e, exc_info=True)
+        return 3
+
+    log.info(
+        "Resumo: tabela=%s linhas=%s tempo=%.2fs vazão=%.0f linhas/s arquivo=%s",
+        resumo.tabela,
+        resumo.linhas,
+        resumo.segundos,
+        resumo.linhas_por_segundo,
+        resumo.destino,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import csv
+import importlib.util
+import io
+import json
+from collections.abc import Iterable, Iterator
+from datetime import UTC, date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, BinaryIO, TextIO
+
+from sqlalchemy import types as sqltypes
+
+from src.models.paciente_model import Paciente
+
+DIAS = ("Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo")
+
+ICS_STATUS = {"agendado": "CONFIRMED", "cancelado": "CANCELLED"}
+ICS_MAX_OCTETS = 75
+
+
+def build_classes_csv(paciente: Paciente) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(["PacienteId", "Paciente", "Dia", "Tem Aula"])
+    for wd, nome_dia in enumerate(DIAS):
+        tem_aula = "Sim" if paciente.tem_aula(wd) else "Não"
+        writer.writerow([paciente.id, paciente.nome, nome_dia, tem_aula])
+    return buf.getvalue().encode("utf-8")
+
+
+def build_times_csv(fisioterapeuta, disponibilidades) -> bytes:
+    janelas: dict[int, list[str]] = {}
+    for d in disponibilidades:
+        janelas.setdefault(d.weekday, []).append(f"{d.hora_inicio:%H:%M}-{d.hora_fim:%H:%M}")
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(["FisioterapeutaID", "Fisioterapeuta", "Dia", "Horários"])
+    for wd, nome_dia in enumerate(DIAS):
+        horarios = ", ".join(janelas.get(wd, [])) or "Sem horário"
+        writer.writerow([fisioterapeuta.id, fisioterapeuta.nome, nome_dia, horarios])
+    return buf.getvalue().encode("utf-8")
+
+
+def _ics_escape(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(linha: str) -> str:
+    if len(linha.encode("utf-8")) <= ICS_MAX_OCTETS:
+        return linha
+    partes: list[str] = []
+    atual, tamanho = "", 0
+    for ch in linha:
+        n = len(ch.encode("utf-8"))
+        if tamanho + n > ICS_MAX_OCTETS:
+            partes.append(atual)
+            atual, tamanho = " ", 1
+        atual += ch
+        tamanho += n
+    partes.append(atual)
+    return "\r\n".join(partes)
+
+
+def _vevent_lines(ev, tzid: str, dtstamp: str) -> list[str]:
+    def fmt(d: date, t: time) -> str:
+        return datetime.combine(d, t).strftime("%Y%m%dT%H%M%S")
+
+    paciente = ev.paciente_nome or "Livre"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:agenda-{ev.id}@vitally",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART;TZID={tzid}:{fmt(ev.data, ev.hora_inicio)}",
+        f"DTEND;TZID={tzid}:{fmt(ev.data, ev.hora_fim)}",
+        f"SUMMARY:{_ics_escape(f'Aula de Pilates - {paciente}')}",
+        f"DESCRIPTION:{_ics_escape(f'Fisioterapeuta: {ev.fisio_nome}')}",
+        f"STATUS:{ICS_STATUS.get(ev.status, 'TENTATIVE')}",
+        "END:VEVENT",
+    ]
+    return [_ics_fold(line) for line in lines]
+
+
+def iter_agenda_ics(
+    eventos: Iterable,
+    *,
+    nome_calendario: str,
+    tzid: str = "America/Sao_Paulo",
+    chunk_size: int = 200,
+    dtstamp: datetime | None = None,
+) -> Iterator[bytes]:
+    stamp = (dtstamp or datetime.now(UTC)).strftime("%Y%m%dT%H%M%SZ")
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Vitally//Agenda//PT-BR",
+        "CALSCALE:GREGORIAN",
+        _ics_fold(f"X-WR-CALNAME:{_ics_escape(nome_calendario)}"),
+        f"X-WR-TIMEZONE:{tzid}",
+        "BEGIN:VTIMEZONE",
+        f"TZID:{tzid}",
+        "END:VTIMEZONE",
+    ]
+    yield ("\r\n".join(header) + "\r\n").encode("utf-8")
+
+    buf: list[str] = []
+    pendentes = 0
+    for ev in eventos:
+        buf.extend(_vevent_lines(ev, tzid, stamp))
+        pendentes += 1
+        if pendentes >= chunk_size:
+            yield ("\r\n".join(buf) + "\r\n").encode("utf-8")
+            buf.clear()
+            pendentes = 0
+    if buf:
+        yield ("\r\n".join(buf) + "\r\n").encode("utf-8")
+
+    yield b"END:VCALENDAR\r\n"
+
+
+FORMATOS_TABELA = (
+    ("csv", "parquet", "jsonl") if importlib.util.find_spec("pyarrow") else ("csv", "jsonl")
+)
+
+
+def write_csv_chunks(
+    colunas: list[tuple[str, Any]], chunks: Iterable[list[tuple]], out: TextIO
+) -> int:
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([nome for nome, _ in colunas])
+    total = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        total += len(chunk)
+    return total
+
+
+def _arrow_type(pa, sql_type):
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Numeric):
+        if sql_type.asdecimal:
+            return pa.decimal128(sql_type.precision or 18, sql_type.scale or 2)
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    if isinstance(sql_type, sqltypes.Time):
+        return pa.time64("us")
+    return pa.string()
+
+
+def write_parquet_chunks(
+    colunas: list[tuple[str, Any]], chunks: Iterable[list[tuple]], out: str | BinaryIO
+) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Exportação em Parquet requer o pacote 'pyarrow'.") from exc
+
+    schema = pa.schema([(nome, _arrow_type(pa, tipo)) for nome, tipo in colunas])
+    total = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            cols = list(zip(*chunk, strict=True))
+            writer.write_batch(
+                pa.RecordBatch.from_arrays(
+                    [pa.array(col, type=f.type) for col, f in zip(cols, schema, strict=True)],
+                    schema=schema,
+                )
+            )
+            total += len(chunk)
+    return total
+
+
+def _json_default(valor):
+    if isinstance(valor, date | time):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def write_jsonl_chunks(
+    colunas: list[tuple[str, Any]], chunks: Iterable[list[tuple]], out: TextIO
+) -> int:
+    nomes = [nome for nome, _ in colunas]
+    total = 0
+    for chunk in chunks:
+        out.writelines(
+            json.dumps(dict(zip(nomes, row, strict=True)), default=_json_default) + "\n"
+            for row in chunk
+        )
+        total += len(chunk)
+    return total
+
+
+def write_chunks(
+    formato: str,
+    colunas: list[tuple[str, Any]],
+    chunks: Iterable[list[tuple]],
+    destino: str | Path,
+) -> int:
+    if formato == "parquet":
+        return write_parquet_chunks(colunas, chunks, str(destino))
+    writer = {"csv": write_csv_chunks, "jsonl": write_jsonl_chunks}.get(formato)
+    if writer is None:
+        raise ValueError(f"Formato inválido: {formato}. Opções: {', '.join(FORMATOS_TABELA)}")
+    with open(destino, "w", newline="", encoding="utf-8") as out:
+        return writer(colunas, chunks, out)
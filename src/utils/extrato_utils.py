@@ -0,0 +1,208 @@
+import csv
+import hashlib
+import io
+import re
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from src.models.paciente_model import PacienteIdentificacao
+from src.models.pagamento_model import Conciliacao, LinhaExtrato
+from src.utils.add_utils import only_digits
+
+COLUNAS_CSV = {
+    "data": ("data", "date", "dt", "data_pagamento", "data lancamento", "data lançamento"),
+    "valor": ("valor", "value", "amount", "credito", "crédito"),
+    "descricao": ("descricao", "descrição", "historico", "histórico", "nome", "memo", "pagador"),
+    "paciente_id": ("paciente_id", "id", "id_paciente"),
+    "telefone": ("telefone", "celular", "phone"),
+}
+FORMATOS_DATA = ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y")
+OFX_TRANSACAO = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+OFX_CAMPO = re.compile(r"<(\w+)>([^<\r\n]*)")
+MAX_PALAVRAS_NOME = 8
+
+
+def normalizar_nome(texto: str | None) -> str:
+    sem_acento = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", sem_acento.lower()).split())
+
+
+def normalizar_telefone(texto: str | None) -> str:
+    digitos = only_digits(texto or "")
+    if len(digitos) > 11 and digitos.startswith("55"):
+        digitos = digitos[2:]
+    return digitos if len(digitos) >= 10 else ""
+
+
+def _valor(texto: str) -> Decimal:
+    t = re.sub(r"[^\d,.\-]", "", texto or "")
+    if "," in t:
+        t = t.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(t)
+    except InvalidOperation as e:
+        raise ValueError(f"valor inválido: {texto!r}") from e
+
+
+def _data(texto: str) -> date:
+    texto = (texto or "").strip()
+    for fmt in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {texto!r}")
+
+
+def _referencia(prefixo: str, *partes: object) -> str:
+    bruto = "|".join(str(p) for p in partes)
+    return f"{prefixo}:{hashlib.sha1(bruto.encode()).hexdigest()[:20]}"
+
+
+def ler_csv(conteudo: str) -> list[LinhaExtrato]:
+    amostra = conteudo[:4096]
+    dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t") if amostra.strip() else csv.excel
+    leitor = csv.reader(io.StringIO(conteudo), dialeto)
+    cabecalho = [normalizar_nome(c).replace(" ", "_") for c in next(leitor, [])]
+    indices = {}
+    for campo, nomes in COLUNAS_CSV.items():
+        aceitos = {normalizar_nome(n).replace(" ", "_") for n in nomes}
+        indices[campo] = next((i for i, c in enumerate(cabecalho) if c in aceitos), None)
+    if indices["data"] is None or indices["valor"] is None:
+        raise ValueError("CSV precisa das colunas 'data' e 'valor'.")
+
+    linhas = []
+    vistos: Counter[tuple] = Counter()
+    for n, row in enumerate(leitor, start=2):
+        if not any(c.strip() for c in row):
+            continue
+        valores = {
+            nome: row[i].strip() if i is not None and i < len(row) else ""
+            for nome, i in indices.items()
+        }
+        try:
+            data = _data(valores["data"])
+            valor = _valor(valores["valor"])
+        except ValueError as e:
+            raise ValueError(f"Linha {n}: {e}") from e
+        pid = valores["paciente_id"]
+        chave = (data, valor, valores["descricao"], pid, valores["telefone"])
+        vistos[chave] += 1
+        linhas.append(
+            LinhaExtrato(
+                linha=n,
+                data=data,
+                valor=valor,
+                descricao=valores["descricao"],
+                referencia=_referencia("csv", *chave, vistos[chave]),
+                paciente_id=int(pid) if pid.isdigit() else None,
+                telefone=valores["telefone"] or None,
+            )
+        )
+    return linhas
+
+
+def ler_ofx(conteudo: str) -> list[LinhaExtrato]:
+    linhas = []
+    vistos: Counter[tuple] = Counter()
+    for n, bloco in enumerate(OFX_TRANSACAO.findall(conteudo), start=1):
+        campos = {k.upper(): v.strip() for k, v in OFX_CAMPO.findall(bloco)}
+        try:
+            data = datetime.strptime(campos.get("DTPOSTED", "")[:8], "%Y%m%d").date()
+            valor = _valor(campos.get("TRNAMT", ""))
+        except ValueError as e:
+            raise ValueError(f"Transação {n}: {e}") from e
+        descricao = " ".join(v for v in (campos.get("NAME"), campos.get("MEMO")) if v)
+        fitid = campos.get("FITID")
+        if fitid:
+            referencia = f"ofx:{fitid}"
+        else:
+            chave = (data, valor, descricao)
+            vistos[chave] += 1
+            referencia = _referencia("ofx", *chave, vistos[chave])
+        linhas.append(
+            LinhaExtrato(
+                linha=n,
+                data=data,
+                valor=valor,
+                descricao=descricao,
+                referencia=referencia,
+            )
+        )
+    return linhas
+
+
+def ler_extrato(nome_arquivo: str, dados: bytes) -> list[LinhaExtrato]:
+    try:
+        conteudo = dados.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        conteudo = dados.decode("latin-1")
+    if nome_arquivo.lower().endswith(".ofx") or "<OFX>" in conteudo[:2048].upper():
+        linhas = ler_ofx(conteudo)
+    else:
+        linhas = ler_csv(conteudo)
+    return [linha for linha in linhas if linha.valor > 0]
+
+
+def _maior_nome_contido(
+    palavras: list[str], por_nome: dict[str, list[PacienteIdentificacao]]
+) -> list[PacienteIdentificacao]:
+    for tamanho in range(min(len(palavras), MAX_PALAVRAS_NOME), 0, -1):
+        achados = {
+            p.id: p
+            for i in range(len(palavras) - tamanho + 1)
+            for p in por_nome.get(" ".join(palavras[i : i + tamanho]), [])
+        }
+        if achados:
+            return list(achados.values())
+    return []
+
+
+def conciliar(
+    linhas: Iterable[LinhaExtrato], pacientes: Iterable[PacienteIdentificacao]
+) -> list[Conciliacao]:
+    por_id = {p.id: p for p in pacientes}
+    por_telefone: dict[str, list[PacienteIdentificacao]] = {}
+    por_nome: dict[str, list[PacienteIdentificacao]] = {}
+    for p in por_id.values():
+        if tel := normalizar_telefone(p.telefone):
+            por_telefone.setdefault(tel, []).append(p)
+        if nome := normalizar_nome(p.nome):
+            por_nome.setdefault(nome, []).append(p)
+
+    def _unico(candidatos, criterio, extrato):
+        if len(candidatos) == 1:
+            return Conciliacao(extrato, candidatos[0].id, candidatos[0].nome, criterio)
+        return Conciliacao(extrato, None, None, None, f"{criterio} ambíguo")
+
+    resultado = []
+    for extrato in linhas:
+        if extrato.paciente_id is not None:
+            achado = por_id.get(extrato.paciente_id)
+            resultado.append(
+                Conciliacao(extrato, achado.id, achado.nome, "id")
+                if achado
+                else Conciliacao(extrato, None, None, None, "id não encontrado")
+            )
+            continue
+
+        telefones = {normalizar_telefone(extrato.telefone)} | {
+            normalizar_telefone(t) for t in re.findall(r"[\d()+\-. ]{10,}", extrato.descricao)
+        }
+        candidatos = [p for t in telefones if t for p in por_telefone.get(t, [])]
+        if candidatos:
+            resultado.append(
+                _unico(list({p.id: p for p in candidatos}.values()), "telefone", extrato)
+            )
+            continue
+
+        candidatos = _maior_nome_contido(normalizar_nome(extrato.descricao).split(), por_nome)
+        if candidatos:
+            resultado.append(_unico(candidatos, "nome", extrato))
+            continue
+
+        resultado.append(Conciliacao(extrato, None, None, None, "sem correspondência"))
+    return resultado
@@ -0,0 +1,133 @@
+import importlib.util
+import io
+import re
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.models.paciente_model import ErroImportacao, NovoPaciente
+from src.utils.add_utils import emails_invalidos, erros_telefone
+from src.utils.extrato_utils import normalizar_nome
+
+COLUNAS_IMPORTACAO = {
+    "nome": ("nome", "paciente", "nome_completo"),
+    "email": ("email", "e_mail"),
+    "telefone": ("telefone", "celular", "fone", "whatsapp"),
+    "data_entrada": ("data_entrada", "entrada", "data"),
+    "aulas": ("aulas", "horarios", "horários"),
+}
+DIAS_AULA = {"seg": 0, "ter": 1, "qua": 2, "qui": 3, "sex": 4, "sab": 5, "dom": 6}
+AULA_RE = re.compile(r"^([a-z]{3})[a-z]*\s*(\d{1,2})\s*h\s*(\d{2})$")
+FORMATOS_PLANILHA = ("csv", "xlsx") if importlib.util.find_spec("openpyxl") else ("csv",)
+
+
+def ler_planilha(nome_arquivo: str, dados: bytes) -> pd.DataFrame:
+    extensao = nome_arquivo.lower().rsplit(".", 1)[-1]
+    if extensao not in FORMATOS_PLANILHA:
+        raise ValueError(
+            f"Formato não suportado: .{extensao}. Opções: {', '.join(FORMATOS_PLANILHA)}"
+        )
+    if extensao == "xlsx":
+        df = pd.read_excel(io.BytesIO(dados), dtype=str, engine="openpyxl")
+    else:
+        try:
+            texto = dados.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            texto = dados.decode("latin-1")
+        df = pd.read_csv(
+            io.StringIO(texto), sep=None, engine="python", dtype=str, keep_default_na=False
+        )
+
+    renomear: dict[str, str] = {}
+    for coluna in df.columns:
+        chave = normalizar_nome(str(coluna)).replace(" ", "_")
+        for campo, nomes in COLUNAS_IMPORTACAO.items():
+            if chave in {normalizar_nome(n).replace(" ", "_") for n in nomes}:
+                renomear.setdefault(coluna, campo)
+    df = df.rename(columns=renomear)
+    if "nome" not in df.columns:
+        raise ValueError("A planilha precisa da coluna 'nome'.")
+    for campo in COLUNAS_IMPORTACAO:
+        if campo not in df.columns:
+            df[campo] = ""
+    return df[list(COLUNAS_IMPORTACAO)].fillna("").astype(str).apply(lambda c: c.str.strip())
+
+
+def parse_aulas(texto: str) -> tuple[tuple[int, str], ...]:
+    aulas = []
+    for bruto in re.split(r"[;,|/]", texto):
+        item = normalizar_nome(bruto.replace(":", "h"))
+        if not item:
+            continue
+        m = AULA_RE.match(item)
+        if not m or m.group(1) not in DIAS_AULA:
+            raise ValueError(f"horário inválido: {bruto.strip()!r} (ex.: 'seg 08:00; qua 18:30')")
+        hh, mm = int(m.group(2)), int(m.group(3))
+        if hh > 23 or mm > 59:
+            raise ValueError(f"hora inválida: {bruto.strip()!r}")
+        aulas.append((DIAS_AULA[m.group(1)], f"{hh:02d}:{mm:02d}"))
+    return tuple(dict.fromkeys(aulas))
+
+
+def _datas(serie: pd.Series, hoje: date) -> pd.Series:
+    datas = pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+    datas = datas.fillna(pd.to_datetime(serie, format="%Y-%m-%d", errors="coerce"))
+    return datas.where(serie.ne(""), pd.Timestamp(hoje))
+
+
+def validar_pacientes(
+    df: pd.DataFrame, hoje: date
+) -> tuple[list[NovoPaciente], list[ErroImportacao]]:
+    linhas = np.arange(len(df)) + 2
+    emails = df["email"].str.lower()
+    telefones = df["telefone"].str.replace(r"\D", "", regex=True)
+    erros_tel = erros_telefone(telefones)
+    datas = _datas(df["data_entrada"], hoje)
+
+    aulas: list[tuple[tuple[int, str], ...]] = []
+    mensagens_aula: list[str] = []
+    for texto in df["aulas"]:
+        try:
+            aulas.append(parse_aulas(texto))
+            mensagens_aula.append("")
+        except ValueError as e:
+            aulas.append(())
+            mensagens_aula.append(str(e))
+    erros_aula = pd.Series(mensagens_aula, index=df.index, dtype=str)
+
+    regras = [
+        (df["nome"].eq(""), "nome", "Informe o nome."),
+        (emails_invalidos(emails), "email", "E-mail inválido."),
+        (
+            emails.ne("") & emails.duplicated(keep=False),
+            "email",
+            "E-mail repetido na planilha.",
+        ),
+        (telefones.ne("") & erros_tel.ne(""), "telefone", erros_tel),
+        (datas.isna(), "data_entrada", "Data inválida (use dd/mm/aaaa)."),
+        (datas > pd.Timestamp(hoje), "data_entrada", "Data de entrada não pode ser futura."),
+        (erros_aula.ne(""), "aulas", erros_aula),
+    ]
+
+    erros = []
+    com_erro = np.zeros(len(df), dtype=bool)
+    for mascara, campo, mensagem in regras:
+        mascara = mascara.to_numpy(dtype=bool)
+        com_erro |= mascara
+        for i in np.flatnonzero(mascara):
+            texto = mensagem if isinstance(mensagem, str) else mensagem.iloc[i]
+            erros.append(ErroImportacao(int(linhas[i]), campo, texto))
+    erros.sort(key=lambda e: e.linha)
+
+    validos = [
+        NovoPaciente(
+            nome=df["nome"].iloc[i],
+            email=df["email"].iloc[i] or None,
+            telefone=telefones.iloc[i] or None,
+            data_entrada=datas.iloc[i].date(),
+            aulas=aulas[i],
+        )
+        for i in np.flatnonzero(~com_erro)
+    ]
+    return validos, erros
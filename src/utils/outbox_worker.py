@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import timedelta
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.repositories.outbox_repository_sql import OutboxRepositorySQL  # noqa: E402
+from src.utils.email_utils import montar_mensagem  # noqa: E402
+from src.utils.send_reminders import smtp_config_from_env  # noqa: E402
+from src.utils.smtp_utils import SmtpSession  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("outbox_worker")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Envia as notificações pendentes da outbox. Pode rodar em vários processos."
+    )
+    parser.add_argument("--lote", type=int, default=50, help="Mensagens reivindicadas por vez.")
+    parser.add_argument(
+        "--lease", type=int, default=300, help="Segundos até outro worker poder reassumir o lote."
+    )
+    parser.add_argument("--max-tentativas", type=int, default=5)
+    parser.add_argument(
+        "--backoff", type=int, default=60, help="Espera base (s) antes da 1ª nova tentativa."
+    )
+    parser.add_argument(
+        "--loop", action="store_true", help="Continua aguardando novas mensagens ao esvaziar."
+    )
+    parser.add_argument("--intervalo", type=float, default=10.0, help="Pausa (s) entre consultas.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+
+    smtp_config = smtp_config_from_env()
+    smtp_from = os.getenv("SMTP_FROM")
+    if not smtp_config or not smtp_from:
+        log.critical("SMTP_HOST e/ou SMTP_FROM não configurados. Abortando.")
+        return 2
+
+    repo = OutboxRepositorySQL()
+    lease = timedelta(seconds=args.lease)
+    backoff = timedelta(seconds=args.backoff)
+    max_por_conexao = int(os.getenv("SMTP_MAX_PER_CONNECTION", "100"))
+    enviados = falhas = 0
+    inicio = time.perf_counter()
+
+    with SmtpSession(smtp_config, max_mensagens=max_por_conexao) as sessao:
+        while True:
+            try:
+                itens = repo.reivindicar(args.lote, lease)
+            except Exception as e:
+                log.critical("Falha ao consultar a outbox: %s", e, exc_info=True)
+                return 3
+
+            if not itens:
+                if not args.loop:
+                    break
+                time.sleep(args.intervalo)
+                continue
+
+            for item in itens:
+                try:
+                    msg = montar_mensagem(
+                        smtp_from, item.destinatario, item.assunto, item.texto, item.html
+                    )
+                    sessao.enviar(msg)
+                except Exception as e:
+                    falhas += 1
+                    log.error(
+                        "Falha ao enviar outbox id=%s tipo=%s (tentativa %d): %s",
+                        item.id,
+                        item.tipo,
+                        item.tentativas + 1,
+                        e,
+                    )
+                    try:
+                        repo.falhar(item, str(e), args.max_tentativas, backoff)
+                    except Exception:
+                        log.error("Falha ao registrar erro da outbox id=%s", item.id, exc_info=True)
+                    continue
+                enviados += 1
+                try:
+                    if not repo.concluir(item):
+                        log.warning("Lease da mensagem id=%s expirou antes da conclusão.", item.id)
+                except Exception:
+                    log.error("Falha ao registrar envio da outbox id=%s", item.id, exc_info=True)
+                    continue
+                log.info(
+                    "Outbox id=%s tipo=%s enviada para %s", item.id, item.tipo, item.destinatario
+                )
+
+    log.info(
+        "Resumo: enviados=%s, falhas=%s em %.2fs; fila=%s",
+        enviados,
+        falhas,
+        time.perf_counter() - inicio,
+        repo.contar_por_status(),
+    )
+    return 0 if falhas == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
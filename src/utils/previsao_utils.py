@@ -0,0 +1,84 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.utils.cobranca_utils import DIAS_CICLO, dia_do_mes
+
+FREQUENCIAS = {"mensal": "M", "semanal": "W-SUN"}
+COLUNAS_BASE = ("plano_tipo", "plano_dia", "plano_sessoes", "aulas_semana", "proxima", "valor")
+INTERVALO_MINIMO_DIAS = 7
+
+
+def intervalos_ciclo(tipos, sessoes, aulas_semana) -> np.ndarray:
+    tipos = np.asarray(tipos, dtype=object)
+    sessoes = np.asarray(sessoes, dtype="float64")
+    aulas = np.asarray(aulas_semana, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pacote = np.round(7 * sessoes / aulas)
+    pacote = np.where(np.isfinite(pacote), pacote, DIAS_CICLO)
+    intervalo = np.where(tipos == "pacote", pacote, DIAS_CICLO)
+    return np.maximum(intervalo, INTERVALO_MINIMO_DIAS).astype("int64")
+
+
+def projetar_cobrancas(
+    base: pd.DataFrame, inicio: date, fim: date
+) -> tuple[np.ndarray, np.ndarray]:
+    inicio64 = np.datetime64(inicio, "D")
+    fim64 = np.datetime64(fim, "D")
+    tipos = base["plano_tipo"].to_numpy(dtype=object)
+    primeira = np.maximum(base["proxima"].to_numpy(dtype="datetime64[D]"), inicio64)
+    intervalo = intervalos_ciclo(tipos, base["plano_sessoes"], base["aulas_semana"])
+
+    passo_minimo = min(int(intervalo.min(initial=DIAS_CICLO)), 28)
+    k = np.arange(int((fim64 - inicio64).astype("int64")) // passo_minimo + 2)
+
+    datas = primeira[:, None] + k[None, :] * intervalo[:, None].astype("timedelta64[D]")
+
+    mensal = tipos == "mensal"
+    if mensal.any():
+        inicio_mensal = primeira[mensal]
+        dia_atual = (inicio_mensal - inicio_mensal.astype("datetime64[M]")).astype("int64") + 1
+        dias = base["plano_dia"].to_numpy(dtype="float64")[mensal]
+        dias = np.where(np.isnan(dias), dia_atual, dias)
+        meses = inicio_mensal.astype("datetime64[M]")[:, None] + k[None, :]
+        seguintes = dia_do_mes(meses, np.broadcast_to(dias[:, None], meses.shape))
+        seguintes[:, 0] = inicio_mensal
+        datas[mensal] = seguintes
+
+    linhas, _ = np.nonzero(datas < fim64)
+    return linhas, datas[datas < fim64]
+
+
+def previsao_recebimentos(
+    base: pd.DataFrame, inicio: date, meses: int, frequencia: str = "mensal"
+) -> pd.DataFrame:
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f"Frequência inválida: {frequencia}. Opções: {', '.join(FREQUENCIAS)}")
+    freq = FREQUENCIAS[frequencia]
+    fim = (np.datetime64(inicio, "M") + meses).astype("datetime64[D]").astype(date)
+
+    linhas, datas = projetar_cobrancas(base, inicio, fim)
+    valores = base["valor"].to_numpy(dtype="float64")[linhas]
+    cobrancas = pd.DataFrame(
+        {
+            "periodo": pd.PeriodIndex(datas, freq=freq),
+            "valor": np.nan_to_num(valores),
+            "sem_valor": np.isnan(valores),
+        }
+    )
+    periodos = pd.period_range(inicio, fim - pd.Timedelta(days=1), freq=freq)
+    resumo = (
+        cobrancas.groupby("periodo")
+        .agg(
+            quantidade=("valor", "size"),
+            valor=("valor", "sum"),
+            sem_valor=("sem_valor", "sum"),
+        )
+        .reindex(periodos, fill_value=0)
+        .rename_axis("periodo")
+        .reset_index()
+    )
+    resumo["inicio"] = resumo["periodo"].dt.start_time.dt.date
+    resumo["valor"] = resumo["valor"].round(2)
+    return resumo[["periodo", "inicio", "quantidade", "valor", "sem_valor"]]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from decimal import Decimal
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.repositories.cobranca_repository_sql import (  # noqa: E402
+    LOTE_PADRAO,
+    CobrancaRepositorySQL,
+)
+from src.utils.cobranca_utils import PLANOS, validar_plano  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("recalcular_cobrancas")
+
+
+def _ids(valor: str) -> list[int]:
+    try:
+        return [int(v) for v in valor.split(",") if v.strip()]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError("use ids separados por vírgula, ex.: 1,2,3") from e
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Define o plano de cobrança e recalcula as próximas cobranças em lote."
+    )
+    alvo = parser.add_mutually_exclusive_group(required=True)
+    alvo.add_argument("--ids", type=_ids, help="Pacientes afetados (ex.: 1,2,3).")
+    alvo.add_argument("--todos", action="store_true", help="Todos os pacientes não excluídos.")
+    parser.add_argument("--plano", choices=PLANOS, help="Novo plano; sem ele, só recalcula.")
+    parser.add_argument("--dia", type=int, help="Dia do mês para o plano mensal.")
+    parser.add_argument("--sessoes", type=int, help="Sessões por pacote.")
+    parser.add_argument("--valor", type=Decimal, help="Valor cobrado por ciclo (ex.: 180.00).")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Só conta o que mudaria, sem gravar."
+    )
+    args = parser.parse_args(argv)
+    if args.plano:
+        try:
+            validar_plano(args.plano, args.dia, args.sessoes)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.dia is not None or args.sessoes is not None or args.valor is not None:
+        parser.error("--dia/--sessoes/--valor exigem --plano")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    ids = None if args.todos else args.ids
+    repo = CobrancaRepositorySQL()
+
+    try:
+        if args.plano:
+            resumo = repo.definir_plano(
+                ids,
+                args.plano,
+                args.dia,
+                args.sessoes,
+                args.valor,
+                aplicar=not args.dry_run,
+                lote=args.lote,
+            )
+        else:
+            resumo = repo.recalcular(ids, aplicar=not args.dry_run, lote=args.lote)
+    except Exception as e:
+        log.critical("Falha ao recalcular cobranças: %s", e, exc_info=True)
+        return 3
+
+    log.info(
+        "%s: %d avaliado(s), %d com próxima cobrança alterada.",
+        "Simulação" if args.dry_run else "Concluído",
+        resumo.avaliados,
+        resumo.alterados,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,40 @@
 from __future__ import annotations
 
+import argparse
 import logging
 import os
-import smtplib
-import ssl
 import sys
-from collections.abc import Iterable
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
 from datetime import date, timedelta
+from datetime import time as dtime
 from email.message import EmailMessage
 
 from dotenv import load_dotenv
-from sqlalchemy import and_, select
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.db.db import SessionLocal  # noqa: E402
-from src.db.tables import PacienteSQL  # noqa: E402
+from src.models.agenda_model import SessoesPaciente  # noqa: E402
+from src.models.paciente_model import VencimentoPaciente  # noqa: E402
+from src.repositories.agenda_repository_sql import AgendaRepositorySQL  # noqa: E402
+from src.repositories.lembrete_repository_sql import LembreteRepositorySQL  # noqa: E402
+from src.repositories.paciente_repository_sql import PacienteRepositorySQL  # noqa: E402
+from src.repositories.shard_lease_repository_sql import ShardLeaseRepositorySQL  # noqa: E402
+from src.utils.email_utils import (  # noqa: E402
+    conteudo_lembrete_pagamento,
+    conteudo_lembrete_sessao,
+    montar_mensagem,
+)
+from src.utils.smtp_utils import (  # noqa: E402
+    Envio,
+    ResumoEntrega,
+    SmtpConfig,
+    SmtpSession,
+    entregar_concorrente,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +43,28 @@ logging.basicConfig(
 )
 log = logging.getLogger("send_reminders")
 
+TIPO_VENCIMENTO = "vencimento_7d"
+TIPO_SESSAO = "sessao_vespera"
+TIPOS = {"vencimento": TIPO_VENCIMENTO, "sessao": TIPO_SESSAO}
+CONTAGENS = ("enviados", "sem_email", "ja_enviados", "falhas")
+
+
+@dataclass(slots=True, frozen=True)
+class Lembrete:
+    tipo: str
+    paciente_id: int
+    nome: str
+    email: str | None
+    referencia: date
+    assunto: str
+    texto: str
+    html: str
+
+    def mensagem(self, sender: str) -> EmailMessage:
+        if not self.email:
+            raise ValueError(f"Paciente id={self.paciente_id} sem e-mail.")
+        return montar_mensagem(sender, self.email, self.assunto, self.texto, self.html)
+
 
 def build_message(
     sender: str,
@@ -31,37 +72,19 @@ def build_message(
     to_name: str | None,
     vencimento: date,
 ) -> EmailMessage:
+    assunto, texto, html = conteudo_lembrete_pagamento(to_name, vencimento)
+    return montar_mensagem(sender, to_email, assunto, texto, html)
 
-    assunto = "Lembrete de pagamento - Vitally"
-    nome = to_name or "Paciente"
-    venc_br = vencimento.strftime("%d/%m/%Y")
-
-    texto = (
-        f"Olá, {nome}!\n\n"
-        f"Este é um lembrete de pagamento. Sua próxima cobrança está prevista para {venc_br}.\n"
-        f"Se já realizou o pagamento, desconsidere este e-mail.\n\n"
-        f"Abraços,\nEquipe Vitally"
-    )
-
-    html = f"""
-    <html>
-      <body style='font-family: Arial, sans-serif; line-height:1.5;'>
-        <p>Olá, <strong>{nome}</strong>!</p>
-        <p>Este é um lembrete de pagamento. Sua <strong>próxima cobrança</strong> está prevista para
-           <strong>{venc_br}</strong>.</p>
-        <p>Se já realizou o pagamento, por favor desconsidere este e-mail.</p>
-        <p>Abraços,<br/>Equipe Vitally</p>
-      </body>
-    </html>
-    """
-
-    msg = EmailMessage()
-    msg["Subject"] = assunto
-    msg["From"] = sender
-    msg["To"] = to_email
-    msg.set_content(texto)
-    msg.add_alternative(html, subtype="html")
-    return msg
+
+def build_session_message(
+    sender: str,
+    to_email: str,
+    to_name: str | None,
+    dia: date,
+    horarios: Iterable[tuple[dtime, dtime, str]],
+) -> EmailMessage:
+    assunto, texto, html = conteudo_lembrete_sessao(to_name, dia, horarios)
+    return montar_mensagem(sender, to_email, assunto, texto, html)
 
 
 def send_email(
@@ -72,53 +95,320 @@ def send_email(
     use_tls: bool,
     message: EmailMessage,
 ) -> None:
-    if use_tls:
-        context = ssl.create_default_context()
-        with smtplib.SMTP(host, port) as smtp:
-            smtp.starttls(context=context)
-            if username and password:
-                smtp.login(username, password)
-            smtp.send_message(message)
-    else:
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL(host, port, context=context) as smtp:
-            if username and password:
-                smtp.login(username, password)
-            smtp.send_message(message)
+    config = SmtpConfig(
+        host=host,
+        port=port,
+        username=username,
+        password=password,
+        seguranca="starttls" if use_tls else "ssl",
+    )
+    with SmtpSession(config, max_mensagens=1) as sessao:
+        sessao.enviar(message)
+
+
+def smtp_config_from_env() -> SmtpConfig | None:
+    host = os.getenv("SMTP_HOST")
+    if not host:
+        return None
+    use_tls = os.getenv("SMTP_USE_TLS", "true").lower() in {"1", "true", "yes"}
+    return SmtpConfig(
+        host=host,
+        port=int(os.getenv("SMTP_PORT", "587")),
+        username=os.getenv("SMTP_USER"),
+        password=os.getenv("SMTP_PASS"),
+        seguranca=os.getenv("SMTP_SECURITY") or ("starttls" if use_tls else "ssl"),
+    )
 
 
-def get_pacientes_com_vencimento_em_ate_7_dias() -> Iterable[PacienteSQL]:
+def get_pacientes_com_vencimento_em_ate_7_dias(
+    shard: tuple[int, int] = (0, 1),
+) -> Iterator[VencimentoPaciente]:
     hoje = date.today()
     limite = hoje + timedelta(days=7)
-    log.info("Buscando pacientes com data_proxima_cobranca entre %s e %s", hoje, limite)
-
-    with SessionLocal() as s:
-        stmt = (
-            select(PacienteSQL)
-            .where(
-                and_(
-                    PacienteSQL.ativo.is_(True),
-                    PacienteSQL.data_proxima_cobranca.is_not(None),
-                    PacienteSQL.data_proxima_cobranca >= hoje,
-                    PacienteSQL.data_proxima_cobranca <= limite,
+    indice, total = shard
+    log.info(
+        "Buscando pacientes com data_proxima_cobranca entre %s e %s (shard %d/%d)",
+        hoje,
+        limite,
+        indice,
+        total,
+    )
+    return PacienteRepositorySQL().iter_vencimentos(
+        ate=limite,
+        desde=hoje,
+        sem_lembrete=TIPO_VENCIMENTO,
+        shard=shard,
+        chunk=int(os.getenv("REMINDER_FETCH_SIZE", "1000")),
+    )
+
+
+def get_sessoes_de_amanha(
+    shard: tuple[int, int] = (0, 1), dia: date | None = None
+) -> Iterator[SessoesPaciente]:
+    dia = dia or date.today() + timedelta(days=1)
+    indice, total = shard
+    log.info("Buscando sessões agendadas para %s (shard %d/%d)", dia, indice, total)
+    return AgendaRepositorySQL().iter_sessoes_por_paciente(
+        dia,
+        sem_lembrete=TIPO_SESSAO,
+        shard=shard,
+        chunk=int(os.getenv("REMINDER_FETCH_SIZE", "1000")),
+    )
+
+
+def lembretes_vencimento(shard: tuple[int, int] = (0, 1)) -> Iterator[Lembrete]:
+    for p in get_pacientes_com_vencimento_em_ate_7_dias(shard):
+        assunto, texto, html = conteudo_lembrete_pagamento(p.nome, p.vencimento)
+        yield Lembrete(TIPO_VENCIMENTO, p.id, p.nome, p.email, p.vencimento, assunto, texto, html)
+
+
+def lembretes_sessao(shard: tuple[int, int] = (0, 1)) -> Iterator[Lembrete]:
+    for g in get_sessoes_de_amanha(shard):
+        assunto, texto, html = conteudo_lembrete_sessao(g.nome, g.data, g.horarios)
+        yield Lembrete(TIPO_SESSAO, g.paciente_id, g.nome, g.email, g.data, assunto, texto, html)
+
+
+def _shard(valor: str) -> tuple[int, int]:
+    try:
+        indice, total = (int(x) for x in valor.split("/", 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError("use o formato i/N, ex.: 0/4") from None
+    if total < 1 or not 0 <= indice < total:
+        raise argparse.ArgumentTypeError(f"shard inválido: {valor} (0 <= i < N)")
+    return indice, total
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Envia lembretes por e-mail")
+    parser.add_argument(
+        "--tipo",
+        choices=sorted(TIPOS),
+        default="vencimento",
+        help="vencimento: pagamentos dos próximos 7 dias; sessao: sessões de amanhã",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SMTP_WORKERS", "1")),
+        help="conexões SMTP simultâneas (padrão: SMTP_WORKERS ou 1)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=float(os.getenv("SMTP_RATE", "0")),
+        help="limite global de mensagens por segundo; 0 desativa (padrão: SMTP_RATE)",
+    )
+    parser.add_argument(
+        "--por-dominio",
+        type=int,
+        default=int(os.getenv("SMTP_DOMAIN_CONCURRENCY", "0")),
+        help="envios simultâneos por domínio do destinatário; 0 desativa",
+    )
+    parser.add_argument(
+        "--outbox",
+        action="store_true",
+        help="apenas enfileira os lembretes na outbox (enviados por outbox_worker.py)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard,
+        default=(0, 1),
+        help="processa só os pacientes com id %% N == i (formato i/N)",
+    )
+    parser.add_argument(
+        "--lease",
+        type=int,
+        default=1800,
+        help="segundos até outro processo poder assumir um shard abandonado",
+    )
+    parser.add_argument(
+        "--resumo",
+        type=int,
+        metavar="N",
+        help="não envia nada; consolida as contagens dos N shards de hoje",
+    )
+    return parser.parse_args(argv)
+
+
+def enfileirar_lembretes(lembretes: Iterable[Lembrete]) -> dict[str, int]:
+    ledger = LembreteRepositorySQL()
+    contagens = dict.fromkeys(CONTAGENS, 0)
+    for lem in lembretes:
+        if not lem.email:
+            contagens["sem_email"] += 1
+            log.warning("Paciente id=%s nome=%s sem e-mail. Pulando.", lem.paciente_id, lem.nome)
+            continue
+        if ledger.enfileirar(
+            lem.paciente_id,
+            lem.referencia,
+            lem.tipo,
+            destinatario=lem.email,
+            assunto=lem.assunto,
+            texto=lem.texto,
+            html=lem.html,
+        ):
+            contagens["enviados"] += 1
+        else:
+            contagens["ja_enviados"] += 1
+    return contagens
+
+
+def _lembrete(envio: Envio) -> Lembrete:
+    if not isinstance(envio.chave, Lembrete):
+        raise TypeError(f"Envio sem lembrete: {envio.chave!r}")
+    return envio.chave
+
+
+def enviar_lembretes(
+    lembretes: Iterable[Lembrete],
+    smtp_config: SmtpConfig,
+    smtp_from: str,
+    args: argparse.Namespace,
+    ao_fechar_lote: Callable[[], object] | None = None,
+    resumos: list[ResumoEntrega] | None = None,
+) -> dict[str, int]:
+    max_por_conexao = int(os.getenv("SMTP_MAX_PER_CONNECTION", "100"))
+    tamanho_lote = max(int(os.getenv("SMTP_BATCH_SIZE", "50")), 1)
+    pulados_sem_email = 0
+
+    def _envios() -> Iterator[Envio]:
+        nonlocal pulados_sem_email
+        for lem in lembretes:
+            if not lem.email:
+                pulados_sem_email += 1
+                log.warning(
+                    "Paciente id=%s nome=%s sem e-mail. Pulando.", lem.paciente_id, lem.nome
                 )
+                continue
+            yield Envio(chave=lem, mensagem=lem.mensagem(smtp_from))
+
+    ledger = LembreteRepositorySQL()
+
+    def _transacao(envio: Envio):
+        lem = _lembrete(envio)
+        return ledger.registrar_envio(lem.paciente_id, lem.referencia, lem.tipo)
+
+    lock = threading.Lock()
+    lote = {"numero": 1, "qtd": 0, "inicio": time.perf_counter()}
+
+    def _ao_concluir(envio: Envio, _latencia: float, erro: Exception | None) -> None:
+        lem = _lembrete(envio)
+        if erro is None:
+            log.info(
+                "Lembrete %s enviado para id=%s email=%s data=%s",
+                lem.tipo,
+                lem.paciente_id,
+                lem.email,
+                lem.referencia,
             )
-            .order_by(PacienteSQL.data_proxima_cobranca.asc())
+        else:
+            log.error(
+                "Falha ao enviar e-mail para id=%s email=%s: %s",
+                lem.paciente_id,
+                lem.email,
+                erro,
+                exc_info=erro,
+            )
+        with lock:
+            lote["qtd"] += 1
+            if lote["qtd"] >= tamanho_lote:
+                _fechar_lote()
+
+    def _fechar_lote() -> None:
+        log.info(
+            "Lote %d: %d mensagens em %.2fs",
+            lote["numero"],
+            lote["qtd"],
+            time.perf_counter() - lote["inicio"],
+        )
+        lote.update(numero=lote["numero"] + 1, qtd=0, inicio=time.perf_counter())
+        if ao_fechar_lote:
+            ao_fechar_lote()
+
+    log.info(
+        "Enviando com workers=%d, rate=%s msg/s, por_dominio=%s",
+        args.workers,
+        args.rate or "sem limite",
+        args.por_dominio or "sem limite",
+    )
+    resumo = entregar_concorrente(
+        _envios(),
+        smtp_config,
+        workers=args.workers,
+        por_segundo=args.rate or None,
+        por_dominio=args.por_dominio or None,
+        max_mensagens=max_por_conexao,
+        ao_concluir=_ao_concluir,
+        transacao=_transacao,
+    )
+    if lote["qtd"]:
+        _fechar_lote()
+    if resumos is not None:
+        resumos.append(resumo)
+
+    log.info(
+        "Tempo total: %.2fs em %d conexão(ões) SMTP (%.1f msg/s, p50=%.0fms, p99=%.0fms)",
+        resumo.segundos,
+        resumo.conexoes,
+        resumo.mensagens_por_segundo,
+        resumo.percentil(50) * 1000,
+        resumo.percentil(99) * 1000,
+    )
+    return {
+        "enviados": resumo.enviados,
+        "sem_email": pulados_sem_email,
+        "ja_enviados": resumo.pulados,
+        "falhas": resumo.falhas,
+    }
+
+
+def resumir_shards(total: int, tipo: str = TIPO_VENCIMENTO, dia: date | None = None) -> int:
+    dia = dia or date.today()
+    shards = {r.shard: r for r in ShardLeaseRepositorySQL().listar(dia, tipo, total)}
+    soma = dict.fromkeys(CONTAGENS, 0)
+    pendentes = []
+
+    for i in range(total):
+        r = shards.get(i)
+        if r is None or r.status != "concluido":
+            pendentes.append(i)
+            log.warning("Shard %d/%d: %s", i, total, "não executado" if r is None else r.status)
+            continue
+        for k in soma:
+            soma[k] += getattr(r, k)
+        log.info(
+            "Shard %d/%d: enviados=%s, sem_email=%s, ja_enviados=%s, falhas=%s",
+            i,
+            total,
+            r.enviados,
+            r.sem_email,
+            r.ja_enviados,
+            r.falhas,
         )
-        return s.execute(stmt).scalars().all()
+
+    log.info(
+        "Total (%d/%d shards concluídos): enviados=%s, sem_email=%s, ja_enviados=%s, falhas=%s",
+        total - len(pendentes),
+        total,
+        soma["enviados"],
+        soma["sem_email"],
+        soma["ja_enviados"],
+        soma["falhas"],
+    )
+    return 0 if not pendentes and soma["falhas"] == 0 else 1
 
 
-def main() -> int:
+def main(argv: list[str] | None = None, *, resumos: list[ResumoEntrega] | None = None) -> int:
     load_dotenv()
+    args = parse_args(argv)
+
+    if args.resumo:
+        return resumir_shards(args.resumo, TIPOS[args.tipo])
 
-    smtp_host = os.getenv("SMTP_HOST")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASS")
+    smtp_config = smtp_config_from_env()
     smtp_from = os.getenv("SMTP_FROM")
-    smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() in {"1", "true", "yes"}
 
-    if not smtp_host or not smtp_from:
+    if not args.outbox and (not smtp_config or not smtp_from):
         log.critical("SMTP_HOST e/ou SMTP_FROM não configurados. Abortando.")
         return 2
 
@@ -131,56 +421,51 @@ def main() -> int:
     else:
         log.info("Usando DATABASE_URL configurado.")
 
+    hoje = date.today()
+    indice, total = args.shard
+    token = uuid.uuid4().hex
+    lease = timedelta(seconds=args.lease)
+    leases = ShardLeaseRepositorySQL()
+    tipo = TIPOS[args.tipo]
+    fonte = lembretes_sessao if tipo == TIPO_SESSAO else lembretes_vencimento
+
     try:
-        pacientes = get_pacientes_com_vencimento_em_ate_7_dias()
+        if not leases.adquirir(hoje, tipo, indice, total, token, lease):
+            log.warning("Shard %d/%d já está em execução em outro processo. Saindo.", indice, total)
+            return 0
+        lembretes = fonte(args.shard)
+        if args.outbox:
+            contagens = enfileirar_lembretes(lembretes)
+        else:
+            assert smtp_config is not None and smtp_from is not None
+            contagens = enviar_lembretes(
+                lembretes,
+                smtp_config,
+                smtp_from,
+                args,
+                ao_fechar_lote=lambda: leases.renovar(hoje, tipo, indice, total, token, lease),
+                resumos=resumos,
+            )
     except Exception as e:
         log.critical("Falha ao consultar banco: %s", e, exc_info=True)
+        try:
+            leases.liberar(hoje, tipo, indice, total, token)
+        except Exception:
+            log.error("Não foi possível liberar o shard %d/%d", indice, total, exc_info=True)
         return 3
 
-    if not pacientes:
-        log.info("Nenhum paciente com vencimento nos próximos 7 dias. Nada a enviar.")
-        return 0
+    if not any(contagens.values()):
+        log.info("Nenhum lembrete '%s' pendente. Nada a enviar.", args.tipo)
 
-    enviados = 0
-    pulados_sem_email = 0
-    falhas = 0
+    if not leases.concluir(hoje, tipo, indice, total, token, contagens):
+        log.warning("Lease do shard %d/%d expirou antes da conclusão.", indice, total)
 
-    for p in pacientes:
-        if not p.email:
-            pulados_sem_email += 1
-            log.warning("Paciente id=%s nome=%s sem e-mail. Pulando.", p.id, p.nome)
-            continue
-
-        try:
-            msg = build_message(
-                sender=smtp_from,
-                to_email=p.email,
-                to_name=p.nome,
-                vencimento=p.data_proxima_cobranca,
-            )
-            send_email(
-                host=smtp_host,
-                port=smtp_port,
-                username=smtp_user,
-                password=smtp_pass,
-                use_tls=smtp_use_tls,
-                message=msg,
-            )
-            enviados += 1
-            log.info(
-                "Lembrete enviado para id=%s email=%s venc=%s",
-                p.id,
-                p.email,
-                p.data_proxima_cobranca,
-            )
-        except Exception as e:
-            falhas += 1
-            log.error(
-                "Falha ao enviar e-mail para id=%s email=%s: %s", p.id, p.email, e, exc_info=True
-            )
-
-    log.info("Resumo: enviados=%s, sem_email=%s, falhas=%s", enviados, pulados_sem_email, falhas)
-    return 0 if falhas == 0 else 1
+    log.info(
+        "Resumo: %s=%s, sem_email=%s, ja_enviados=%s, falhas=%s",
+        "enfileirados" if args.outbox else "enviados",
+        *(contagens[k] for k in CONTAGENS),
+    )
+    return 0 if contagens["falhas"] == 0 else 1
 
 
 if __name__ == "__main__":
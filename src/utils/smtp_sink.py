@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import random
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from typing import cast
+
+log = logging.getLogger("smtp_sink")
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    server: _SinkServer
+
+    def _reply(self, linha: str) -> None:
+        self.wfile.write(f"{linha}\r\n".encode("ascii"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        sink = self.server.sink
+        sink._registrar_conexao(self.connection)
+        try:
+            if sink.latencia_conexao:
+                time.sleep(sink.latencia_conexao)
+            self._reply("220 vitally-sink ESMTP")
+            while True:
+                raw = self.rfile.readline()
+                if not raw:
+                    return
+                comando = raw.decode("utf-8", "replace").strip()
+                verbo = comando.split(" ", 1)[0].upper()
+
+                if verbo == "EHLO":
+                    self._reply("250-vitally-sink")
+                    self._reply("250 8BITMIME")
+                elif verbo == "HELO":
+                    self._reply("250 vitally-sink")
+                elif verbo in {"MAIL", "RCPT", "RSET", "NOOP"}:
+                    self._reply("250 OK")
+                elif verbo == "DATA":
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    linhas: list[bytes] = []
+                    while True:
+                        linha = self.rfile.readline()
+                        if not linha or linha in (b".\r\n", b".\n"):
+                            break
+                        linhas.append(linha[1:] if linha.startswith(b"..") else linha)
+                    if sink.latencia:
+                        time.sleep(sink.latencia)
+                    if sink._sortear_falha():
+                        self._reply("451 4.3.0 Falha temporaria simulada")
+                        continue
+                    sink._registrar_mensagem(b"".join(linhas))
+                    self._reply("250 OK: queued")
+                elif verbo == "QUIT":
+                    self._reply("221 Bye")
+                    return
+                else:
+                    self._reply("502 Command not implemented")
+        except OSError:
+            return
+        finally:
+            sink._remover_conexao(self.connection)
+
+
+class _SinkServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, endereco: tuple[str, int], sink: SmtpSink):
+        super().__init__(endereco, _SinkHandler)
+        self.sink = sink
+
+
+class SmtpSink:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latencia: float = 0.0,
+        latencia_conexao: float = 0.0,
+        taxa_falha: float = 0.0,
+        guardar: bool = True,
+        seed: int | None = None,
+    ):
+        self._server = _SinkServer((host, port), self)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._abertas: set = set()
+        self._random = random.Random(seed)
+        self.latencia = latencia
+        self.latencia_conexao = latencia_conexao
+        self.taxa_falha = taxa_falha
+        self.guardar = guardar
+        self.mensagens: list[bytes] = []
+        self.conexoes = 0
+        self.recebidas = 0
+        self.rejeitadas = 0
+
+    @property
+    def host(self) -> str:
+        host = self._server.server_address[0]
+        return host.decode() if isinstance(host, bytes | bytearray) else host
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _registrar_conexao(self, sock) -> None:
+        with self._lock:
+            self.conexoes += 1
+            self._abertas.add(sock)
+
+    def _remover_conexao(self, sock) -> None:
+        with self._lock:
+            self._abertas.discard(sock)
+
+    def _registrar_mensagem(self, dados: bytes) -> None:
+        with self._lock:
+            self.recebidas += 1
+            if self.guardar:
+                self.mensagens.append(dados)
+
+    def _sortear_falha(self) -> bool:
+        if not self.taxa_falha:
+            return False
+        with self._lock:
+            falhou = self._random.random() < self.taxa_falha
+            if falhou:
+                self.rejeitadas += 1
+            return falhou
+
+    def parsed(self) -> list[EmailMessage]:
+        with self._lock:
+            return [
+                cast(EmailMessage, message_from_bytes(m, policy=policy.default))
+                for m in self.mensagens
+            ]
+
+    def derrubar_conexoes(self) -> None:
+        with self._lock:
+            abertas = list(self._abertas)
+        for sock in abertas:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def start(self) -> SmtpSink:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        log.info("SMTP sink ouvindo em %s:%s", self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> SmtpSink:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import logging
+import queue
+import random
+import smtplib
+import ssl
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+
+log = logging.getLogger("send_reminders")
+
+MAX_AMOSTRAS_LATENCIA = 10_000
+ESPERA_FILA = 0.5
+SEGURANCAS = ("starttls", "ssl", "nenhuma")
+
+
+@dataclass(slots=True, frozen=True)
+class SmtpConfig:
+    host: str
+    port: int
+    username: str | None = None
+    password: str | None = None
+    seguranca: str = "starttls"
+    timeout: float = 30.0
+
+
+class SmtpSession:
+    def __init__(self, config: SmtpConfig, max_mensagens: int = 100, tentativas: int = 2):
+        if config.seguranca not in SEGURANCAS:
+            raise ValueError(f"Segurança SMTP inválida: {config.seguranca}")
+        self._config = config
+        self._max_mensagens = max(int(max_mensagens), 1)
+        self._tentativas = max(int(tentativas), 1)
+        self._smtp: smtplib.SMTP | None = None
+        self._enviadas_na_conexao = 0
+        self.conexoes = 0
+        self.enviadas = 0
+
+    def _conectar(self) -> None:
+        cfg = self._config
+        if cfg.seguranca == "ssl":
+            smtp: smtplib.SMTP = smtplib.SMTP_SSL(
+                cfg.host, cfg.port, timeout=cfg.timeout, context=ssl.create_default_context()
+            )
+        else:
+            smtp = smtplib.SMTP(cfg.host, cfg.port, timeout=cfg.timeout)
+            if cfg.seguranca == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+        if cfg.username and cfg.password:
+            smtp.login(cfg.username, cfg.password)
+
+        self._smtp = smtp
+        self._enviadas_na_conexao = 0
+        self.conexoes += 1
+        log.debug("Conexão SMTP #%d aberta com %s:%s", self.conexoes, cfg.host, cfg.port)
+
+    def fechar(self) -> None:
+        if self._smtp is None:
+            return
+        smtp, self._smtp = self._smtp, None
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def enviar(self, message: EmailMessage) -> None:
+        if self._smtp is not None and self._enviadas_na_conexao >= self._max_mensagens:
+            log.debug("Rotacionando conexão SMTP após %d mensagens", self._enviadas_na_conexao)
+            self.fechar()
+
+        for tentativa in range(1, self._tentativas + 1):
+            if self._smtp is None:
+                self._conectar()
+            assert self._smtp is not None
+            try:
+                self._smtp.send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                log.warning("Conexão SMTP caiu (tentativa %d): %s", tentativa, e)
+                self._smtp.close()
+                self._smtp = None
+                if tentativa == self._tentativas:
+                    raise
+                continue
+            self._enviadas_na_conexao += 1
+            self.enviadas += 1
+            return
+
+    def __enter__(self) -> SmtpSession:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+class RateLimiter:
+    def __init__(self, por_segundo: float, rajada: int = 1):
+        if por_segundo <= 0:
+            raise ValueError("por_segundo deve ser positivo")
+        self._intervalo = 1.0 / por_segundo
+        self._rajada = max(int(rajada), 1)
+        self._tokens = float(self._rajada)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> None:
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(
+                    self._rajada, self._tokens + (agora - self._ultimo) / self._intervalo
+                )
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) * self._intervalo
+            time.sleep(espera)
+
+
+class LimitePorDominio:
+    def __init__(self, maximo: int):
+        self._maximo = max(int(maximo), 1)
+        self._semaforos: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaforo(self, dominio: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaforos.get(dominio)
+            if sem is None:
+                sem = self._semaforos[dominio] = threading.BoundedSemaphore(self._maximo)
+            return sem
+
+    @contextmanager
+    def reservar(self, destinatario: str) -> Iterator[None]:
+        dominio = destinatario.rsplit("@", 1)[-1].strip().lower()
+        sem = self._semaforo(dominio)
+        with sem:
+            yield
+
+
+@dataclass(slots=True, frozen=True)
+class Envio:
+    chave: object
+    mensagem: EmailMessage
+
+
+@dataclass(slots=True)
+class ResumoEntrega:
+    enviados: int = 0
+    falhas: int = 0
+    pulados: int = 0
+    segundos: float = 0.0
+    conexoes: int = 0
+    latencias: list[float] = field(default_factory=list)
+    amostras: int = 0
+
+    def registrar_latencia(self, segundos: float) -> None:
+        self.amostras += 1
+        if len(self.latencias) < MAX_AMOSTRAS_LATENCIA:
+            self.latencias.append(segundos)
+            return
+        idx = random.randrange(self.amostras)
+        if idx < MAX_AMOSTRAS_LATENCIA:
+            self.latencias[idx] = segundos
+
+    @property
+    def mensagens_por_segundo(self) -> float:
+        return self.enviados / self.segundos if self.segundos > 0 else 0.0
+
+    def percentil(self, p: float) -> float:
+        if not self.latencias:
+            return 0.0
+        ordenadas = sorted(self.latencias)
+        idx = min(int(round(p / 100 * (len(ordenadas) - 1))), len(ordenadas) - 1)
+        return ordenadas[idx]
+
+
+def entregar_concorrente(
+    envios: Iterable[Envio],
+    config: SmtpConfig,
+    *,
+    workers: int = 1,
+    por_segundo: float | None = None,
+    por_dominio: int | None = None,
+    max_mensagens: int = 100,
+    ao_concluir: Callable[[Envio, float, Exception | None], None] | None = None,
+    transacao: Callable[[Envio], AbstractContextManager[bool]] | None = None,
+) -> ResumoEntrega:
+    workers = max(int(workers), 1)
+    limitador = RateLimiter(por_segundo, rajada=workers) if por_segundo else None
+    dominios = LimitePorDominio(por_dominio) if por_dominio else None
+    fila: queue.Queue[Envio | None] = queue.Queue(maxsize=workers * 2)
+    resumo = ResumoEntrega()
+    lock = threading.Lock()
+
+    def _processar(sessao: SmtpSession) -> None:
+        while (envio := fila.get()) is not None:
+            if limitador:
+                limitador.aguardar()
+            erro: Exception | None = None
+            enviado = False
+            t0 = time.perf_counter()
+            try:
+                with transacao(envio) if transacao else nullcontext(True) as deve_enviar:
+                    if deve_enviar:
+                        with (
+                            dominios.reservar(str(envio.mensagem["To"]))
+                            if dominios
+                            else nullcontext()
+                        ):
+                            sessao.enviar(envio.mensagem)
+                        enviado = True
+            except Exception as e:
+                erro = e
+            latencia = time.perf_counter() - t0
+            with lock:
+                if erro is not None:
+                    resumo.falhas += 1
+                elif enviado:
+                    resumo.enviados += 1
+                    resumo.registrar_latencia(latencia)
+                else:
+                    resumo.pulados += 1
+            if ao_concluir and (erro is not None or enviado):
+                try:
+                    ao_concluir(envio, latencia, erro)
+                except Exception:
+                    log.error("Falha no callback de conclusão do envio", exc_info=True)
+
+    def _worker() -> None:
+        try:
+            with SmtpSession(config, max_mensagens=max_mensagens) as sessao:
+                _processar(sessao)
+            with lock:
+                resumo.conexoes += sessao.conexoes
+        except Exception:
+            log.error("Worker %s parou", threading.current_thread().name, exc_info=True)
+
+    def _colocar(item: Envio | None) -> bool:
+        while any(t.is_alive() for t in threads):
+            try:
+                fila.put(item, timeout=ESPERA_FILA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    inicio = time.perf_counter()
+    threads = [
+        threading.Thread(target=_worker, name=f"smtp-worker-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for envio in envios:
+            if not _colocar(envio):
+                raise RuntimeError("Todos os workers SMTP pararam; entrega interrompida.")
+    finally:
+        for _ in threads:
+            if not _colocar(None):
+                break
+        for t in threads:
+            t.join()
+    resumo.segundos = time.perf_counter() - inicio
+    return resumo
@@ -1,12 +1,39 @@
 import logging
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
 
 import streamlit as st
 
 logger = logging.getLogger("vitally_app")
 
+SESSION_CACHE_KEY = "_vitally_session_cache"
+SESSION_CACHE_TTL = 60.0
+
+
+def load_once(
+    name: str, params: Hashable, loader: Callable[[], Any], ttl: float = SESSION_CACHE_TTL
+) -> Any:
+    cache = st.session_state.setdefault(SESSION_CACHE_KEY, {})
+    agora = time.monotonic()
+    hit = cache.get(name)
+    if hit is not None and hit[0] == params and agora - hit[2] < ttl:
+        return hit[1]
+
+    logger.debug("load_once: carregando %s params=%s", name, params)
+    value = loader()
+    cache[name] = (params, value, agora)
+    return value
+
+
+def clear_session_cache() -> None:
+    logger.debug("Limpando cache de sessão")
+    st.session_state.pop(SESSION_CACHE_KEY, None)
+
 
 def rerun_app() -> None:
     logger.debug("Solicitando rerun do Streamlit")
+    clear_session_cache()
     if hasattr(st, "rerun"):
         st.rerun()
     elif hasattr(st, "experimental_rerun"):
@@ -14,3 +41,43 @@ def rerun_app() -> None:
     else:
         logger.critical("Streamlit sem método de rerun disponível")
         raise RuntimeError("Versão do Streamlit não possui rerun disponível")
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _gerar_export(
+    entidade: str, versao: Hashable, params: Hashable, _build: Callable[[], bytes]
+) -> bytes:
+    logger.debug("Gerando export %s versao=%s params=%s", entidade, versao, params)
+    return _build()
+
+
+def lazy_download_button(
+    rotulo: str,
+    *,
+    key: str,
+    entidade: str,
+    versao: Hashable,
+    params: Hashable,
+    build: Callable[[], bytes],
+    file_name: str,
+    mime: str,
+) -> None:
+    state_key = f"_export_{key}"
+    assinatura = (entidade, versao, params)
+    pronto = st.session_state.get(state_key)
+    slot = st.empty()
+
+    if pronto is None or pronto[0] != assinatura:
+        if not slot.button(f"Gerar {rotulo}", key=f"{key}_gerar"):
+            return
+        pronto = (assinatura, _gerar_export(entidade, versao, params, build))
+        st.session_state[state_key] = pronto
+
+    slot.download_button(
+        label=f"Baixar {rotulo}",
+        data=pronto[1],
+        file_name=file_name,
+        mime=mime,
+        key=key,
+        on_click="ignore",
+    )
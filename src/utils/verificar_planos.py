@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+from collections.abc import Callable
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger("verificar_planos")
+
+SCAN_SQLITE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Roda EXPLAIN nas consultas quentes dos repositórios e falha se alguma "
+            "fizer varredura completa de tabela. Sem --url, usa um SQLite temporário semeado."
+        )
+    )
+    parser.add_argument(
+        "--url",
+        help="Banco existente (já populado) a verificar, em vez do SQLite temporário.",
+    )
+    parser.add_argument("--pacientes", type=int, default=5000, help="Pacientes semeados.")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o plano completo.")
+    return parser.parse_args(argv)
+
+
+def semear(engine, n: int, lote: int = 5000) -> None:
+    from src.db.tables import (
+        AgendaSQL,
+        FisioDisponSQL,
+        FisioterapeutaSQL,
+        LembreteEnviadoSQL,
+        PacienteSQL,
+    )
+
+    hoje = date.today()
+    with engine.begin() as conn:
+        conn.execute(
+            FisioterapeutaSQL.__table__.insert(),
+            [{"nome": f"Fisio {f}", "ativo": True} for f in range(1, 11)],
+        )
+        conn.execute(
+            FisioDisponSQL.__table__.insert(),
+            [
+                {"fisio_id": f, "weekday": wd, "hora_inicio": time(7), "hora_fim": time(20)}
+                for f in range(1, 11)
+                for wd in range(6)
+            ],
+        )
+        for inicio in range(0, n, lote):
+            ids = range(inicio, min(inicio + lote, n))
+            conn.execute(
+                PacienteSQL.__table__.insert(),
+                [
+                    {
+                        "id": i + 1,
+                        "nome": f"Paciente {i}",
+                        "email": f"p{i}@vitally.test",
+                        "ativo": i % 10 != 0,
+                        "data_entrada": hoje - timedelta(days=i % 365),
+                        "data_proxima_cobranca": hoje + timedelta(days=i % 40 - 10),
+                        "dias_aula": (i * 37) % (1 << 7),
+                    }
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                AgendaSQL.__table__.insert(),
+                [
+                    {
+                        "fisio_id": i % 10 + 1,
+                        "paciente_id": i + 1,
+                        "data": hoje + timedelta(days=i % 60 - 30),
+                        "hora_inicio": time(7 + i % 12),
+                        "hora_fim": time(8 + i % 12),
+                        "status": "cancelado" if i % 15 == 0 else "agendado",
+                    }
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                LembreteEnviadoSQL.__table__.insert(),
+                [
+                    {"paciente_id": i + 1, "vencimento": hoje, "tipo": "vencimento_7d"}
+                    for i in ids
+                    if i % 7 == 0
+                ],
+            )
+
+
+def consultas_quentes(fisio_id: int = 1, dia: date | None = None) -> dict[str, Callable]:
+    from src.db.db import SessionLocal
+    from src.repositories.agenda_repository_sql import AgendaRepositorySQL, existe_conflito
+    from src.repositories.paciente_repository_sql import PacienteRepositorySQL
+    from src.utils import send_reminders
+
+    dia = dia or date.today()
+
+    def conflito() -> bool:
+        with SessionLocal() as s:
+            return existe_conflito(s, fisio_id, dia, time(9), time(10))
+
+    return {
+        "pacientes.listar": lambda: PacienteRepositorySQL().listar(only_active=True),
+        "pacientes.vencimentos_proximos": lambda: PacienteRepositorySQL().vencimentos_proximos(),
+        "pacientes.com_aula": lambda: PacienteRepositorySQL().listar_com_aula(dia.weekday()),
+        "agenda.listar_grade": lambda: AgendaRepositorySQL().listar_grade(
+            fisio_id, dia, dia + timedelta(days=6)
+        ),
+        "agenda.conflito": conflito,
+        "lembretes.vencimento": lambda: list(
+            send_reminders.get_pacientes_com_vencimento_em_ate_7_dias()
+        ),
+        "lembretes.sessao": lambda: list(send_reminders.get_sessoes_de_amanha()),
+    }
+
+
+def capturar(engine, fn: Callable) -> list[tuple[str, object]]:
+    from sqlalchemy import event
+
+    consultas: dict[str, object] = {}
+
+    def escuta(conn, cursor, sql, params, context, executemany):
+        if sql.lstrip().upper().startswith("SELECT") and not executemany:
+            consultas.setdefault(sql, params)
+
+    event.listen(engine, "before_cursor_execute", escuta)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", escuta)
+    return list(consultas.items())
+
+
+def _nos_postgres(no: dict):
+    yield no
+    for filho in no.get("Plans", ()):
+        yield from _nos_postgres(filho)
+
+
+def plano(conn, sql: str, params) -> tuple[list[str], list[str]]:
+    if conn.dialect.name == "postgresql":
+        bruto = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar_one()
+        raiz = (json.loads(bruto) if isinstance(bruto, str) else bruto)[0]["Plan"]
+        nos = list(_nos_postgres(raiz))
+        linhas = [f"{n['Node Type']} {n.get('Relation Name', '')}".strip() for n in nos]
+        varridas = [n["Relation Name"] for n in nos if n["Node Type"] == "Seq Scan"]
+        return linhas, varridas
+
+    linhas = [r[-1] for r in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+    varridas = [
+        m.group(1) for linha in linhas if (m := SCAN_SQLITE.match(linha)) and " USING " not in linha
+    ]
+    return linhas, varridas
+
+
+def verificar(engine, consultas: dict[str, Callable], verbose: bool = False) -> dict:
+    falhas: dict[str, list[str]] = {}
+    for nome, fn in consultas.items():
+        capturadas = capturar(engine, fn)
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # sem seq scan, o planner só escolhe varredura completa se nenhum índice servir
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for sql, params in capturadas:
+                linhas, varridas = plano(conn, sql, params)
+                if verbose:
+                    log.info("%s:\n%s\n  %s", nome, sql, "\n  ".join(linhas))
+                if varridas:
+                    falhas.setdefault(nome, []).extend(varridas)
+        if nome in falhas:
+            log.error("%-32s varredura completa em: %s", nome, ", ".join(falhas[nome]))
+        else:
+            log.info("%-32s ok (%d consulta(s))", nome, len(capturadas))
+    return falhas
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if "src.db.db" in sys.modules:
+        raise RuntimeError("A verificação precisa rodar em um processo próprio.")
+
+    with tempfile.TemporaryDirectory(prefix="vitally-planos-") as tmp:
+        os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp}/planos.sqlite3"
+
+        from src.db.db import engine
+        from src.db.migrations import migrar
+
+        if not args.url:
+            migrar(engine)
+            semear(engine, args.pacientes)
+            log.info("Base semeada com %d pacientes", args.pacientes)
+
+        falhas = verificar(engine, consultas_quentes(), verbose=args.verbose)
+        engine.dispose()
+
+    if falhas:
+        log.error("%d consulta(s) com varredura completa", len(falhas))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
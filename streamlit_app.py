@@ -12,11 +12,14 @@ from src.pages import (
     render_edit_pacientes_tab,
     render_fisioterapeutas_disponibilidade_tab,
     render_fisioterapeutas_horarios_tab,
+    render_importar_extrato_tab,
+    render_importar_pacientes_tab,
     render_list_fisioterapeutas_tab,
     render_list_pacientes_tab,
     render_matriz_me_tab,
     render_paciente_classes_tab,
     render_pagamentos_tab,
+    render_previsao_recebimentos_tab,
     render_proximos_pagamentos_tab,
 )
 from src.services.clinica_service import ClinicaService
@@ -59,6 +62,7 @@ def main() -> None:
             ("Lista de pacientes", render_list_pacientes_tab),
             ("Editar pacientes", render_edit_pacientes_tab),
             ("Adicionar pacientes", render_add_pacientes_tab),
+            ("Importar pacientes", render_importar_pacientes_tab),
             ("Aulas dos pacientes", render_paciente_classes_tab),
         ],
         "Fisioterapeuta": [
@@ -68,7 +72,9 @@ def main() -> None:
         ],
         "Pagamento": [
             ("Lista de pagamentos", render_pagamentos_tab),
+            ("Importar extrato", render_importar_extrato_tab),
             ("Proximos pagamentos", render_proximos_pagamentos_tab),
+            ("Previsão de recebimentos", render_previsao_recebimentos_tab),
         ],
         "Matriz": [
             ("Matriz de Mobilidade & Estabilidade", render_matriz_me_tab),
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
+from src.db import tables  # noqa: E402, F401
 from src.db.db import Base, SessionLocal, engine  # noqa: E402
 
 load_dotenv(dotenv_path=ROOT / ".env")
@@ -19,19 +20,19 @@ if not os.getenv("DATABASE_URL"):
 @pytest.fixture(autouse=True)
 def clean_db():
     from src.db.db import engine
-    from src.db.tables import PacienteSQL
-
-    table_name = PacienteSQL.__table__.name
 
     with engine.begin() as conn:
-        if engine.dialect.name == "sqlite":
-            conn.exec_driver_sql(f'DELETE FROM "{table_name}";')
-            try:
-                conn.exec_driver_sql(f"DELETE FROM sqlite_sequence WHERE name='{table_name}';")
-            except Exception:
-                pass
-        else:
-            conn.exec_driver_sql(f'TRUNCATE TABLE "{table_name}" RESTART IDENTITY CASCADE;')
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name == "users":
+                continue
+            if engine.dialect.name == "sqlite":
+                conn.exec_driver_sql(f'DELETE FROM "{table.name}";')
+                try:
+                    conn.exec_driver_sql(f"DELETE FROM sqlite_sequence WHERE name='{table.name}';")
+                except Exception:
+                    pass
+            else:
+                conn.exec_driver_sql(f'TRUNCATE TABLE "{table.name}" RESTART IDENTITY CASCADE;')
     yield
 
 
@@ -0,0 +1,110 @@
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from src.db.db import SessionLocal
+from src.db.tables import AgendaSQL
+from src.services.clinica_service import ClinicaService
+
+THREADS = 16
+
+
+def test_reservas_concorrentes_nao_sobrepoem_horarios():
+    svc = ClinicaService()
+    fisio = svc.criar_fisioterapeuta("Dra. Ana", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "18:00")])
+    pacientes = [
+        svc.cadastrar_paciente(
+            nome=f"P{i}", email=None, telefone=None, data_entrada=date(2025, 1, 1)
+        ).id
+        for i in range(THREADS)
+    ]
+    horarios = ["09:00", "09:30", "10:00", "10:15"]
+    largada = threading.Barrier(THREADS)
+    erros = []
+
+    def reservar(i: int) -> None:
+        try:
+            largada.wait()
+            ClinicaService().definir_aulas_paciente(
+                paciente_id=pacientes[i],
+                aulas=[(0, horarios[i % len(horarios)])],
+                fisioterapeuta_id=fisio.id,
+                duracao_min=60,
+                semanas=3,
+                data_inicio=date(2025, 6, 2),
+            )
+        except Exception as exc:
+            erros.append(exc)
+
+    threads = [threading.Thread(target=reservar, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
+
+    with SessionLocal() as s:
+        sessoes = s.execute(
+            select(AgendaSQL.data, AgendaSQL.hora_inicio, AgendaSQL.hora_fim)
+            .where(AgendaSQL.fisio_id == fisio.id)
+            .where(AgendaSQL.status != "cancelado")
+            .order_by(AgendaSQL.data, AgendaSQL.hora_inicio)
+        ).all()
+
+    assert sessoes
+    for (d1, _, fim), (d2, inicio, _) in zip(sessoes, sessoes[1:], strict=False):
+        if d1 == d2:
+            assert datetime.combine(d1, fim) <= datetime.combine(d2, inicio)
+    assert len({d for d, _, _ in sessoes}) == 3
+
+
+def test_reativacoes_concorrentes_nao_sobrepoem_horarios():
+    from datetime import time
+
+    from src.repositories.concorrencia import HorarioOcupado
+
+    svc = ClinicaService()
+    fisio = svc.criar_fisioterapeuta("Dr. Rui", None)
+    with SessionLocal() as s:
+        canceladas = [
+            AgendaSQL(
+                fisio_id=fisio.id,
+                data=date(2025, 6, 2),
+                hora_inicio=time(9, 15 * (i % 3)),
+                hora_fim=time(10, 15 * (i % 3)),
+                status="cancelado",
+            )
+            for i in range(THREADS)
+        ]
+        s.add_all(canceladas)
+        s.commit()
+        ids = [a.id for a in canceladas]
+
+    largada = threading.Barrier(THREADS)
+    ocupados = []
+    erros = []
+
+    def reativar(agenda_id: int) -> None:
+        try:
+            largada.wait()
+            ClinicaService().alterar_status_sessao(agenda_id, "agendado", 1)
+        except HorarioOcupado:
+            ocupados.append(agenda_id)
+        except Exception as exc:
+            erros.append(exc)
+
+    threads = [threading.Thread(target=reativar, args=(i,)) for i in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
+
+    with SessionLocal() as s:
+        ativas = (
+            s.execute(select(AgendaSQL.id).where(AgendaSQL.status != "cancelado")).scalars().all()
+        )
+    assert len(ativas) == 1
+    assert len(ocupados) == THREADS - 1
@@ -40,3 +40,96 @@ def test_service_vencimentos_proximos():
 
     proximos = svc.vencimentos_proximos()
     assert any(x.id == p.id for x in proximos)
+
+
+def test_service_agenda_ics_usa_horarios_reais():
+    svc = ClinicaService()
+    p = svc.cadastrar_paciente(
+        nome="Joana", email=None, telefone=None, data_entrada=date(2025, 1, 5)
+    )
+    fisio = svc.criar_fisioterapeuta("Dra. Lia", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "18:00")])
+
+    inicio = date(2025, 6, 2)
+    svc.definir_aulas_paciente(
+        paciente_id=p.id,
+        aulas=[(0, "09:30")],
+        fisioterapeuta_id=fisio.id,
+        duracao_min=45,
+        semanas=2,
+        data_inicio=inicio,
+    )
+
+    ics = b"".join(svc.agenda_ics(inicio, inicio + timedelta(days=30), paciente_id=p.id)).decode(
+        "utf-8"
+    )
+    assert ics.count("BEGIN:VEVENT") == 2
+    assert "DTSTART;TZID=America/Sao_Paulo:20250602T093000" in ics
+    assert "DTEND;TZID=America/Sao_Paulo:20250609T101500" in ics
+    assert "SUMMARY:Aula de Pilates - Joana" in ics
+
+    assert svc.versao_agenda(inicio, inicio + timedelta(days=30), fisio_id=fisio.id)[0] == 2
+
+
+def test_service_status_da_sessao_com_versao():
+    import pytest
+
+    from src.repositories.concorrencia import ConflitoVersao
+
+    svc = ClinicaService()
+    p = svc.cadastrar_paciente(
+        nome="Kauê", email=None, telefone=None, data_entrada=date(2025, 1, 5)
+    )
+    fisio = svc.criar_fisioterapeuta("Dr. Rui", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "18:00")])
+    inicio = date(2025, 6, 2)
+    svc.definir_aulas_paciente(
+        paciente_id=p.id,
+        aulas=[(0, "09:00")],
+        fisioterapeuta_id=fisio.id,
+        duracao_min=60,
+        semanas=1,
+        data_inicio=inicio,
+    )
+    sessao = svc.grade_do_fisio(fisio.id, inicio, inicio)[0]
+    antes = svc.versao_agenda(inicio, inicio, fisio_id=fisio.id)
+
+    assert svc.alterar_status_sessao(sessao.id, "cancelado", sessao.version) == 2
+    with pytest.raises(ConflitoVersao):
+        svc.alterar_status_sessao(sessao.id, "agendado", sessao.version)
+    assert svc.versao_agenda(inicio, inicio, fisio_id=fisio.id) != antes
+
+
+def test_service_deletar_paciente_remove_agenda_futura():
+    svc = ClinicaService()
+    p = svc.cadastrar_paciente(nome="Lara", email=None, telefone=None, data_entrada=date.today())
+    fisio = svc.criar_fisioterapeuta("Dr. Caio", None)
+    inicio = date.today() - timedelta(days=7)
+    svc.definir_disponibilidades_fisio(fisio.id, [(inicio.weekday(), "08:00", "18:00")])
+    svc.definir_aulas_paciente(
+        paciente_id=p.id,
+        aulas=[(inicio.weekday(), "09:00")],
+        fisioterapeuta_id=fisio.id,
+        semanas=3,
+        data_inicio=inicio,
+    )
+    fim = inicio + timedelta(days=14)
+    antes = svc.versao_agenda(inicio, fim, fisio_id=fisio.id)
+
+    svc.deletar_paciente(p.id)
+
+    assert [ag.data for ag in svc.grade_do_fisio(fisio.id, inicio, fim)] == [inicio]
+    assert svc.aulas_do_paciente(p.id) == []
+    assert svc.versao_agenda(inicio, fim, fisio_id=fisio.id) != antes
+    ics = b"".join(svc.agenda_ics(inicio, fim, fisio_id=fisio.id)).decode("utf-8")
+    assert ics.count("BEGIN:VEVENT") == 1
+    assert "Lara" not in ics
+
+
+def test_service_disponibilidades_ignoram_as_substituidas():
+    svc = ClinicaService()
+    fisio = svc.criar_fisioterapeuta("Dra. Eva", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "12:00")])
+    svc.definir_disponibilidades_fisio(fisio.id, [(2, "14:00", "18:00"), (1, "09:00", "10:00")])
+
+    assert [d.weekday for d in svc.disponibilidades_fisio(fisio.id)] == [1, 2]
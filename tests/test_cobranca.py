@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from datetime import time as dtime
+
+import numpy as np
+import pytest
+
+from src.db.db import SessionLocal
+from src.db.tables import AgendaSQL, PacienteSQL
+from src.repositories.cobranca_repository_sql import CobrancaRepositorySQL
+from src.services.clinica_service import ClinicaService
+from src.utils import recalcular_cobrancas
+from src.utils.cobranca_utils import proximas_cobrancas
+
+
+def test_motor_vetorizado_por_plano():
+    bases = np.array(["2025-01-31", "2025-01-31", "2025-03-15", "2025-03-15"], "datetime64[D]")
+    proximas = proximas_cobrancas(
+        np.array(["dias_30", "mensal", "mensal", "pacote"], dtype=object),
+        np.array([np.nan, 31, 10, np.nan]),
+        bases,
+        np.array([None, None, None, None], dtype="datetime64[D]"),
+    )
+    assert proximas.astype(date).tolist() == [
+        date(2025, 3, 2),
+        date(2025, 2, 28),
+        date(2025, 4, 10),
+        date(2025, 4, 14),
+    ]
+
+
+def _pacientes(svc: ClinicaService, n: int, entrada: date) -> list[int]:
+    return [
+        svc.cadastrar_paciente(nome=f"P{i}", email="", telefone="", data_entrada=entrada).id
+        for i in range(n)
+    ]
+
+
+def test_mudanca_de_plano_recalcula_todos_em_lote():
+    svc = ClinicaService()
+    ids = _pacientes(svc, 7, date(2025, 1, 20))
+    svc.registrar_pagamento(ids[0], date(2025, 2, 3))
+
+    resumo = CobrancaRepositorySQL().definir_plano(None, "mensal", dia=5, lote=3)
+
+    assert (resumo.avaliados, resumo.alterados) == (7, 6)
+    with SessionLocal() as s:
+        vencimentos = dict(s.query(PacienteSQL.id, PacienteSQL.data_proxima_cobranca))
+    assert vencimentos[ids[0]] == date(2025, 3, 5)
+    assert {vencimentos[i] for i in ids[1:]} == {date(2025, 2, 5)}
+
+    assert svc.recalcular_cobrancas().alterados == 0
+
+    atual = svc.registrar_pagamento(ids[1], date(2025, 2, 7))
+    assert atual.data_proxima_cobranca == date(2025, 3, 5)
+
+
+def test_falha_no_meio_do_recalculo_nao_grava_nada(monkeypatch):
+    from src.repositories import cobranca_repository_sql
+
+    svc = ClinicaService()
+    _pacientes(svc, 5, date(2025, 1, 20))
+    calcular = cobranca_repository_sql.calcular_cobrancas
+    chamadas = []
+
+    def falha_no_segundo_lote(*args, **kwargs):
+        chamadas.append(1)
+        if len(chamadas) == 2:
+            raise RuntimeError("falhou no meio")
+        return calcular(*args, **kwargs)
+
+    monkeypatch.setattr(cobranca_repository_sql, "calcular_cobrancas", falha_no_segundo_lote)
+    with pytest.raises(RuntimeError):
+        CobrancaRepositorySQL().definir_plano(None, "mensal", dia=5, lote=2)
+
+    with SessionLocal() as s:
+        planos = set(s.query(PacienteSQL.plano_tipo, PacienteSQL.data_proxima_cobranca))
+    assert planos == {("dias_30", date(2025, 2, 19))}
+
+
+def test_plano_por_pacote_cobra_na_primeira_sessao_nao_coberta():
+    svc = ClinicaService()
+    pid = _pacientes(svc, 1, date(2025, 3, 1))[0]
+    fisio = svc.criar_fisioterapeuta("Dra. Lia", None)
+    with SessionLocal() as s:
+        for i, status in enumerate(["agendado", "cancelado", "agendado", "agendado", "agendado"]):
+            s.add(
+                AgendaSQL(
+                    fisio_id=fisio.id,
+                    paciente_id=pid,
+                    data=date(2025, 3, 3) + timedelta(days=7 * i),
+                    hora_inicio=dtime(9, 0),
+                    hora_fim=dtime(9, 45),
+                    status=status,
+                )
+            )
+        s.commit()
+
+    svc.definir_plano_cobranca([pid], "pacote", sessoes=2)
+    with SessionLocal() as s:
+        assert s.get(PacienteSQL, pid).data_proxima_cobranca == date(2025, 3, 24)
+
+    svc.definir_plano_cobranca([pid], "pacote", sessoes=8)
+    with SessionLocal() as s:
+        assert s.get(PacienteSQL, pid).data_proxima_cobranca == date(2025, 3, 31)
+
+
+def test_plano_invalido_e_rejeitado():
+    with pytest.raises(ValueError):
+        CobrancaRepositorySQL().definir_plano(None, "mensal", dia=40)
+
+
+def test_cli_dry_run_nao_grava(monkeypatch):
+    svc = ClinicaService()
+    ids = _pacientes(svc, 3, date(2025, 1, 10))
+
+    assert (
+        recalcular_cobrancas.main(["--todos", "--plano", "mensal", "--dia", "1", "--dry-run"]) == 0
+    )
+    with SessionLocal() as s:
+        linhas = s.query(PacienteSQL.plano_tipo, PacienteSQL.data_proxima_cobranca).all()
+    assert set(linhas) == {("dias_30", date(2025, 2, 9))}
+
+    ids_arg = ",".join(map(str, ids[:2]))
+    assert recalcular_cobrancas.main(["--ids", ids_arg, "--plano", "mensal", "--dia", "1"]) == 0
+    with SessionLocal() as s:
+        por_id = dict(s.query(PacienteSQL.id, PacienteSQL.data_proxima_cobranca))
+    assert [por_id[i] for i in ids] == [date(2025, 2, 1), date(2025, 2, 1), date(2025, 2, 9)]
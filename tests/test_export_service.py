@@ -0,0 +1,113 @@
+import csv
+from datetime import date, time
+
+import pytest
+
+from src.db.db import SessionLocal
+from src.db.tables import AgendaSQL
+from src.services.clinica_service import ClinicaService
+from src.services.export_service import ExportService
+
+
+def _seed_agenda(n: int) -> int:
+    svc = ClinicaService()
+    fisio = svc.criar_fisioterapeuta("Dra. Lia", None)
+    with SessionLocal() as s:
+        s.add_all(
+            AgendaSQL(
+                fisio_id=fisio.id,
+                data=date(2025, 1 + (i % 3), 1 + (i % 28)),
+                hora_inicio=time(9, 0),
+                hora_fim=time(10, 0),
+                status="agendado",
+            )
+            for i in range(n)
+        )
+        s.commit()
+    return fisio.id
+
+
+def test_exportar_pacientes_csv(tmp_path):
+    svc = ClinicaService()
+    for nome in ("Ana", "Bia", "Caio"):
+        svc.cadastrar_paciente(nome=nome, email=None, telefone=None, data_entrada=date(2025, 1, 1))
+
+    destino = tmp_path / "pacientes.csv"
+    resumo = ExportService().exportar("pacientes", destino, chunk=2)
+
+    assert resumo.linhas == 3
+    with open(destino, encoding="utf-8") as f:
+        linhas = list(csv.DictReader(f))
+    assert [r["nome"] for r in linhas] == ["Ana", "Bia", "Caio"]
+    assert linhas[0]["data_entrada"] == "2025-01-01"
+
+
+def test_exportar_agenda_filtra_periodo(tmp_path):
+    _seed_agenda(30)
+
+    resumo = ExportService().exportar(
+        "agenda",
+        tmp_path / "agenda.csv",
+        data_inicio=date(2025, 1, 1),
+        data_fim=date(2025, 1, 31),
+        chunk=4,
+    )
+    assert resumo.linhas == 10
+    assert resumo.linhas_por_segundo > 0
+
+
+def test_exportar_agenda_exige_periodo(tmp_path):
+    with pytest.raises(ValueError):
+        ExportService().exportar("agenda", tmp_path / "agenda.csv")
+
+
+def test_exportar_agenda_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _seed_agenda(12)
+
+    destino = tmp_path / "agenda.parquet"
+    resumo = ExportService().exportar(
+        "agenda",
+        destino,
+        formato="parquet",
+        data_inicio=date(2025, 1, 1),
+        data_fim=date(2025, 12, 31),
+        chunk=5,
+    )
+
+    tabela = pq.read_table(destino)
+    assert resumo.linhas == tabela.num_rows == 12
+    assert tabela.schema.field("hora_inicio").type.bit_width == 64
+
+
+def _ler_jsonl(resumos, tabela):
+    import json
+
+    resumo = next(r for r in resumos if r.tabela == tabela)
+    with open(resumo.destino, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_exportar_incremental_emite_somente_alteracoes(tmp_path):
+    from src.repositories.paciente_repository_sql import PacienteRepositorySQL
+
+    repo = PacienteRepositorySQL()
+    export = ExportService()
+    ana = repo.cadastrar(nome="Ana", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    bia = repo.cadastrar(nome="Bia", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+
+    primeiro = export.exportar_incremental(tmp_path / "1", margem_segundos=0)
+    assert {r["nome"] for r in _ler_jsonl(primeiro, "pacientes")} == {"Ana", "Bia"}
+
+    repo.editar(ana.id, nome="Ana Maria")
+    repo.deletar(bia.id)
+
+    segundo = export.exportar_incremental(tmp_path / "2", margem_segundos=0)
+    alterados = {r["id"]: r for r in _ler_jsonl(segundo, "pacientes")}
+    assert set(alterados) == {ana.id, bia.id}
+    assert alterados[ana.id]["nome"] == "Ana Maria"
+    assert alterados[bia.id]["deleted_at"] is not None
+    assert _ler_jsonl(segundo, "agenda") == []
+
+    terceiro = export.exportar_incremental(tmp_path / "3", margem_segundos=0)
+    assert sum(r.linhas for r in terceiro) == 0
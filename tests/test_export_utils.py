@@ -0,0 +1,103 @@
+import importlib
+import sys
+from datetime import UTC, date, datetime, time
+from types import SimpleNamespace
+
+from src.models.paciente_model import Paciente
+from src.utils import export_utils
+from src.utils.export_utils import build_classes_csv, build_times_csv, iter_agenda_ics
+
+
+def _mk_paciente(**dias) -> Paciente:
+    return Paciente(
+        id=7,
+        nome="Julia",
+        telefone="31999999999",
+        email="j@j.com",
+        data_entrada=date(2025, 1, 1),
+        data_ultimo_pagamento=None,
+        data_proxima_cobranca=date(2025, 1, 31),
+        **dias,
+    )
+
+
+def test_build_classes_csv():
+    linhas = build_classes_csv(_mk_paciente(dias_aula=0b10)).decode("utf-8").splitlines()
+    assert linhas[0] == "PacienteId,Paciente,Dia,Tem Aula"
+    assert linhas[1] == "7,Julia,Segunda,Não"
+    assert linhas[2] == "7,Julia,Terça,Sim"
+    assert len(linhas) == 8
+
+
+def test_build_times_csv_usa_disponibilidades():
+    fisio = SimpleNamespace(id=3, nome="Dra. Lia")
+    janelas = [
+        SimpleNamespace(weekday=0, hora_inicio=time(8, 0), hora_fim=time(12, 0)),
+        SimpleNamespace(weekday=0, hora_inicio=time(14, 0), hora_fim=time(18, 0)),
+        SimpleNamespace(weekday=4, hora_inicio=time(9, 0), hora_fim=time(11, 30)),
+    ]
+    linhas = build_times_csv(fisio, janelas).decode("utf-8").splitlines()
+    assert linhas[0] == "FisioterapeutaID,Fisioterapeuta,Dia,Horários"
+    assert linhas[1] == '3,Dra. Lia,Segunda,"08:00-12:00, 14:00-18:00"'
+    assert linhas[2] == "3,Dra. Lia,Terça,Sem horário"
+    assert linhas[5] == "3,Dra. Lia,Sexta,09:00-11:30"
+    assert len(linhas) == 8
+
+
+def _evento(i: int, paciente_nome: str | None = "Julia", status: str = "agendado"):
+    return SimpleNamespace(
+        id=i,
+        data=date(2025, 6, 2),
+        hora_inicio=time(9, 0),
+        hora_fim=time(10, 0),
+        status=status,
+        fisio_nome="Dra. Lia",
+        paciente_nome=paciente_nome,
+    )
+
+
+def test_iter_agenda_ics_gera_em_chunks_com_uid_estavel():
+    eventos = [_evento(i) for i in range(1, 6)]
+    chunks = list(
+        iter_agenda_ics(
+            iter(eventos),
+            nome_calendario="Teste",
+            chunk_size=2,
+            dtstamp=datetime(2025, 1, 1, tzinfo=UTC),
+        )
+    )
+
+    assert len(chunks) == 1 + 3 + 1
+    ics = b"".join(chunks).decode("utf-8")
+    assert ics.startswith("BEGIN:VCALENDAR\r\n")
+    assert ics.endswith("END:VCALENDAR\r\n")
+    assert ics.count("BEGIN:VEVENT") == 5
+    assert "UID:agenda-3@vitally" in ics
+    assert "DTSTART;TZID=America/Sao_Paulo:20250602T090000" in ics
+    assert "DTSTAMP:20250101T000000Z" in ics
+
+
+def test_iter_agenda_ics_escapa_e_dobra_linhas():
+    nome = "Silva, Ana; " + "x" * 80
+    ics = b"".join(
+        iter_agenda_ics([_evento(1, nome, "cancelado")], nome_calendario="Teste")
+    ).decode("utf-8")
+
+    assert "SUMMARY:Aula de Pilates - Silva\\, Ana\\; " in ics
+    assert "STATUS:CANCELLED" in ics
+    assert all(len(line.encode("utf-8")) <= 75 for line in ics.split("\r\n"))
+
+
+def test_iter_agenda_ics_sem_eventos():
+    ics = b"".join(iter_agenda_ics([], nome_calendario="Vazio")).decode("utf-8")
+    assert "BEGIN:VEVENT" not in ics
+    assert ics.endswith("END:VCALENDAR\r\n")
+
+
+def test_formatos_sem_pyarrow_omitem_parquet(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    try:
+        assert importlib.reload(export_utils).FORMATOS_TABELA == ("csv", "jsonl")
+    finally:
+        monkeypatch.undo()
+        importlib.reload(export_utils)
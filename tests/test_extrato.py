@@ -0,0 +1,107 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event, func, select
+
+from src.db.db import SessionLocal, engine
+from src.db.tables import PagamentoSQL
+from src.models.paciente_model import PacienteIdentificacao
+from src.services.clinica_service import ClinicaService
+from src.utils.extrato_utils import conciliar, ler_extrato
+
+OFX = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250305120000[-3:BRT]<TRNAMT>180.00<FITID>A1
+<NAME>PIX RECEBIDO ANA SOUZA</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250305<TRNAMT>-50.00<FITID>A2<NAME>TARIFA</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_le_csv_brasileiro_e_ofx():
+    csv = "Data;Valor;Histórico\n05/03/2025;1.234,56;PIX João\n05/03/2025;-10,00;Tarifa\n"
+    linhas = ler_extrato("extrato.csv", csv.encode("latin-1"))
+    assert [(li.data, li.valor, li.descricao) for li in linhas] == [
+        (date(2025, 3, 5), Decimal("1234.56"), "PIX João")
+    ]
+
+    ofx = ler_extrato("extrato.ofx", OFX)
+    assert [(li.data, li.valor, li.referencia) for li in ofx] == [
+        (date(2025, 3, 5), Decimal("180.00"), "ofx:A1")
+    ]
+
+
+def test_conciliacao_por_id_telefone_e_nome():
+    pacientes = [
+        PacienteIdentificacao(1, "Ana Souza", "(11) 98888-7777"),
+        PacienteIdentificacao(2, "Ana", None),
+        PacienteIdentificacao(3, "José Lima", None),
+        PacienteIdentificacao(4, "José Lima", None),
+    ]
+    csv = (
+        "data,valor,descricao,paciente_id\n"
+        "2025-03-05,150,qualquer,2\n"
+        "2025-03-05,150,PIX +55 11 98888-7777,\n"
+        "2025-03-05,150,TED ANA SOUZA,\n"
+        "2025-03-05,150,PIX JOSE LIMA,\n"
+        "2025-03-05,150,DOC desconhecido,\n"
+        "2025-03-05,150,x,99\n"
+    )
+    resultado = conciliar(ler_extrato("e.csv", csv.encode()), pacientes)
+
+    assert [(c.paciente_id, c.criterio, c.motivo) for c in resultado] == [
+        (2, "id", None),
+        (1, "telefone", None),
+        (1, "nome", None),
+        (None, None, "nome ambíguo"),
+        (None, None, "sem correspondência"),
+        (None, None, "id não encontrado"),
+    ]
+
+
+def test_registra_extrato_em_uma_transacao_e_nao_duplica():
+    svc = ClinicaService()
+    ids = [
+        svc.cadastrar_paciente(
+            nome=f"Paciente {i}", email=None, telefone=None, data_entrada=date(2025, 2, 1)
+        ).id
+        for i in range(200)
+    ]
+    linhas = "".join(f"0{1 + i % 5}/03/2025;150,00;PIX;{pid}\n" for i, pid in enumerate(ids))
+    dados = ("data;valor;descricao;paciente_id\n" + linhas).encode()
+
+    conciliacoes = svc.conciliar_extrato("marco.csv", dados)
+    assert all(c.criterio == "id" for c in conciliacoes)
+
+    comandos = []
+    escuta = lambda *a: comandos.append(a[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", escuta)
+    try:
+        assert svc.registrar_extrato(conciliacoes, "pix") == (200, 0)
+    finally:
+        event.remove(engine, "before_cursor_execute", escuta)
+    assert sum(c.lstrip().upper().startswith("INSERT") for c in comandos) == 1
+
+    p = svc.listar_pacientes(only_active=True)[0]
+    assert p.data_ultimo_pagamento == date(2025, 3, 1)
+    assert p.data_proxima_cobranca == date(2025, 3, 31)
+
+    de_novo = svc.conciliar_extrato("marco.csv", dados)
+    assert {c.motivo for c in de_novo} == {"já importado"}
+    assert svc.registrar_extrato(conciliacoes, "pix") == (0, 200)
+    with SessionLocal() as s:
+        assert s.execute(select(func.count(PagamentoSQL.id))).scalar_one() == 200
+
+
+def test_ofx_sem_fitid_e_referencias_repetidas_no_lote():
+    from src.models.pagamento_model import Lancamento
+    from src.repositories.pagamento_repository_sql import PagamentoRepositorySQL
+
+    transacao = b"<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250305<TRNAMT>90.00<NAME>PIX</STMTTRN>"
+    linhas = ler_extrato("e.ofx", b"<OFX>" + transacao * 2 + b"</OFX>")
+    assert len({li.referencia for li in linhas}) == 2
+
+    svc = ClinicaService()
+    p = svc.cadastrar_paciente(nome="Ana", email=None, telefone=None, data_entrada=date(2025, 2, 1))
+    lanc = Lancamento(p.id, date(2025, 3, 5), Decimal("90"), "pix", referencia=linhas[0].referencia)
+    assert PagamentoRepositorySQL().registrar_lote([lanc, lanc]) == (1, 1)
@@ -0,0 +1,87 @@
+import time
+from datetime import date, timedelta
+from datetime import time as dtime
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from src.db.db import SessionLocal
+from src.db.tables import PacienteAulaSQL, PacienteSQL
+from src.services.clinica_service import ClinicaService
+from src.utils import importacao_utils
+from src.utils.add_utils import emails_invalidos, erros_telefone, is_valid_email, validate_br_phone
+
+
+def test_validacao_vetorizada_igual_a_escalar():
+    emails = ["ana@x.com", "sem-arroba", "", "a b@c.d", "x@y"]
+    telefones = ["31999999999", "3130000000", "0199999999", "31899999999", "123"]
+
+    assert emails_invalidos(pd.Series(emails)).tolist() == [not is_valid_email(e) for e in emails]
+    assert erros_telefone(pd.Series(telefones)).tolist() == [
+        validate_br_phone(t)[1] or "" for t in telefones
+    ]
+
+
+def test_importacao_reporta_todos_os_erros_e_grava_validos():
+    futuro = (date.today() + timedelta(days=3)).strftime("%d/%m/%Y")
+    csv = (
+        "Nome;E-mail;Telefone;Data entrada;Aulas\n"
+        "Ana;ana@x.com;(31) 99999-9999;01/02/2025;seg 08:00 | qua 18:30\n"
+        ";bia@x.com;31999999999;;\n"
+        "Caio;caio@;123;31/02/2025;xyz 10:00\n"
+        "Duda;dup@x.com;;;\n"
+        "Edu;DUP@x.com;;" + futuro + ";\n"
+    )
+    svc = ClinicaService()
+
+    resultado = svc.importar_pacientes("pacientes.csv", csv.encode())
+
+    assert (resultado.validos, resultado.importados) == (1, 1)
+    assert [(e.linha, e.campo) for e in resultado.erros] == [
+        (3, "nome"),
+        (4, "email"),
+        (4, "telefone"),
+        (4, "data_entrada"),
+        (4, "aulas"),
+        (5, "email"),
+        (6, "email"),
+        (6, "data_entrada"),
+    ]
+
+    ana = svc.listar_pacientes(only_active=True)[0]
+    assert (ana.nome, ana.telefone, ana.data_entrada) == ("Ana", "31999999999", date(2025, 2, 1))
+    assert ana.data_proxima_cobranca == date(2025, 3, 3)
+    assert [ana.tem_aula(wd) for wd in range(3)] == [True, False, True]
+    assert sorted((a.weekday, a.hora) for a in svc.aulas_do_paciente(ana.id)) == [
+        (0, dtime(8, 0)),
+        (2, dtime(18, 30)),
+    ]
+
+
+def test_importa_3000_pacientes_em_lotes():
+    linhas = "".join(
+        f"Paciente {i},p{i}@x.com,319{i:08d},01/03/2025,ter 07:00 | qui 07:00\n"
+        for i in range(3000)
+    )
+    dados = ("nome,email,telefone,data_entrada,aulas\n" + linhas).encode()
+
+    inicio = time.perf_counter()
+    resultado = ClinicaService().importar_pacientes("clinica.csv", dados)
+    duracao = time.perf_counter() - inicio
+
+    assert (resultado.importados, resultado.erros) == (3000, [])
+    assert duracao < 5
+    with SessionLocal() as s:
+        assert s.execute(select(func.count(PacienteSQL.id))).scalar_one() == 3000
+        assert s.execute(select(func.count(PacienteAulaSQL.id))).scalar_one() == 6000
+        ultimo = s.execute(select(PacienteSQL).order_by(PacienteSQL.id.desc())).scalars().first()
+        assert ultimo.nome == "Paciente 2999"
+        assert ultimo.dias_aula == 0b1010
+
+
+def test_xlsx_recusado_sem_openpyxl(monkeypatch):
+    monkeypatch.setattr(importacao_utils, "FORMATOS_PLANILHA", ("csv",))
+
+    with pytest.raises(ValueError, match="Formato não suportado: .xlsx"):
+        importacao_utils.ler_planilha("pacientes.xlsx", b"PK")
@@ -0,0 +1,122 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from src.db.db import Base, SessionLocal, engine
+from src.db.migrations import MIGRACOES, migrar
+from src.repositories.agenda_repository_sql import AgendaRepositorySQL, existe_conflito
+from src.repositories.paciente_repository_sql import PacienteRepositorySQL
+from src.services.clinica_service import ClinicaService
+from src.utils.verificar_planos import capturar, plano
+
+ESQUEMA_ANTIGO = """
+CREATE TABLE pacientes (
+    id INTEGER NOT NULL, nome VARCHAR NOT NULL, email VARCHAR, telefone VARCHAR,
+    data_entrada DATE, data_ultimo_pagamento DATE, data_proxima_cobranca DATE,
+    ativo BOOLEAN NOT NULL, aula_seg BOOLEAN NOT NULL, aula_ter BOOLEAN NOT NULL,
+    aula_qua BOOLEAN NOT NULL, aula_qui BOOLEAN NOT NULL, aula_sex BOOLEAN NOT NULL,
+    aula_sab BOOLEAN NOT NULL, aula_dom BOOLEAN NOT NULL, PRIMARY KEY (id)
+);
+CREATE INDEX ix_pacientes_id ON pacientes (id);
+CREATE TABLE users (
+    id INTEGER NOT NULL, email VARCHAR NOT NULL, name VARCHAR, password_hash VARCHAR NOT NULL,
+    is_active BOOLEAN NOT NULL, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE TABLE fisioterapeutas (
+    id INTEGER NOT NULL, nome VARCHAR NOT NULL, email VARCHAR, ativo BOOLEAN NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_fisioterapeutas_email ON fisioterapeutas (email);
+CREATE TABLE fisio_disponibilidades (
+    id INTEGER NOT NULL,
+    fisio_id INTEGER NOT NULL REFERENCES fisioterapeutas (id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL, hora_inicio TIME NOT NULL, hora_fim TIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE paciente_aulas (
+    id INTEGER NOT NULL,
+    paciente_id INTEGER NOT NULL REFERENCES pacientes (id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL, hora TIME NOT NULL, PRIMARY KEY (id)
+);
+CREATE TABLE agenda (
+    id INTEGER NOT NULL,
+    fisio_id INTEGER NOT NULL REFERENCES fisioterapeutas (id) ON DELETE CASCADE,
+    paciente_id INTEGER REFERENCES pacientes (id) ON DELETE SET NULL,
+    data DATE NOT NULL, hora_inicio TIME NOT NULL, hora_fim TIME NOT NULL,
+    status VARCHAR NOT NULL, PRIMARY KEY (id)
+);
+CREATE INDEX ix_agenda_data ON agenda (data);
+INSERT INTO pacientes VALUES
+    (1, 'Ana', NULL, NULL, '2025-01-01', NULL, '2025-01-31', 1, 1, 0, 1, 0, 0, 0, 1);
+INSERT INTO fisioterapeutas VALUES (1, 'Dr. Leo', NULL, 1);
+INSERT INTO agenda VALUES (1, 1, 1, '2025-06-02', '09:00:00', '10:00:00', 'marcado')
+"""
+
+
+def test_migra_banco_antigo_e_e_idempotente(tmp_path):
+    antigo = create_engine(f"sqlite:///{tmp_path}/antigo.sqlite3")
+    with antigo.begin() as conn:
+        for comando in ESQUEMA_ANTIGO.split(";"):
+            if comando.strip():
+                conn.exec_driver_sql(comando)
+
+    assert migrar(antigo) == [f"{v:04d}_{nome}" for v, nome, _ in MIGRACOES]
+    assert migrar(antigo) == []
+
+    insp = inspect(antigo)
+    colunas = {c["name"] for c in insp.get_columns("pacientes")}
+    assert {"plano_tipo", "plano_valor", "version", "dias_aula"} <= colunas
+    assert not any(c.startswith("aula_") for c in colunas)
+    assert "version" in {c["name"] for c in insp.get_columns("agenda")}
+    for tabela in Base.metadata.sorted_tables:
+        existentes = {c["name"] for c in insp.get_columns(tabela.name)}
+        assert {c.name for c in tabela.columns} <= existentes, tabela.name
+    assert "ix_agenda_updated_at" in {i["name"] for i in insp.get_indexes("agenda")}
+    assert "ix_agenda_fisio_data_hora" in {i["name"] for i in insp.get_indexes("agenda")}
+    assert "fisio_disponibilidades" in insp.get_table_names()
+    with antigo.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT plano_tipo, version, dias_aula FROM pacientes"
+        ).one() == ("dias_30", 1, 0b1000101)
+        assert conn.exec_driver_sql(
+            "SELECT updated_at IS NOT NULL, deleted_at FROM agenda"
+        ).one() == (1, None)
+    antigo.dispose()
+
+
+def _planos(fn) -> list[tuple[str, str]]:
+    with engine.connect() as conn:
+        return [
+            (sql, " | ".join(plano(conn, sql, params)[0])) for sql, params in capturar(engine, fn)
+        ]
+
+
+def test_consultas_quentes_usam_indices():
+    if engine.dialect.name != "sqlite":
+        pytest.skip("asserções de plano escritas para o EXPLAIN QUERY PLAN do SQLite")
+    svc = ClinicaService()
+    fisio = svc.criar_fisioterapeuta("Dr. Leo", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "18:00")])
+    svc.cadastrar_paciente(nome="Bia", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+
+    ((_, vencimentos),) = _planos(PacienteRepositorySQL().vencimentos_proximos)
+    assert "USING INDEX ix_pacientes_ativos_vencimento" in vencimentos
+
+    ((_, ativos),) = _planos(lambda: PacienteRepositorySQL().listar(only_active=True))
+    assert "USING INDEX ix_pacientes_ativos" in ativos
+
+    ((_, com_aula),) = _planos(lambda: PacienteRepositorySQL().listar_com_aula(2))
+    assert "USING INDEX ix_pacientes_ativos_dias_aula" in com_aula
+
+    ((_, grade),) = _planos(
+        lambda: AgendaRepositorySQL().listar_grade(fisio.id, date(2025, 6, 2), date(2025, 6, 8))
+    )
+    assert "USING INDEX ix_agenda_fisio_data_hora" in grade
+
+    with SessionLocal() as s:
+        ((_, conflito),) = _planos(
+            lambda: existe_conflito(s, fisio.id, date(2025, 6, 2), time(9), time(10))
+        )
+    assert "USING INDEX ix_agenda_fisio_data_hora" in conflito
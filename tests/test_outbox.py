@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+
+import pytest
+
+from src.db.db import SessionLocal
+from src.db.tables import OutboxSQL
+from src.repositories.outbox_repository_sql import OutboxRepositorySQL, enfileirar
+from src.services.clinica_service import ClinicaService
+from src.utils import outbox_worker, send_reminders
+from src.utils.smtp_sink import SmtpSink
+
+
+def _enfileirar(n: int, destinatario: str = "p@vitally.test") -> None:
+    with SessionLocal() as s:
+        for i in range(n):
+            enfileirar(s, tipo="teste", destinatario=destinatario, assunto=f"A{i}", texto="Olá")
+        s.commit()
+
+
+@pytest.fixture()
+def smtp_env(monkeypatch):
+    with SmtpSink() as sink:
+        monkeypatch.setenv("SMTP_HOST", sink.host)
+        monkeypatch.setenv("SMTP_PORT", str(sink.port))
+        monkeypatch.setenv("SMTP_FROM", "clinica@vitally.test")
+        monkeypatch.setenv("SMTP_SECURITY", "nenhuma")
+        yield sink
+
+
+def test_reivindicar_nao_sobrepoe_lotes():
+    _enfileirar(5)
+    repo = OutboxRepositorySQL()
+
+    a = repo.reivindicar(3, timedelta(minutes=5))
+    b = repo.reivindicar(3, timedelta(minutes=5))
+
+    assert [m.assunto for m in a] == ["A0", "A1", "A2"]
+    assert [m.assunto for m in b] == ["A3", "A4"]
+    assert repo.reivindicar(3, timedelta(minutes=5)) == []
+
+
+def test_lease_expirado_pode_ser_reassumido():
+    _enfileirar(1)
+    repo = OutboxRepositorySQL()
+
+    antigo = repo.reivindicar(1, timedelta(seconds=-1))[0]
+    novo = repo.reivindicar(1, timedelta(minutes=5))[0]
+
+    assert novo.id == antigo.id
+    assert not repo.concluir(antigo)
+    assert repo.concluir(novo)
+    assert repo.contar_por_status() == {"enviado": 1}
+
+
+def test_falha_aplica_backoff_exponencial_e_desiste():
+    _enfileirar(1)
+    repo = OutboxRepositorySQL()
+
+    item = repo.reivindicar(1, timedelta(minutes=5))[0]
+    repo.falhar(item, "timeout", max_tentativas=3, backoff=timedelta(seconds=60))
+    assert repo.reivindicar(1, timedelta(minutes=5)) == []
+
+    with SessionLocal() as s:
+        row = s.get(OutboxSQL, item.id)
+        assert (row.status, row.tentativas, row.ultimo_erro) == ("pendente", 1, "timeout")
+        assert row.disponivel_em > row.criado_em + timedelta(seconds=59)
+        row.disponivel_em = row.criado_em
+        row.tentativas = 2
+        s.commit()
+
+    item = repo.reivindicar(1, timedelta(minutes=5))[0]
+    repo.falhar(item, "timeout", max_tentativas=3, backoff=timedelta(seconds=60))
+    assert repo.contar_por_status() == {"falhou": 1}
+
+
+def test_agenda_enfileira_confirmacao_na_mesma_transacao():
+    svc = ClinicaService()
+    p = svc.cadastrar_paciente(
+        nome="Joana", email="joana@vitally.test", telefone=None, data_entrada=date(2025, 1, 5)
+    )
+    fisio = svc.criar_fisioterapeuta("Dra. Lia", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "18:00")])
+    svc.definir_aulas_paciente(
+        paciente_id=p.id,
+        aulas=[(0, "09:30")],
+        fisioterapeuta_id=fisio.id,
+        semanas=2,
+        data_inicio=date(2025, 6, 2),
+    )
+
+    itens = OutboxRepositorySQL().reivindicar(10, timedelta(minutes=5))
+    assert len(itens) == 1
+    assert itens[0].tipo == "agenda_confirmacao"
+    assert itens[0].destinatario == "joana@vitally.test"
+    assert "02/06/2025 às 09:30" in itens[0].texto
+    assert "09/06/2025 às 09:30" in itens[0].texto
+
+
+def test_worker_envia_lembretes_enfileirados(smtp_env):
+    svc = ClinicaService()
+    hoje = date.today()
+    for i in range(3):
+        p = svc.cadastrar_paciente(
+            nome=f"P{i}", email=f"p{i}@vitally.test", telefone=None, data_entrada=hoje
+        )
+        svc.registrar_pagamento(p.id, hoje - timedelta(days=27))
+
+    assert send_reminders.main(["--outbox"]) == 0
+    assert send_reminders.main(["--outbox"]) == 0
+    assert smtp_env.mensagens == []
+
+    assert outbox_worker.main(["--lote", "2"]) == 0
+    assert sorted(m["To"] for m in smtp_env.parsed()) == [f"p{i}@vitally.test" for i in range(3)]
+    assert OutboxRepositorySQL().contar_por_status() == {"enviado": 3}
+
+
+def test_alterar_status_enfileira_aviso_na_mesma_transacao():
+    svc = ClinicaService()
+    p = svc.cadastrar_paciente(
+        nome="Rui", email="rui@vitally.test", telefone=None, data_entrada=date(2025, 1, 5)
+    )
+    fisio = svc.criar_fisioterapeuta("Dr. Leo", None)
+    svc.definir_disponibilidades_fisio(fisio.id, [(0, "08:00", "18:00")])
+    svc.definir_aulas_paciente(
+        paciente_id=p.id,
+        aulas=[(0, "10:00")],
+        fisioterapeuta_id=fisio.id,
+        semanas=1,
+        data_inicio=date(2025, 6, 2),
+    )
+    repo = OutboxRepositorySQL()
+    repo.reivindicar(10, timedelta(minutes=5))
+    sessao = svc.grade_do_fisio(fisio.id, date(2025, 6, 2), date(2025, 6, 2))[0]
+
+    svc.alterar_status_sessao(sessao.id, "cancelado", sessao.version)
+    with pytest.raises(ValueError):
+        svc.alterar_status_sessao(sessao.id, "agendado", sessao.version)
+
+    (item,) = repo.reivindicar(10, timedelta(minutes=5))
+    assert (item.tipo, item.destinatario) == ("agenda_alteracao", "rui@vitally.test")
+    assert "02/06/2025 às 10:00 foi cancelada" in item.texto
+
+
+def test_worker_segue_quando_mensagem_ou_registro_falham(smtp_env, monkeypatch):
+    _enfileirar(3)
+    montar = outbox_worker.montar_mensagem
+
+    def _montar(sender, to, assunto, texto, html):
+        if assunto == "A1":
+            raise ValueError("mensagem inválida")
+        return montar(sender, to, assunto, texto, html)
+
+    concluir = OutboxRepositorySQL.concluir
+
+    def _concluir(self, item):
+        if item.assunto == "A2":
+            raise RuntimeError("banco fora")
+        return concluir(self, item)
+
+    monkeypatch.setattr(outbox_worker, "montar_mensagem", _montar)
+    monkeypatch.setattr(OutboxRepositorySQL, "concluir", _concluir)
+
+    assert outbox_worker.main(["--max-tentativas", "1"]) == 1
+    assert sorted(m["Subject"] for m in smtp_env.parsed()) == ["A0", "A2"]
+    assert OutboxRepositorySQL().contar_por_status() == {
+        "enviado": 1,
+        "falhou": 1,
+        "enviando": 1,
+    }
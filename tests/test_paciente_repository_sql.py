@@ -1,5 +1,6 @@
 from datetime import date, timedelta
 
+from src.models.paciente_model import mascara_dias
 from src.repositories.paciente_repository_sql import PacienteRepositorySQL
 
 
@@ -81,3 +82,226 @@ def test_vencimentos_proximos(db_session):
     venc = repo.vencimentos_proximos()
     nomes = {x.nome for x in venc}
     assert nomes == {"Diego"}
+
+
+def test_nomes_por_ids(db_session):
+    repo = _mk_repo()
+    p1 = repo.cadastrar(nome="Gil", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    p2 = repo.cadastrar(nome="Hana", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    repo.cadastrar(nome="Ivo", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+
+    assert repo.nomes_por_ids({p1.id, p2.id}) == {p1.id: "Gil", p2.id: "Hana"}
+    assert repo.nomes_por_ids(set()) == {}
+
+
+def test_listar_pagina_filtra_e_pagina(db_session):
+    repo = _mk_repo()
+    for i in range(5):
+        repo.cadastrar(
+            nome=f"Ana {i}", email=f"ana{i}@x.com", telefone=None, data_entrada=date(2025, 1, 1)
+        )
+    repo.cadastrar(nome="Bruno", email="b@x.com", telefone=None, data_entrada=date(2025, 1, 1))
+
+    pagina, total = repo.listar_pagina(only_active=True, busca="ana", limite=2, offset=2)
+    assert total == 5
+    assert [p.nome for p in pagina] == ["Ana 2", "Ana 3"]
+
+    pagina, total = repo.listar_pagina(only_active=True, busca="B@X", limite=10, offset=0)
+    assert total == 1
+    assert pagina[0].nome == "Bruno"
+
+
+def test_dias_de_aula_por_mascara(db_session):
+    repo = _mk_repo()
+    dias = {"Gil": [0, 2], "Hana": [2, 6], "Ivo": [], "Jade": [2]}
+    ids = {}
+    for nome, weekdays in dias.items():
+        p = repo.cadastrar(nome=nome, email=None, telefone=None, data_entrada=date(2025, 1, 1))
+        repo.editar(p.id, dias_aula=mascara_dias(weekdays))
+        ids[nome] = p.id
+    repo.inativar(ids["Jade"])
+
+    assert [p.nome for p in repo.listar_com_aula(2)] == ["Gil", "Hana"]
+    assert [p.nome for p in repo.listar_com_aula(6)] == ["Hana"]
+    assert repo.contagem_por_dia() == [1, 0, 2, 0, 0, 0, 1]
+
+    import pytest
+
+    with pytest.raises(ValueError):
+        repo.editar(ids["Ivo"], dias_aula=1 << 7)
+
+
+def test_acoes_em_lote(db_session):
+    repo = _mk_repo()
+    ids = [
+        repo.cadastrar(nome=n, email=None, telefone=None, data_entrada=date(2025, 1, 1)).id
+        for n in ("Caio", "Duda", "Enzo")
+    ]
+
+    quando = date(2025, 3, 1)
+    assert repo.registrar_pagamentos(ids[:2], quando) == 2
+    assert repo.inativar_varios(ids[1:]) == 2
+
+    por_id = {p.id: p for p in repo.listar(only_active=False)}
+    assert por_id[ids[0]].data_proxima_cobranca == quando + timedelta(days=30)
+    assert por_id[ids[1]].data_ultimo_pagamento == quando
+    assert por_id[ids[2]].data_ultimo_pagamento is None
+    assert [p.id for p in repo.listar(only_active=True)] == [ids[0]]
+
+
+def test_deletar_marca_deleted_at(db_session):
+    repo = _mk_repo()
+    p = repo.cadastrar(nome="Lia", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+
+    repo.deletar(p.id)
+
+    assert repo.listar(only_active=False) == []
+    from src.db.db import SessionLocal
+    from src.db.tables import PacienteSQL
+
+    with SessionLocal() as s:
+        row = s.get(PacienteSQL, p.id)
+        assert row.deleted_at is not None
+        assert row.ativo is False
+
+
+def test_iter_vencimentos_filtra_janela_shard_e_ledger(db_session):
+    from src.db.db import SessionLocal
+    from src.db.tables import LembreteEnviadoSQL
+
+    repo = _mk_repo()
+    hoje = date.today()
+    ids = []
+    for i in range(6):
+        p = repo.cadastrar(nome=f"P{i}", email=f"p{i}@x.com", telefone=None, data_entrada=hoje)
+        repo.registrar_pagamento(p.id, hoje - timedelta(days=30 - i))
+        ids.append(p.id)
+    atrasado = repo.cadastrar(nome="Atrasado", email=None, telefone=None, data_entrada=hoje)
+    repo.registrar_pagamento(atrasado.id, hoje - timedelta(days=40))
+
+    with SessionLocal() as s:
+        s.add(LembreteEnviadoSQL(paciente_id=ids[0], vencimento=hoje, tipo="t"))
+        s.commit()
+
+    todos = list(repo.iter_vencimentos(hoje + timedelta(days=7), desde=hoje, chunk=2))
+    assert [v.id for v in todos] == ids
+    assert todos[2].vencimento == hoje + timedelta(days=2)
+
+    pendentes = repo.iter_vencimentos(hoje + timedelta(days=7), desde=hoje, sem_lembrete="t")
+    assert [v.id for v in pendentes] == ids[1:]
+
+    shards = [
+        {v.id for v in repo.iter_vencimentos(hoje + timedelta(days=7), shard=(i, 3))}
+        for i in range(3)
+    ]
+    assert set().union(*shards) == set(ids) | {atrasado.id}
+    assert sum(len(x) for x in shards) == len(ids) + 1
+
+
+def _contar_comandos(fn):
+    from sqlalchemy import event
+
+    from src.db.db import engine
+
+    comandos = []
+    escuta = lambda *a: comandos.append(a[2].lstrip().split()[0].upper())  # noqa: E731
+    event.listen(engine, "before_cursor_execute", escuta)
+    try:
+        return fn(), comandos
+    finally:
+        event.remove(engine, "before_cursor_execute", escuta)
+
+
+def test_editar_retorna_diff_com_update_returning(db_session):
+    repo = _mk_repo()
+    p = repo.cadastrar(nome="Mia", email="m@x.com", telefone=None, data_entrada=date(2025, 1, 1))
+
+    (editado, updates), comandos = _contar_comandos(
+        lambda: repo.editar(p.id, nome="Mia", email=" ", dias_aula=0b100)
+    )
+
+    assert updates == {"email": ("m@x.com", None), "dias_aula": (0, 0b100)}
+    assert (editado.email, editado.tem_aula(2)) == (None, True)
+    assert comandos == ["SELECT", "UPDATE"]
+
+    (editado, updates), _ = _contar_comandos(
+        lambda: repo.editar(p.id, data_entrada=date(2025, 2, 1))
+    )
+    assert updates["data_proxima_cobranca"] == (date(2025, 1, 31), date(2025, 3, 3))
+    assert editado.data_proxima_cobranca == date(2025, 3, 3)
+    assert repo.editar(p.id, nome="Mia") == (editado, {})
+
+
+def test_registrar_pagamento_recalcula_vencimento_no_update(db_session):
+    repo = _mk_repo()
+    p = repo.cadastrar(nome="Pia", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    repo.registrar_pagamento(p.id, date(2025, 3, 1))
+
+    pago, comandos = _contar_comandos(lambda: repo.registrar_pagamento(p.id, date(2025, 2, 1)))
+
+    assert (pago.data_ultimo_pagamento, pago.data_proxima_cobranca) == (
+        date(2025, 3, 1),
+        date(2025, 3, 31),
+    )
+    assert comandos == ["SELECT", "INSERT", "UPDATE"]
+
+
+def test_escritas_sem_returning_usam_select(db_session, monkeypatch):
+    import pytest
+
+    from src.db.db import engine
+
+    repo = _mk_repo()
+    p = repo.cadastrar(nome="Noa", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    monkeypatch.setattr(engine.dialect, "update_returning", False)
+
+    editado, updates = repo.editar(p.id, telefone="31999999999")
+    assert (editado.telefone, updates) == ("31999999999", {"telefone": (None, "31999999999")})
+
+    pago, comandos = _contar_comandos(lambda: repo.registrar_pagamento(p.id, date(2025, 3, 1)))
+    assert pago.data_proxima_cobranca == date(2025, 3, 31)
+    assert comandos == ["SELECT", "INSERT", "UPDATE", "SELECT"]
+
+    _, comandos = _contar_comandos(lambda: repo.inativar(p.id))
+    assert comandos == ["UPDATE"]
+    repo.deletar(p.id)
+    with pytest.raises(ValueError):
+        repo.deletar(p.id)
+    with pytest.raises(ValueError):
+        repo.registrar_pagamento(999, date(2025, 3, 1))
+
+
+def test_editar_com_versao_antiga_gera_conflito(db_session):
+    import pytest
+
+    from src.repositories.concorrencia import ConflitoVersao
+
+    repo = _mk_repo()
+    p = repo.cadastrar(nome="Olga", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    assert p.version == 1
+
+    primeira, _ = repo.editar(p.id, nome="Olga Lima", versao=p.version)
+    assert primeira.version == 2
+
+    with pytest.raises(ConflitoVersao):
+        repo.editar(p.id, telefone="31999999999", versao=p.version)
+    with pytest.raises(ConflitoVersao):
+        repo.inativar(p.id, versao=p.version)
+    assert repo.listar(only_active=True)[0].telefone is None
+
+    repo.inativar(p.id, versao=primeira.version)
+    with pytest.raises(ValueError, match="não encontrado"):
+        repo.deletar(999, versao=1)
+
+
+def test_versao_muda_a_cada_escrita(db_session):
+    repo = _mk_repo()
+    p = repo.cadastrar(nome="Rui", email=None, telefone=None, data_entrada=date(2025, 1, 1))
+    antes = repo.versao()
+
+    repo.editar(p.id, telefone="31999999999")
+    depois = repo.versao()
+    assert depois != antes
+
+    repo.deletar(p.id)
+    assert repo.versao() != depois
@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.repositories.paciente_repository_sql import PacienteRepositorySQL
+from src.repositories.pagamento_repository_sql import PagamentoRepositorySQL
+
+
+def _paciente(repo: PacienteRepositorySQL, nome: str):
+    return repo.cadastrar(nome=nome, email="", telefone="", data_entrada=date(2025, 1, 1))
+
+
+def test_pagamentos_ficam_no_historico_e_derivam_vencimento(db_session):
+    pacientes = PacienteRepositorySQL()
+    p = _paciente(pacientes, "Ana")
+
+    pacientes.registrar_pagamento(p.id, date(2025, 3, 1), Decimal("150.00"), "pix")
+    atual = pacientes.registrar_pagamento(p.id, date(2025, 2, 1), Decimal("150.00"), "pix")
+
+    assert atual.data_ultimo_pagamento == date(2025, 3, 1)
+    assert atual.data_proxima_cobranca == date(2025, 3, 31)
+
+    historico, total = PagamentoRepositorySQL().historico(paciente_id=p.id)
+    assert total == 2
+    assert [h.data for h in historico] == [date(2025, 3, 1), date(2025, 2, 1)]
+    assert historico[0].paciente_nome == "Ana"
+    assert historico[0].periodo_fim == date(2025, 3, 30)
+
+
+def test_historico_paginado_e_filtrado_por_periodo(db_session):
+    pacientes = PacienteRepositorySQL()
+    ids = [_paciente(pacientes, f"P{i}").id for i in range(3)]
+    for i in range(5):
+        pacientes.registrar_pagamentos(ids, date(2025, 1, 1) + timedelta(days=30 * i))
+
+    repo = PagamentoRepositorySQL()
+    pagina, total = repo.historico(inicio=date(2025, 1, 15), limite=4, offset=4)
+    assert total == 12
+    assert len(pagina) == 4
+
+    todos, _ = repo.historico(inicio=date(2025, 1, 15), limite=100)
+    assert todos[4:8] == pagina
+
+
+def test_totais_mensais_agrupados_no_banco(db_session):
+    pacientes = PacienteRepositorySQL()
+    a = _paciente(pacientes, "A")
+    b = _paciente(pacientes, "B")
+    pacientes.registrar_pagamento(a.id, date(2025, 1, 10), Decimal("100.00"))
+    pacientes.registrar_pagamento(b.id, date(2025, 1, 20), Decimal("80.50"))
+    pacientes.registrar_pagamento(a.id, date(2025, 2, 9), Decimal("100.00"))
+    pacientes.registrar_pagamento(a.id, date(2025, 4, 9))
+
+    totais = PagamentoRepositorySQL().totais_mensais(date(2025, 1, 1), date(2025, 3, 31))
+
+    assert [(t.ano, t.mes, t.quantidade, t.total) for t in totais] == [
+        (2025, 1, 2, Decimal("180.50")),
+        (2025, 2, 1, Decimal("100.00")),
+    ]
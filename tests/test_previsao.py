@@ -0,0 +1,91 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from src.repositories.cobranca_repository_sql import CobrancaRepositorySQL
+from src.services.clinica_service import ClinicaService
+from src.utils.previsao_utils import previsao_recebimentos
+
+
+def _base(linhas):
+    return pd.DataFrame(
+        linhas,
+        columns=["plano_tipo", "plano_dia", "plano_sessoes", "aulas_semana", "proxima", "valor"],
+    ).assign(proxima=lambda df: pd.to_datetime(df["proxima"]))
+
+
+def test_previsao_mensal_por_plano():
+    base = _base(
+        [
+            ("mensal", 31, None, 2, "2025-01-31", 200.0),
+            ("dias_30", None, None, 2, "2024-12-20", 100.0),
+            ("pacote", None, 8, 2, "2025-02-10", 300.0),
+            ("dias_30", None, None, 0, "2025-03-01", None),
+        ]
+    )
+
+    previsao = previsao_recebimentos(base, date(2025, 1, 1), 3)
+
+    assert previsao["periodo"].astype(str).tolist() == ["2025-01", "2025-02", "2025-03"]
+    # vencido em dez/24 entra no 1º período; pacote de 8 sessões a 2/semana: a cada 28 dias
+    assert previsao["quantidade"].tolist() == [3, 2, 5]
+    assert previsao["valor"].tolist() == [400.0, 500.0, 600.0]
+    assert previsao["sem_valor"].tolist() == [0, 0, 2]
+
+
+def test_previsao_semanal_cobre_todas_as_semanas():
+    base = _base([("dias_30", None, None, 1, "2025-01-08", 50.0)])
+    previsao = previsao_recebimentos(base, date(2025, 1, 1), 2, "semanal")
+
+    assert previsao["quantidade"].sum() == 2
+    assert previsao["inicio"].iloc[0] == date(2024, 12, 30)
+    assert len(previsao) == 9
+
+
+def test_previsao_20k_pacientes_12_meses_abaixo_de_1s():
+    n = 20_000
+    rng = np.random.default_rng(7)
+    base = pd.DataFrame(
+        {
+            "plano_tipo": rng.choice(["dias_30", "mensal", "pacote"], n),
+            "plano_dia": rng.integers(1, 32, n).astype("float64"),
+            "plano_sessoes": rng.integers(4, 13, n).astype("float64"),
+            "aulas_semana": rng.integers(0, 4, n).astype("float64"),
+            "proxima": pd.Timestamp("2025-01-01")
+            + pd.to_timedelta(rng.integers(-40, 40, n), unit="D"),
+            "valor": rng.choice([150.0, 200.0, np.nan], n),
+        }
+    )
+
+    inicio = time.perf_counter()
+    previsao = previsao_recebimentos(base, date(2025, 1, 1), 12)
+    assert time.perf_counter() - inicio < 1.0
+    assert len(previsao) == 12
+
+
+def test_relatorio_de_atrasos_por_faixa():
+    svc = ClinicaService()
+    hoje = date(2025, 6, 30)
+    ids = [
+        svc.cadastrar_paciente(
+            nome=f"P{i}", email=None, telefone=None, data_entrada=hoje - timedelta(days=30 + d)
+        ).id
+        for i, d in enumerate([1, 7, 8, 30, 31, 90, -5])
+    ]
+    CobrancaRepositorySQL().definir_plano(ids[:3], "dias_30", valor=Decimal("120.00"))
+    svc.registrar_pagamento(ids[5], hoje - timedelta(days=200), Decimal("90.00"))
+    svc.inativar_pacientes([ids[4]])
+
+    faixas = svc.relatorio_atrasos(hoje)
+
+    assert [(f.faixa, f.quantidade, f.total, f.sem_valor) for f in faixas] == [
+        ("1-7", 2, Decimal("240.00"), 0),
+        ("8-30", 2, Decimal("120.00"), 1),
+        ("31+", 1, Decimal("90.00"), 0),
+    ]
+
+    previsao = svc.previsao_recebimentos(1, inicio=hoje)
+    assert previsao["quantidade"].tolist() == [5]
@@ -0,0 +1,384 @@
+import smtplib
+import time
+from datetime import date, timedelta
+from datetime import time as dtime
+from email.message import EmailMessage
+
+import pytest
+
+from src.repositories.shard_lease_repository_sql import ShardLeaseRepositorySQL
+from src.utils import send_reminders
+from src.utils.smtp_sink import SmtpSink
+from src.utils.smtp_utils import (
+    Envio,
+    RateLimiter,
+    SmtpConfig,
+    SmtpSession,
+    entregar_concorrente,
+)
+
+
+@pytest.fixture()
+def sink():
+    with SmtpSink() as s:
+        yield s
+
+
+def _cfg(sink: SmtpSink) -> SmtpConfig:
+    return SmtpConfig(host=sink.host, port=sink.port, seguranca="nenhuma", timeout=5)
+
+
+def _msg(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"Teste {i}"
+    msg["From"] = "clinica@vitally.test"
+    msg["To"] = f"p{i}@vitally.test"
+    msg.set_content("Olá")
+    return msg
+
+
+def test_sessao_reutiliza_conexao(sink):
+    with SmtpSession(_cfg(sink)) as sessao:
+        for i in range(5):
+            sessao.enviar(_msg(i))
+
+    assert sessao.conexoes == 1
+    assert sink.conexoes == 1
+    assert [m["Subject"] for m in sink.parsed()] == [f"Teste {i}" for i in range(5)]
+
+
+def test_sessao_rotaciona_apos_max_mensagens(sink):
+    with SmtpSession(_cfg(sink), max_mensagens=2) as sessao:
+        for i in range(5):
+            sessao.enviar(_msg(i))
+
+    assert sessao.conexoes == 3
+    assert len(sink.mensagens) == 5
+
+
+def test_sessao_reconecta_quando_servidor_derruba(sink):
+    with SmtpSession(_cfg(sink)) as sessao:
+        sessao.enviar(_msg(0))
+        sink.derrubar_conexoes()
+        sessao.enviar(_msg(1))
+
+    assert sessao.conexoes == 2
+    assert len(sink.mensagens) == 2
+
+
+def test_entrega_concorrente_usa_uma_sessao_por_worker(sink):
+    envios = (Envio(chave=i, mensagem=_msg(i)) for i in range(20))
+
+    resumo = entregar_concorrente(envios, _cfg(sink), workers=4, por_dominio=2)
+
+    assert resumo.enviados == 20
+    assert resumo.falhas == 0
+    assert resumo.conexoes == 4
+    assert len(resumo.latencias) == 20
+    assert sorted(m["Subject"] for m in sink.parsed()) == sorted(f"Teste {i}" for i in range(20))
+
+
+def test_entrega_concorrente_conta_falhas(sink):
+    ruim = _msg(99)
+    del ruim["To"]
+    vistos = []
+
+    resumo = entregar_concorrente(
+        [Envio(chave=0, mensagem=_msg(0)), Envio(chave=1, mensagem=ruim)],
+        _cfg(sink),
+        workers=2,
+        ao_concluir=lambda envio, _lat, erro: vistos.append((envio.chave, erro is None)),
+    )
+
+    assert (resumo.enviados, resumo.falhas) == (1, 1)
+    assert sorted(vistos) == [(0, True), (1, False)]
+
+
+def test_entrega_concorrente_sobrevive_a_callback_e_worker_mortos(sink, monkeypatch):
+    def _explode(*_a):
+        raise RuntimeError("banco fora")
+
+    envios = (Envio(chave=i, mensagem=_msg(i)) for i in range(10))
+    resumo = entregar_concorrente(envios, _cfg(sink), workers=1, ao_concluir=_explode)
+    assert resumo.enviados == 10
+
+    monkeypatch.setattr(SmtpSession, "__enter__", _explode)
+    with pytest.raises(RuntimeError, match="workers SMTP pararam"):
+        entregar_concorrente(
+            (Envio(chave=i, mensagem=_msg(i)) for i in range(10)), _cfg(sink), workers=1
+        )
+
+
+def test_rate_limiter_respeita_taxa():
+    limitador = RateLimiter(50)
+    inicio = time.monotonic()
+    for _ in range(11):
+        limitador.aguardar()
+
+    assert time.monotonic() - inicio >= 0.19
+
+
+def test_main_envia_lembretes_em_uma_conexao(sink, monkeypatch):
+    from src.services.clinica_service import ClinicaService
+
+    svc = ClinicaService()
+    hoje = date.today()
+    for i in range(3):
+        p = svc.cadastrar_paciente(
+            nome=f"P{i}", email=f"p{i}@vitally.test", telefone=None, data_entrada=hoje
+        )
+        svc.registrar_pagamento(p.id, hoje - timedelta(days=27))
+    svc.cadastrar_paciente(nome="Sem email", email=None, telefone=None, data_entrada=hoje)
+
+    monkeypatch.setenv("SMTP_HOST", sink.host)
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    monkeypatch.setenv("SMTP_FROM", "clinica@vitally.test")
+    monkeypatch.setenv("SMTP_SECURITY", "nenhuma")
+    monkeypatch.delenv("SMTP_USER", raising=False)
+    monkeypatch.delenv("SMTP_PASS", raising=False)
+
+    assert send_reminders.main([]) == 0
+    assert sink.conexoes == 1
+    assert sorted(m["To"] for m in sink.parsed()) == [f"p{i}@vitally.test" for i in range(3)]
+
+
+def test_main_nao_reenvia_lembretes_ja_registrados(sink, monkeypatch):
+    from src.services.clinica_service import ClinicaService
+
+    svc = ClinicaService()
+    hoje = date.today()
+    for i in range(2):
+        p = svc.cadastrar_paciente(
+            nome=f"P{i}", email=f"p{i}@vitally.test", telefone=None, data_entrada=hoje
+        )
+        svc.registrar_pagamento(p.id, hoje - timedelta(days=27))
+
+    monkeypatch.setenv("SMTP_HOST", sink.host)
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    monkeypatch.setenv("SMTP_FROM", "clinica@vitally.test")
+    monkeypatch.setenv("SMTP_SECURITY", "nenhuma")
+
+    assert send_reminders.main(["--workers", "2"]) == 0
+    assert len(sink.mensagens) == 2
+    assert list(send_reminders.get_pacientes_com_vencimento_em_ate_7_dias()) == []
+
+    assert send_reminders.main([]) == 0
+    assert len(sink.mensagens) == 2
+
+
+def test_falha_libera_shard_para_nova_tentativa(sink, monkeypatch):
+    monkeypatch.setenv("SMTP_HOST", sink.host)
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    monkeypatch.setenv("SMTP_FROM", "clinica@vitally.test")
+    monkeypatch.setenv("SMTP_SECURITY", "nenhuma")
+
+    def _falha(_shard):
+        raise RuntimeError("banco fora")
+
+    original = send_reminders.lembretes_vencimento
+    monkeypatch.setattr(send_reminders, "lembretes_vencimento", _falha)
+    assert send_reminders.main([]) == 3
+    (shard,) = ShardLeaseRepositorySQL().listar(date.today(), send_reminders.TIPO_VENCIMENTO, 1)
+    assert shard.status == "falhou"
+
+    monkeypatch.setattr(send_reminders, "lembretes_vencimento", original)
+    assert send_reminders.main([]) == 0
+    (shard,) = ShardLeaseRepositorySQL().listar(date.today(), send_reminders.TIPO_VENCIMENTO, 1)
+    assert shard.status == "concluido"
+
+
+def test_ledger_desfaz_registro_quando_envio_falha():
+    from src.repositories.lembrete_repository_sql import LembreteRepositorySQL
+    from src.services.clinica_service import ClinicaService
+
+    p = ClinicaService().cadastrar_paciente(
+        nome="P", email="p@vitally.test", telefone=None, data_entrada=date.today()
+    )
+    repo = LembreteRepositorySQL()
+    venc = date.today() + timedelta(days=3)
+
+    with pytest.raises(OSError):
+        with repo.registrar_envio(p.id, venc, "teste") as deve_enviar:
+            assert deve_enviar
+            raise OSError("smtp caiu")
+
+    with repo.registrar_envio(p.id, venc, "teste") as deve_enviar:
+        assert deve_enviar
+
+    with repo.registrar_envio(p.id, venc, "teste") as deve_enviar:
+        assert not deve_enviar
+
+
+def test_ledger_nao_segura_transacao_durante_envio_e_retoma_pendente_antigo():
+    from sqlalchemy import update
+
+    from src.db.db import SessionLocal
+    from src.db.tables import LembreteEnviadoSQL
+    from src.repositories.lembrete_repository_sql import PENDENTE_EXPIRA, LembreteRepositorySQL
+    from src.services.clinica_service import ClinicaService
+
+    p = ClinicaService().cadastrar_paciente(
+        nome="P", email="p@vitally.test", telefone=None, data_entrada=date.today()
+    )
+    repo = LembreteRepositorySQL()
+    venc = date.today() + timedelta(days=3)
+
+    with repo.registrar_envio(p.id, venc, "teste") as deve_enviar:
+        assert deve_enviar
+        with SessionLocal() as s:
+            assert s.query(LembreteEnviadoSQL.status).scalar() == "pendente"
+        ClinicaService().cadastrar_paciente(
+            nome="Q", email=None, telefone=None, data_entrada=date.today()
+        )
+        assert not repo.reservar(p.id, venc, "teste")
+
+    with SessionLocal() as s:
+        assert s.query(LembreteEnviadoSQL.status).scalar() == "enviado"
+
+    assert repo.reservar(p.id, venc, "outro")
+    assert not repo.reservar(p.id, venc, "outro")
+    with SessionLocal() as s:
+        s.execute(
+            update(LembreteEnviadoSQL)
+            .where(LembreteEnviadoSQL.tipo == "outro")
+            .values(enviado_em=LembreteEnviadoSQL.enviado_em - PENDENTE_EXPIRA * 2)
+        )
+        s.commit()
+    assert repo.reservar(p.id, venc, "outro")
+
+
+def test_shards_em_processos_paralelos_nao_duplicam_envios(sink):
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    from src.services.clinica_service import ClinicaService
+
+    svc = ClinicaService()
+    hoje = date.today()
+    for i in range(12):
+        p = svc.cadastrar_paciente(
+            nome=f"P{i}", email=f"p{i}@vitally.test", telefone=None, data_entrada=hoje
+        )
+        svc.registrar_pagamento(p.id, hoje - timedelta(days=25))
+
+    raiz = Path(__file__).resolve().parents[1]
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(raiz),
+        "SMTP_HOST": sink.host,
+        "SMTP_PORT": str(sink.port),
+        "SMTP_FROM": "clinica@vitally.test",
+        "SMTP_SECURITY": "nenhuma",
+    }
+    script = str(raiz / "src" / "utils" / "send_reminders.py")
+    shards = ["0/3", "1/3", "2/3", "0/3"]
+    procs = [
+        subprocess.Popen([sys.executable, script, "--shard", s], env=env, cwd=raiz) for s in shards
+    ]
+    assert [p.wait(timeout=60) for p in procs] == [0] * len(shards)
+
+    destinatarios = [m["To"] for m in sink.parsed()]
+    assert sorted(destinatarios) == sorted(f"p{i}@vitally.test" for i in range(12))
+    assert send_reminders.main(["--resumo", "3"]) == 0
+    shards_hoje = ShardLeaseRepositorySQL().listar(date.today(), send_reminders.TIPO_VENCIMENTO, 3)
+    assert sum(r.enviados for r in shards_hoje) == 12
+    assert send_reminders.main(["--resumo", "4"]) == 1
+
+
+def test_shard_invalido_e_rejeitado():
+    with pytest.raises(SystemExit):
+        send_reminders.parse_args(["--shard", "3/3"])
+
+
+def test_main_tipo_sessao_agrupa_sessoes_de_amanha(sink, monkeypatch):
+    from src.db.db import SessionLocal
+    from src.db.tables import AgendaSQL
+    from src.services.clinica_service import ClinicaService
+
+    svc = ClinicaService()
+    hoje = date.today()
+    amanha = hoje + timedelta(days=1)
+    ana = svc.cadastrar_paciente(
+        nome="Ana", email="ana@vitally.test", telefone=None, data_entrada=hoje
+    )
+    bia = svc.cadastrar_paciente(
+        nome="Bia", email="bia@vitally.test", telefone=None, data_entrada=hoje
+    )
+    fisio = svc.criar_fisioterapeuta("Dra. Lia", None)
+
+    with SessionLocal() as s:
+        for h, pid, data, status in [
+            (8, ana.id, amanha, "agendado"),
+            (10, ana.id, amanha, "agendado"),
+            (15, ana.id, amanha, "agendado"),
+            (9, bia.id, amanha, "cancelado"),
+            (9, bia.id, amanha + timedelta(days=1), "agendado"),
+        ]:
+            s.add(
+                AgendaSQL(
+                    fisio_id=fisio.id,
+                    paciente_id=pid,
+                    data=data,
+                    hora_inicio=dtime(h, 0),
+                    hora_fim=dtime(h, 45),
+                    status=status,
+                )
+            )
+        s.commit()
+
+    monkeypatch.setenv("SMTP_HOST", sink.host)
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    monkeypatch.setenv("SMTP_FROM", "clinica@vitally.test")
+    monkeypatch.setenv("SMTP_SECURITY", "nenhuma")
+
+    assert send_reminders.main(["--tipo", "sessao"]) == 0
+    assert send_reminders.main(["--tipo", "sessao"]) == 0
+
+    msgs = sink.parsed()
+    assert [m["To"] for m in msgs] == ["ana@vitally.test"]
+    corpo = msgs[0].get_body(preferencelist=("plain",)).get_content()
+    for h in ("08:00", "10:00", "15:00"):
+        assert f"{h} às" in corpo
+    assert "Dra. Lia" in corpo
+
+
+def test_sink_simula_falhas_e_contabiliza():
+    with SmtpSink(taxa_falha=1.0, guardar=False) as falho:
+        with SmtpSession(_cfg(falho)) as sessao:
+            with pytest.raises(smtplib.SMTPDataError):
+                sessao.enviar(_msg(0))
+    assert (falho.recebidas, falho.rejeitadas, falho.mensagens) == (0, 1, [])
+
+
+def test_benchmark_roda_os_tres_modos():
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    raiz = Path(__file__).resolve().parents[1]
+    saida = subprocess.run(
+        [
+            sys.executable,
+            str(raiz / "src" / "utils" / "bench_reminders.py"),
+            "--pacientes",
+            "16",
+            "--workers",
+            "2",
+            "--latencia-ms",
+            "0",
+            "--latencia-conexao-ms",
+            "0",
+        ],
+        env={**os.environ, "PYTHONPATH": str(raiz)},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert saida.returncode == 0, saida.stderr
+    for modo in ("sequencial", "pool", "concorrente"):
+        assert f"{modo} " in saida.stderr
+    assert "enviadas=16" in saida.stderr
+    assert "bd/msg=" in saida.stderr
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from src.db.db import SessionLocal, engine
+from src.db.tables import PacienteSQL
+from src.utils.verificar_planos import verificar
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_verificacao_em_base_semeada_passa():
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    env.pop("DATABASE_URL", None)
+    resultado = subprocess.run(
+        [sys.executable, "src/utils/verificar_planos.py", "--pacientes", "300"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    assert "varredura completa" not in resultado.stderr
+
+
+def test_detecta_varredura_completa():
+    if engine.dialect.name != "sqlite":
+        pytest.skip("asserções de plano escritas para o EXPLAIN QUERY PLAN do SQLite")
+
+    def por_nome():
+        with SessionLocal() as s:
+            s.execute(select(PacienteSQL.id).where(PacienteSQL.nome == "Ana")).all()
+
+    def por_id():
+        with SessionLocal() as s:
+            s.get(PacienteSQL, 1)
+
+    assert verificar(engine, {"por_nome": por_nome, "por_id": por_id}) == {
+        "por_nome": ["pacientes"]
+    }